@@ -1,24 +1,20 @@
 # agents/check_entity_node.py
 from __future__ import annotations
 from typing import Dict, List, Tuple, Optional
-from sqlalchemy import text
 from sqlalchemy.engine import Engine
 import re
-from difflib import SequenceMatcher
 
-# Probe order favors ACTORS first (so "sb marke plus" hits superstockist, not product)
-PRIMARY_FIRST  = ["super_stockist_name", "distributor_name", "product_name", "material_description", "material"]
-SHIPMENT_FIRST = ["sold_to_party_name", "material_description", "city", "sales_district", "material"]
+import entity_aliases, entity_extract, entity_index, entity_trgm, schema_catalog
+from entity_trgm import ENTITY_MATCHER
+from schema_registry import entity_columns, fact_candidates
 
-PRODUCT_DIM_COLS       = ["product_name", "base_pack_design_name", "material_description", "alternate_product_category"]
-DISTRIBUTOR_DIM_COLS   = ["distributor_name"]
-SUPERSTOCKIST_DIM_COLS = ["superstockist_name"]
+# Probe order favors ACTORS first (so "sb marke plus" hits superstockist, not product)
+PRIMARY_FIRST  = entity_columns("tbl_primary")
+SHIPMENT_FIRST = entity_columns("tbl_shipment")
 
-STOPWORDS = {
-    "total","overall","sales","sale","sold","amount","value","qty","quantity","units","pieces","pcs",
-    "of","for","in","last","this","that","these","those","month","months","week","weeks","day","days","year","years",
-    "please","pls","plz","clarify","your","you","me","kindly","the","and","or","to","from","by","on","at","a","an","is","are","was","were"
-}
+PRODUCT_DIM_COLS       = entity_columns("tbl_product_master")
+DISTRIBUTOR_DIM_COLS   = entity_columns("tbl_distributor_master")
+SUPERSTOCKIST_DIM_COLS = entity_columns("tbl_superstockist_master")
 
 _USER_Q_RE = re.compile(r"USER QUESTION:\s*(.*)", re.IGNORECASE | re.DOTALL)
 def _effective_text(s: str) -> str:
@@ -28,45 +24,59 @@ def _effective_text(s: str) -> str:
 
 # ---------- DB helpers ----------
 def _table_exists(engine: Engine, table: str) -> bool:
-    with engine.connect() as conn:
-        return conn.execute(text(
-            "SELECT 1 FROM information_schema.tables WHERE table_name = :t LIMIT 1"
-        ), {"t": table}).fetchone() is not None
+    return schema_catalog.has_table(engine, table)
 
 def _existing_columns(engine: Engine, table: str) -> List[str]:
-    with engine.connect() as conn:
-        return [r[0] for r in conn.execute(
-            text("SELECT column_name FROM information_schema.columns WHERE table_name = :t"),
-            {"t": table}
-        ).fetchall()]
-
-def _distinct_values(engine: Engine, table: str, column: str, limit: int = 4000) -> List[str]:
-    sql = text(f'SELECT DISTINCT {column} FROM "{table}" WHERE {column} IS NOT NULL LIMIT :lim')
-    with engine.connect() as conn:
-        return [str(r[0]).strip() for r in conn.execute(sql, {"lim": limit}) if r[0] is not None]
+    return list(schema_catalog.columns(engine, table))
 
 # ---------- fuzzy matching ----------
-def _norm(s: str) -> str:
-    return re.sub(r"[^a-z0-9]+", "", (s or "").lower())
-
-def _score(user_text: str, candidate: str) -> float:
-    if not candidate: return 0.0
-    u = _norm(user_text)
-    c = _norm(candidate)
-    if not u or not c: return 0.0
-    contain = 1.0 if u in c else 0.0
-    toks = [t for t in re.findall(r"[a-z0-9]+", (user_text or "").lower()) if t not in STOPWORDS]
-    cov = (sum(1 for t in toks if t in c) / len(toks)) if toks else 0.0
-    ratio = SequenceMatcher(None, u, c).ratio()
-    return max(ratio, 0.85 * contain + 0.15 * cov)
-
-def _best_match(user_text: str, values: List[str]) -> Tuple[Optional[str], float]:
-    best_v, best_s = None, 0.0
-    for v in values:
-        s = _score(user_text, v)
-        if s > best_s:
-            best_v, best_s = v, s
-    return best_v, best_s
+def _best_match(engine: Engine, table: str, column: str, user_text: str) -> Tuple[Optional[str], float]:
+    # In-memory n-gram index (entity_index): candidate lookup + rerank, no DB round trip
+    return entity_index.get(engine).best_match(table, column, user_text)
+
+def _probes(engine: Engine, route_pref: str) -> List[Tuple[str, str]]:
+    """(table, column) to match, actors first: fact columns, then superstockist, distributor, product masters."""
+    out: List[Tuple[str, str]] = []
+    fact_cols_order = PRIMARY_FIRST if route_pref == "primary" else SHIPMENT_FIRST
+    for tbl in fact_candidates(route_pref):
+        if _table_exists(engine, tbl):
+            existing = set(_existing_columns(engine, tbl))
+            out += [(tbl, c) for c in fact_cols_order if c in existing]
+    for tbl, cols in (("tbl_superstockist_master", SUPERSTOCKIST_DIM_COLS),
+                      ("tbl_distributor_master", DISTRIBUTOR_DIM_COLS),
+                      ("tbl_product_master", PRODUCT_DIM_COLS)):
+        if _table_exists(engine, tbl):
+            existing = set(_existing_columns(engine, tbl))
+            out += [(tbl, c) for c in cols if c in existing]
+    return out
+
+_trgm_ok: Dict[Engine, bool] = {}
+
+def _use_trgm(engine: Engine) -> bool:
+    if ENTITY_MATCHER != "trgm":
+        return False
+    if engine not in _trgm_ok:
+        _trgm_ok[engine] = entity_trgm.available(engine)
+        if not _trgm_ok[engine]:
+            print("❌ ENTITY_MATCHER=trgm needs Postgres with pg_trgm; using the in-memory index")
+    return _trgm_ok[engine]
+
+def _match(engine: Engine, probes: List[Tuple[str, str]], user_text: str) -> List[Tuple[str, str, str, float]]:
+    """Best (table, column, value, score) per probed column that matched anything."""
+    if _use_trgm(engine):
+        try:
+            return [c for c in entity_trgm.best_matches(engine, probes, user_text) if c[2]]
+        except Exception as e:
+            print(f"❌ pg_trgm entity match failed, using the in-memory index: {str(e).splitlines()[0]}")
+    candidates: List[Tuple[str, str, str, float]] = []
+    for tbl, col in probes:
+        try:
+            mv, sc = _best_match(engine, tbl, col, user_text)
+        except Exception:
+            continue
+        if mv:
+            candidates.append((tbl, col, mv, sc))
+    return candidates
 
 def check_entity_node(state: Dict, engine: Engine) -> Dict:
     """
@@ -77,6 +87,8 @@ def check_entity_node(state: Dict, engine: Engine) -> Dict:
       - matched_entity_value (DB string)
       - entity_physical_col ('table.column')
       - confidence (0..1)
+      - entity_alias_hit (True when a learned or pinned alias answered without matching)
+      - entities (every entity span in the question, entity_extract; memory matcher only)
     """
     if engine is None:
         state.update(final_answer=True, query_result="-- Error: No SQLAlchemy engine in state.")
@@ -93,63 +105,20 @@ def check_entity_node(state: Dict, engine: Engine) -> Dict:
         s = user_text.lower()
         route_pref = "shipment" if any(k in s for k in ("shipment", "dispatch", "secondary", "delivery", "invoice")) else "primary"
     state["route_preference"] = route_pref
+    # trgm mode keeps the dictionaries in Postgres, so there is nothing to compile the automaton from
+    state["entities"] = [sp.to_dict() for sp in entity_extract.extract(engine, user_text)] \
+        if ENTITY_MATCHER != "trgm" else []
+
+    aliases = entity_aliases.get(engine)
+    hit = aliases.lookup(user_text, route_pref)
+    if hit:
+        tbl, col, mv, sc = hit
+        state.update(identified_entity=col, matched_entity_value=mv, entity_physical_col=f"{tbl}.{col}",
+                     confidence=float(sc), entity_alias_hit=True, final_answer=False)
+        return state
+    state["entity_alias_hit"] = False
 
-    # Probe order: prefer actors first
-    if route_pref == "primary":
-        fact_tables = ["tbl_primary"]
-        fact_cols_order = PRIMARY_FIRST
-    else:
-        fact_tables = ["tbl_shipment", "tbl_dispatch", "tbl_secondary", "tbl_shipments"]
-        fact_cols_order = SHIPMENT_FIRST
-
-    candidates: List[Tuple[str, str, str, float]] = []
-
-    # 1) fact tables
-    for tbl in fact_tables:
-        if not _table_exists(engine, tbl): continue
-        existing = set(_existing_columns(engine, tbl))
-        for col in [c for c in fact_cols_order if c in existing]:
-            try:
-                vals = _distinct_values(engine, tbl, col)
-            except Exception:
-                continue
-            mv, sc = _best_match(user_text, vals)
-            if mv:
-                candidates.append((tbl, col, mv, sc))
-
-    # 2) dimensions — superstockist, distributor, then product master
-    if _table_exists(engine, "tbl_superstockist_master"):
-        ex = set(_existing_columns(engine, "tbl_superstockist_master"))
-        for col in [c for c in SUPERSTOCKIST_DIM_COLS if c in ex]:
-            try:
-                vals = _distinct_values(engine, "tbl_superstockist_master", col)
-            except Exception:
-                vals = []
-            mv, sc = _best_match(user_text, vals)
-            if mv:
-                candidates.append(("tbl_superstockist_master", col, mv, sc))
-
-    if _table_exists(engine, "tbl_distributor_master"):
-        ex = set(_existing_columns(engine, "tbl_distributor_master"))
-        for col in [c for c in DISTRIBUTOR_DIM_COLS if c in ex]:
-            try:
-                vals = _distinct_values(engine, "tbl_distributor_master", col)
-            except Exception:
-                vals = []
-            mv, sc = _best_match(user_text, vals)
-            if mv:
-                candidates.append(("tbl_distributor_master", col, mv, sc))
-
-    if _table_exists(engine, "tbl_product_master"):
-        ex = set(_existing_columns(engine, "tbl_product_master"))
-        for col in [c for c in PRODUCT_DIM_COLS if c in ex]:
-            try:
-                vals = _distinct_values(engine, "tbl_product_master", col)
-            except Exception:
-                vals = []
-            mv, sc = _best_match(user_text, vals)
-            if mv:
-                candidates.append(("tbl_product_master", col, mv, sc))
+    candidates = _match(engine, _probes(engine, route_pref), user_text)
 
     # Rank: actors > score > string length
     def _priority(col: str) -> int:
@@ -161,6 +130,7 @@ def check_entity_node(state: Dict, engine: Engine) -> Dict:
     if candidates:
         candidates.sort(key=lambda t: (_priority(t[1]), t[3], len(t[2] or "")), reverse=True)
         tbl, col, mv, sc = candidates[0]
+        aliases.learn(user_text, route_pref, (tbl, col, mv, float(sc)))
         state.update(
             identified_entity=col,
             matched_entity_value=mv,
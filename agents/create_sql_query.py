@@ -1,93 +1,43 @@
 # agents/create_sql_query.py
 from __future__ import annotations
-import re, json, pickle
-from typing import Dict, List, Optional, Tuple
-from sqlalchemy import text
+import re, pickle, time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
 from sqlalchemy.engine import Engine
 
-# -------- Optional KB & relationships (used if available) --------
+import join_graph, schema_catalog, search_text, sql_templates
+from join_graph import JoinEdge
+from schema_registry import SEARCH_TEXT_COLUMN, fact_candidates, fact_date_column, measure_column, rollup_table
+
+# -------- Optional KB (used if available) --------
 try:
     with open("kb_haldiram_primary.pkl", "rb") as f:
         _KB: Dict[str, str] = pickle.load(f)
 except Exception:
     _KB = {}
 
-try:
-    with open("relationship_tables.txt", "r", encoding="utf-8") as f:
-        _REL_RAW = f.read()
-except Exception:
-    _REL_RAW = ""
-
-def _safe_json(x: str):
-    try: return json.loads(x)
-    except Exception: return None
-
-def _parse_relationships(raw: str):
-    rel = _safe_json(raw)
-    out: List[Tuple[str,str,str,str]] = []
-    if not rel: return out
-    items = rel.get("relationships") if isinstance(rel, dict) and "relationships" in rel else rel
-    if not isinstance(items, list): return out
-    for r in items:
-        lt = r.get("left_table") or r.get("table_a") or r.get("from_table")
-        lc = r.get("left_column") or r.get("col_a") or r.get("from_column")
-        rt = r.get("right_table") or r.get("table_b") or r.get("to_table")
-        rc = r.get("right_column") or r.get("col_b") or r.get("to_column")
-        if lt and lc and rt and rc:
-            out.append((lt, lc, rt, rc))
-    return out
-
-REL_EDGES = _parse_relationships(_REL_RAW)
-
 # ---------------- DB helpers ----------------
+# Served from the process-wide catalog (schema_catalog), not information_schema per call
 def _table_exists(engine: Engine, table: str) -> bool:
-    with engine.connect() as conn:
-        return conn.execute(text("""
-            SELECT 1 FROM information_schema.tables
-            WHERE table_name = :t LIMIT 1
-        """), {"t": table}).fetchone() is not None
+    return schema_catalog.has_table(engine, table)
 
 def _columns(engine: Engine, table: str) -> Dict[str, str]:
-    with engine.connect() as conn:
-        rows = conn.execute(text("""
-            SELECT column_name, data_type
-            FROM information_schema.columns
-            WHERE table_name = :t
-            ORDER BY ordinal_position
-        """), {"t": table}).fetchall()
-    return {r[0]: r[1] for r in rows}
+    return schema_catalog.columns(engine, table)
 
 def _existing_cols(engine: Engine, table: str) -> List[str]:
     return list(_columns(engine, table).keys())
 
-def _direct_join(a: str, b: str) -> Optional[Tuple[str,str]]:
-    for lt, lc, rt, rc in REL_EDGES:
-        if lt == a and rt == b: return lc, rc
-        if lt == b and rt == a: return rc, lc
-    return None
-
-def _first_working_key(engine: Engine, fact: str, dim: str) -> Optional[Tuple[str,str]]:
-    fcols = _columns(engine, fact)
-    dcols = _columns(engine, dim)
-    rel = _direct_join(fact, dim)
-    if rel and rel[0] in fcols and rel[1] in dcols:
-        return rel
-    pairs = [
-        ("product_id","product_id"),
-        ("material","product_id"),
-        ("base_pack_design_id","base_pack_design_id"),
-        ("sku_id","sku_id"),
-        ("distributor_id","distributor_erp_id"),
-        ("super_stockist_id","superstockist_id"),
-        ("sold_to_party","superstockist_id"),
-    ]
-    for fkey, dkey in pairs:
-        if fkey in fcols and dkey in dcols:
-            return (fkey, dkey)
-    for c in fcols:
-        if c in dcols:
-            return (c, c)
-    return None
+def _join_to(engine: Engine, fact: str, dim: str, alias: str,
+             fallback: Tuple[str, str]) -> Tuple[str, str, str]:
+    """
+    (LEFT JOIN SQL from p to `dim` AS `alias`, key expression to group on, dim join column),
+    planned on the shared join graph; `fallback` keys are used if it has no path.
+    """
+    path = join_graph.get(engine).path(fact, dim)
+    if not path:
+        path = (JoinEdge(fact, fallback[0], dim, fallback[1], "fallback", 0),)
+    key = f"p.{path[0].left_column}" if len(path) == 1 else f"{alias}.{path[-1].right_column}"
+    return join_graph.join_clauses(path, alias), key, path[-1].right_column
 
 # ---------------- Parse real question ----------------
 _USER_Q_RE = re.compile(r"USER QUESTION:\s*(.*)", re.IGNORECASE | re.DOTALL)
@@ -183,17 +133,95 @@ def _tokens(q: str) -> List[str]:
             out.append(wl)
     return out
 
-def _or_like(prefix: str, cols: List[str], toks: List[str]) -> Optional[str]:
+def _or_like(prefix: str, cols: List[str], toks: List[str], params: "_Params") -> Optional[str]:
     if not cols or not toks: return None
     terms = []
     for c in cols:
-        for t in toks:
-            terms.append(f"LOWER({prefix}.{c}) ILIKE LOWER('%{t}%')")
+        for i in range(len(toks)):
+            terms.append(f"LOWER({prefix}.{c}) ILIKE {params.bind('tok', f'tok:{i}')}")
     return "(" + " OR ".join(terms) + ")"
 
+def _search_like(terms: List[str], params: "_Params") -> Optional[str]:
+    """One `p.search_text LIKE` per search term, ANDed (see search_text)."""
+    if not terms: return None
+    return "(" + " AND ".join(f"p.{SEARCH_TEXT_COLUMN} LIKE {params.bind('tok', f'term:{i}')}"
+                              for i in range(len(terms))) + ")"
+
+# ------------- Bound parameters -------------
+class _Params(dict):
+    """
+    Values of one generated query. Every value the question supplies is bound, never spliced
+    into the SQL, so questions of one shape produce one SQL text (execute_sql_query reuses its
+    prepared plan) and names like "Haldiram's" need no quoting.
+
+    A placeholder is bound to a slot of the question's intent ('window', 'tok:0', 'span:1:0')
+    rather than to a value, so a template and its slot map can be cached (sql_templates) and
+    re-bound for the next question of the same shape.
+    """
+
+    def __init__(self, slots: Dict[str, Any]):
+        super().__init__()
+        self.slots = slots
+        self.sources: Dict[str, str] = {}  # placeholder -> slot
+
+    def bind(self, prefix: str, slot: str) -> str:
+        for k, s in self.sources.items():
+            if s == slot and k.startswith(prefix + "_"):
+                return f":{k}"
+        name = f"{prefix}_{len(self)}"
+        self[name] = self.slots[slot]
+        self.sources[name] = slot
+        return f":{name}"
+
+def like_slots(prefix: str, words: List[str]) -> Dict[str, str]:
+    return {f"{prefix}:{i}": f"%{w}%" for i, w in enumerate(words)}
+
+# ------------- Extracted entities (entity_extract spans from check_entity_node) -------------
+_DIM_ALIAS = {"tbl_superstockist_master": "d_ss", "tbl_distributor_master": "d_dist", "tbl_product_master": "d_prod"}
+_PRODUCT_KINDS = ("product", "category")
+
+def _span_targets(engine: Engine, fact: str, fact_cols: List[str], span: dict) -> List[Tuple[int, str, str]]:
+    """
+    (index into span["values"], column expression, dimension or '') for each column `fact`
+    can filter `span` on: the fact's own column when it has one, else a dimension the join
+    graph reaches.
+    """
+    targets = span.get("values", [])
+    on_fact = [(k, f"p.{v['column']}", "") for k, v in enumerate(targets)
+               if v["table"] == fact and v["column"] in fact_cols]
+    if on_fact:
+        return on_fact
+    out = []
+    for k, v in enumerate(targets):
+        alias = _DIM_ALIAS.get(v["table"])
+        if alias and _table_exists(engine, v["table"]) and join_graph.get(engine).path(fact, v["table"]):
+            out.append((k, f"{alias}.{v['column']}", v["table"]))
+    return out
+
+def _span_filters(engine: Engine, fact: str, fact_cols: List[str], spans: List[dict],
+                  params: _Params) -> Tuple[List[str], str]:
+    """
+    (filters, join SQL). Each span becomes an exact `= ANY(:list)` over the values it matched
+    on every target column. Spans of one kind are ORed; different kinds are ANDed by the caller.
+    """
+    by_kind: Dict[str, List[str]] = {}
+    joins: Dict[str, str] = {}
+    for i, span in enumerate(spans):
+        ors = []
+        for k, col, dim in _span_targets(engine, fact, fact_cols, span):
+            if dim and dim not in joins:
+                joins[dim] = _join_to(engine, fact, dim, _DIM_ALIAS[dim], ("", ""))[0]
+            ors.append(f"{col} = ANY({params.bind('ent', f'span:{i}:{k}')})")
+        by_kind.setdefault(span["kind"], []).append(" OR ".join(ors))
+    filters = [f"({' OR '.join(parts)})" for parts in by_kind.values()]
+    return filters, "".join(joins.values())
+
 # ---------------- Measure & date pickers ----------------
 def _pick_measure(engine: Engine, fact: str, hint: str) -> Optional[str]:
     cols = _columns(engine, fact)
+    declared = measure_column(fact, "qty" if hint == "auto" else hint)
+    if declared in cols:
+        return declared
     names = list(cols.keys())
     value_pref = [c for c in names if any(k in c.lower() for k in ("invoice_value","sales_value","amount","value"))]
     qty_pref   = [c for c in names if any(k in c.lower() for k in ("invoiced_total_quantity","actual_billed_quantity","qty","quantity"))]
@@ -209,6 +237,9 @@ def _pick_measure(engine: Engine, fact: str, hint: str) -> Optional[str]:
 
 def _pick_date(engine: Engine, fact: str) -> Optional[str]:
     cols = _columns(engine, fact)
+    declared = fact_date_column(fact)
+    if declared in cols:
+        return declared
     for cand in ("sales_order_date","bill_date","invoice_date"):
         if cand in cols: return cand
     for c, t in cols.items():
@@ -216,8 +247,108 @@ def _pick_date(engine: Engine, fact: str) -> Optional[str]:
             return c
     return None
 
+# ---------------- Rollup routing ----------------
+_P_COL_RE = re.compile(r"\bp\.(\w+)")
+# Aggregates a rollup answers exactly: its measure columns hold per-bucket SUMs, so only
+# SUM over them adds up (COUNT(*), AVG and COUNT DISTINCT would count buckets, not rows)
+_ROLLUP_AGGREGATES = {"SUM"}
+
+def _rollup_source(engine: Engine, fact: str, used: Set[str], aggregates: List[Tuple[str, str]],
+                   date_col: Optional[str]) -> Optional[str]:
+    """
+    The rollup of `fact` a query can read instead, or None. `used` is every fact column the
+    query touches and `aggregates` its (function, column) pairs. The monthly rollup truncates
+    the date column to the month, so a query that touches it (a window ending mid-month, a
+    day-level GROUP BY) needs the daily one; otherwise the monthly rollup is smallest.
+    """
+    if not aggregates or any(fn.upper() not in _ROLLUP_AGGREGATES for fn, _ in aggregates):
+        return None
+    for grain in (["daily"] if date_col and date_col in used else ["monthly", "daily"]):
+        name = rollup_table(fact, grain)
+        cols = _columns(engine, name)
+        if cols and used <= set(cols):
+            return name
+    return None
+
+def _source(engine: Engine, fact: str, fragments: List[str], aggregates: List[Tuple[str, str]],
+            date_col: Optional[str]) -> Tuple[str, Optional[str]]:
+    """(table the FROM reads, rollup table or None) for a query made of `fragments`."""
+    used = set(_P_COL_RE.findall(" ".join(fragments))) | {c for _, c in aggregates}
+    rollup = _rollup_source(engine, fact, used, aggregates, date_col)
+    return rollup or fact, rollup
+
+# ---------------- Intent ----------------
+@dataclass
+class _Intent:
+    """What the question and the upstream nodes ask for, values included."""
+    route: str
+    fact: str
+    use_search: bool  # fact carries the normalized search column
+    window: Optional[str]
+    metric_hint: str
+    topn: Optional[int]
+    breakdown_kind: Optional[str]
+    explicit_kind: Optional[str]
+    identified_entity: str
+    matched_value: Optional[str]
+    confidence: float
+    spans: List[dict] = field(default_factory=list)  # entity_extract spans this fact can filter on
+    toks: List[str] = field(default_factory=list)    # loose tokens the spans leave
+    terms: List[str] = field(default_factory=list)   # toks as search_text terms, known words only
+
+    @property
+    def searched(self) -> bool:
+        """Loose tokens go to search_text; False keeps the per-column OR filters."""
+        return self.use_search and bool(self.terms)
+
+    def matched(self, threshold: float) -> bool:
+        return bool(self.matched_value) and self.confidence >= threshold
+
+    def signature(self) -> tuple:
+        """The query's shape without its values; with the catalog generation it decides the SQL text."""
+        return (self.route, self.fact, self.searched, self.metric_hint,
+                self.window is not None, self.topn is not None, bool(self.topn),
+                self.breakdown_kind, self.explicit_kind,
+                "superstockist" in self.identified_entity, "distributor" in self.identified_entity,
+                self.matched(0.30), self.matched(0.50),
+                tuple((s["kind"], tuple((v["table"], v["column"]) for v in s.get("values", []))) for s in self.spans),
+                0 if self.searched else len(self.toks), len(self.terms),
+                schema_catalog.generation())
+
+    def slots(self) -> Dict[str, Any]:
+        """Every value a template can bind, keyed by slot (see _Params)."""
+        out: Dict[str, Any] = {"window": self.window, "topn": int(self.topn) if self.topn else None,
+                               "entity": f"%{self.matched_value}%"}
+        out.update(like_slots("tok", self.toks))
+        out.update(like_slots("term", self.terms))
+        for i, span in enumerate(self.spans):
+            out.update({f"span:{i}:{k}": list(v["values"]) for k, v in enumerate(span.get("values", []))})
+        return out
+
+def _intent(state: dict, engine: Engine, qtext: str, rp: str, fact: str) -> _Intent:
+    fact_cols = _existing_cols(engine, fact)
+    # every entity the question names that this fact can filter on; their words leave the tokens
+    spans = [s for s in state.get("entities") or [] if _span_targets(engine, fact, fact_cols, s)]
+    covered = {w for s in spans for w in s["text"].split()}
+    toks = [t for t in _tokens(qtext) if t not in covered]
+    use_search = SEARCH_TEXT_COLUMN in fact_cols
+    return _Intent(
+        route=rp, fact=fact, use_search=use_search,
+        window=_parse_window(qtext),
+        metric_hint=_parse_metric_hint(qtext),
+        topn=_parse_topn(qtext),
+        breakdown_kind=_breakdown_kind_from_text(qtext),
+        explicit_kind=_explicit_entity_from_text(qtext),
+        identified_entity=(state.get("identified_entity") or "").lower(),
+        matched_value=state.get("matched_entity_value"),
+        confidence=float(state.get("confidence") or 0.0),
+        spans=spans, toks=toks,
+        terms=search_text.query_terms(engine, fact, toks) if use_search else [],
+    )
+
 # ---------------- Main ----------------
 def create_sql_query(state: dict) -> dict:
+    started = time.perf_counter()
     qtext = _question(state)
     engine: Engine = state.get("engine")
     if engine is None:
@@ -230,42 +361,49 @@ def create_sql_query(state: dict) -> dict:
         rp = "shipment" if any(w in qtext.lower() for w in ("shipment","dispatch","secondary","delivery","invoice")) else "primary"
 
     # Fact table
-    if rp == "primary":
-        fact = "tbl_primary" if _table_exists(engine,"tbl_primary") else None
-    else:
-        fact = None
-        for cand in ("tbl_shipment","tbl_dispatch","tbl_secondary","tbl_shipments"):
-            if _table_exists(engine, cand):
-                fact = cand; break
+    fact = None
+    for cand in fact_candidates(rp):
+        if _table_exists(engine, cand):
+            fact = cand; break
     if not fact:
         state.update(final_answer=True, query_result=f"-- Error: {rp} table not available in DB.")
         return state
 
-    fact_cols = _existing_cols(engine, fact)
+    intent = _intent(state, engine, qtext, rp, fact)
+    sig = intent.signature()
+    tpl = sql_templates.lookup(sig)
+    if tpl is not None:
+        slots = intent.slots()
+        state.update(sql_query=tpl.sql, rollup_table=tpl.rollup_table,
+                     sql_params={name: slots[slot] for name, slot in tpl.slots},
+                     final_answer=False, route=rp, sql_template="hit")
+        sql_templates.timed("hit", (time.perf_counter() - started) * 1000)
+        return state
+
+    params = _Params(intent.slots())
+    state = _generate(state, engine, intent, params)
+    if not state.get("final_answer"):
+        sql_templates.store(sig, sql_templates.Template(state["sql_query"], state.get("rollup_table"),
+                                                        tuple(params.sources.items())))
+        state["sql_template"] = "miss"
+        sql_templates.timed("miss", (time.perf_counter() - started) * 1000)
+    return state
 
-    # Time window (explicit only)
-    window = _parse_window(qtext)
+def _generate(state: dict, engine: Engine, it: _Intent, params: _Params) -> dict:
+    rp, fact = it.route, it.fact
+    fact_cols = _existing_cols(engine, fact)
+    window = it.window
     date_col = _pick_date(engine, fact)
 
     # Metric
-    metric_hint = _parse_metric_hint(qtext)
-    measure = _pick_measure(engine, fact, metric_hint)
+    measure = _pick_measure(engine, fact, it.metric_hint)
     if not measure:
         state.update(final_answer=True, query_result=f"-- Error: Could not pick a numeric measure from {fact}.")
         return state
 
-    # Tokens for LIKE searches (e.g., 'bhujia')
-    toks = _tokens(qtext)
-
-    # Entity detection from previous node (actor/product)
-    identified_entity = (state.get("identified_entity") or "").lower()
-    matched_value = state.get("matched_entity_value")
-    confidence = float(state.get("confidence") or 0.0)
-    physical_col = state.get("entity_physical_col")  # e.g., 'tbl_superstockist_master.superstockist_name'
-
     # We only do a grouping if the user asked for a list/breakdown
-    topn = _parse_topn(qtext)
-    breakdown_kind = _breakdown_kind_from_text(qtext)
+    topn = it.topn
+    breakdown_kind = it.breakdown_kind
     wants_list = topn is not None or breakdown_kind is not None
 
     # Build filters
@@ -273,7 +411,17 @@ def create_sql_query(state: dict) -> dict:
     join_sql = ""
 
     if window and date_col:
-        filters.append(f"p.{date_col} >= (CURRENT_DATE - INTERVAL '{window}')")
+        filters.append(f"p.{date_col} >= (CURRENT_DATE - CAST({params.bind('window', 'window')} AS INTERVAL))")
+
+    # --------- EXACT ENTITY FILTERS (every entity the question names) ----------
+    span_filters, span_joins = _span_filters(engine, fact, fact_cols, it.spans, params)
+    filters += span_filters
+    join_sql += span_joins
+    span_kinds = {s["kind"] for s in it.spans}
+
+    # Tables loaded with the normalized search column take every known loose token there, once;
+    # older loads, and questions none of whose tokens name anything, keep the ILIKE filters below
+    loose = [] if it.searched else it.toks
 
     # --------- ACTOR FILTERS (superstockist/distributor) ----------
     def _add_superstockist_filter():
@@ -281,58 +429,63 @@ def create_sql_query(state: dict) -> dict:
         # Shipment: prefer direct name column
         if "sold_to_party_name" in fact_cols:
             # use matched value if decent; also allow name tokens from query
-            if matched_value and confidence >= 0.30:
-                filters.append(f"LOWER(p.sold_to_party_name) ILIKE LOWER('%{matched_value}%')")
+            if it.matched(0.30):
+                filters.append(f"LOWER(p.sold_to_party_name) ILIKE LOWER({params.bind('entity', 'entity')})")
             # add loose tokens, too (e.g., 'marke')
-            name_like = _or_like("p", ["sold_to_party_name"], toks)
+            name_like = _or_like("p", ["sold_to_party_name"], loose, params)
             if name_like: filters.append(name_like)
         else:
             # Join to superstockist master via best key
             dim = "tbl_superstockist_master"
             if _table_exists(engine, dim):
-                keys = _first_working_key(engine, fact, dim) or ("sold_to_party","superstockist_id")
-                fkey, dkey = keys
-                join_sql += f'\nLEFT JOIN "{dim}" d_ss ON p.{fkey} = d_ss.{dkey}'
+                clause, _, dkey = _join_to(engine, fact, dim, "d_ss", ("sold_to_party","superstockist_id"))
+                join_sql += clause
                 dim_cols = _existing_cols(engine, dim)
                 name_col = "superstockist_name" if "superstockist_name" in dim_cols else dkey
-                if matched_value and confidence >= 0.30:
-                    filters.append(f"LOWER(d_ss.{name_col}) ILIKE LOWER('%{matched_value}%')")
-                name_like = _or_like("d_ss", [name_col], toks)
+                if it.matched(0.30):
+                    filters.append(f"LOWER(d_ss.{name_col}) ILIKE LOWER({params.bind('entity', 'entity')})")
+                name_like = _or_like("d_ss", [name_col], loose, params)
                 if name_like: filters.append(name_like)
 
     def _add_distributor_filter():
         nonlocal join_sql
         if rp == "primary":
             if "distributor_name" in fact_cols:
-                if matched_value and confidence >= 0.50:
-                    filters.append(f"LOWER(p.distributor_name) ILIKE LOWER('%{matched_value}%')")
-                name_like = _or_like("p", ["distributor_name"], toks)
+                if it.matched(0.50):
+                    filters.append(f"LOWER(p.distributor_name) ILIKE LOWER({params.bind('entity', 'entity')})")
+                name_like = _or_like("p", ["distributor_name"], loose, params)
                 if name_like: filters.append(name_like)
             else:
                 dim = "tbl_distributor_master"
                 if _table_exists(engine, dim):
-                    keys = _first_working_key(engine, fact, dim) or ("distributor_id","distributor_erp_id")
-                    fkey, dkey = keys
-                    join_sql += f'\nLEFT JOIN "{dim}" d_dist ON p.{fkey} = d_dist.{dkey}'
+                    clause, _, dkey = _join_to(engine, fact, dim, "d_dist", ("distributor_id","distributor_erp_id"))
+                    join_sql += clause
                     dim_cols = _existing_cols(engine, dim)
                     name_col = "distributor_name" if "distributor_name" in dim_cols else dkey
-                    if matched_value and confidence >= 0.50:
-                        filters.append(f"LOWER(d_dist.{name_col}) ILIKE LOWER('%{matched_value}%')")
-                    name_like = _or_like("d_dist", [name_col], toks)
+                    if it.matched(0.50):
+                        filters.append(f"LOWER(d_dist.{name_col}) ILIKE LOWER({params.bind('entity', 'entity')})")
+                    name_like = _or_like("d_dist", [name_col], loose, params)
                     if name_like: filters.append(name_like)
 
     # Apply actor filters based on either explicit hint or detector
-    explicit_kind = _explicit_entity_from_text(qtext)
-    if (explicit_kind == "superstockist") or ("superstockist" in identified_entity):
+    explicit_kind, identified_entity = it.explicit_kind, it.identified_entity
+    if "superstockist" not in span_kinds and \
+            ((explicit_kind == "superstockist") or ("superstockist" in identified_entity)):
         _add_superstockist_filter()
-    if rp == "primary" and ((explicit_kind == "distributor") or ("distributor" in identified_entity)):
+    if rp == "primary" and "distributor" not in span_kinds and \
+            ((explicit_kind == "distributor") or ("distributor" in identified_entity)):
         _add_distributor_filter()
 
     # --------- PRODUCT TEXT FILTERS ----------
-    product_text_cols = [c for c in ("product_name","material_description","base_pack_design_name","material") if c in fact_cols]
-    prod_like = _or_like("p", product_text_cols, toks)
-    if prod_like:
-        filters.append(prod_like)
+    if it.searched:
+        search_like = _search_like(it.terms, params)
+        if search_like:
+            filters.append(search_like)
+    elif not span_kinds & set(_PRODUCT_KINDS):
+        product_text_cols = [c for c in ("product_name","material_description","base_pack_design_name","material") if c in fact_cols]
+        prod_like = _or_like("p", product_text_cols, it.toks, params)
+        if prod_like:
+            filters.append(prod_like)
 
     # WHERE
     where_sql = ("WHERE " + " AND ".join(filters)) if filters else ""
@@ -348,23 +501,19 @@ def create_sql_query(state: dict) -> dict:
             else:
                 dim = "tbl_superstockist_master"
                 if _table_exists(engine, dim):
-                    keys = _first_working_key(engine, fact, dim) or ("sold_to_party","superstockist_id")
-                    fkey, dkey = keys
-                    g_join = f'\nLEFT JOIN "{dim}" d_gss ON p.{fkey} = d_gss.{dkey}'
+                    g_join, g_key, dkey = _join_to(engine, fact, dim, "d_gss", ("sold_to_party","superstockist_id"))
                     dim_cols = _existing_cols(engine, dim)
                     name_col = "superstockist_name" if "superstockist_name" in dim_cols else dkey
-                    g_key, g_name = f"p.{fkey}", f"d_gss.{name_col}"
+                    g_name = f"d_gss.{name_col}"
         elif breakdown_kind == "distributor" and rp == "primary":
             if "distributor_name" in fact_cols:
                 g_key, g_name = "p.distributor_id" if "distributor_id" in fact_cols else "p.distributor_name", "p.distributor_name"
             else:
                 dim = "tbl_distributor_master"
                 if _table_exists(engine, dim):
-                    keys = _first_working_key(engine, fact, dim) or ("distributor_id","distributor_erp_id")
-                    fkey, dkey = keys
-                    g_join = f'\nLEFT JOIN "{dim}" d_gd ON p.{fkey} = d_gd.{dkey}'
+                    g_join, g_key, dkey = _join_to(engine, fact, dim, "d_gd", ("distributor_id","distributor_erp_id"))
                     name_col = "distributor_name" if "distributor_name" in _existing_cols(engine, dim) else dkey
-                    g_key, g_name = f"p.{fkey}", f"d_gd.{name_col}"
+                    g_name = f"d_gd.{name_col}"
         else:
             # product grouping
             if "material" in fact_cols:
@@ -378,30 +527,32 @@ def create_sql_query(state: dict) -> dict:
         name_sql = f", {g_name} AS display_name" if g_name else ""
         extra_join = g_join
 
-        limit_sql = f"\nLIMIT {int(topn)}" if topn else ""
-        sql = f"""
+        limit_sql = f"\nLIMIT {params.bind('topn', 'topn')}" if topn else ""
+        source, state["rollup_table"] = _source(engine, fact, [join_sql, extra_join, where_sql, gb, name_sql],
+                                                [("SUM", measure)], date_col)
+        state["sql_query"] = f"""
 SELECT
   {g_key} AS entity_key{name_sql},
   SUM(p.{measure}) AS total_sales
-FROM "{fact}" p{join_sql}{extra_join}
+FROM "{source}" p{join_sql}{extra_join}
 {where_sql}
 GROUP BY {gb}
 ORDER BY SUM(p.{measure}) DESC{limit_sql}
 """.strip()
-        state["sql_query"] = sql
+        state["sql_params"] = dict(params)
         state["final_answer"] = False
         state["route"] = rp
         return state
 
     # Otherwise: single SUM over filtered rows (your “total sales by sb marke for Bhujia product” case)
-    sql = f"""
+    source, state["rollup_table"] = _source(engine, fact, [join_sql, where_sql], [("SUM", measure)], date_col)
+    state["sql_query"] = f"""
 SELECT
   SUM(p.{measure}) AS total_value
-FROM "{fact}" p{join_sql}
+FROM "{source}" p{join_sql}
 {where_sql}
 """.strip()
-
-    state["sql_query"] = sql
+    state["sql_params"] = dict(params)
     state["final_answer"] = False
     state["route"] = rp
     return state
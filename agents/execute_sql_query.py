@@ -1,9 +1,10 @@
 # agents/execute_sql_query.py
 from __future__ import annotations
-from typing import Dict, List, Any
-from sqlalchemy import text
+from typing import Dict
 from sqlalchemy.engine import Engine
 
+import prepared_statements, result_cache
+
 def execute_sql_query(state: Dict) -> Dict:
     sql = (state.get("sql_query") or "").strip()
     if not sql:
@@ -15,15 +16,22 @@ def execute_sql_query(state: Dict) -> Dict:
         state.update(exec_success=False, error_message="No SQLAlchemy engine in state", rows=[], columns=[])
         return state
 
+    params = state.get("sql_params") or {}
+    cache = result_cache.get(engine) if result_cache.enabled() else None
+    cached = cache.lookup(sql, params) if cache else None
+    if cached is not None:
+        rows, cols = cached
+        state.update(exec_success=True, error_message="", rows=rows, columns=cols, result_cache="hit")
+        return state
+
     try:
-        with engine.connect() as conn:
-            rs = conn.execute(text(sql))
-            try:
-                rows: List[Any] = rs.fetchall()
-                cols = list(rs.keys())
-            except Exception:
-                rows, cols = [], []
-        state.update(exec_success=True, error_message="", rows=rows, columns=cols)
+        # Bound parameters from create_sql_query; same-shape questions reuse one prepared plan
+        rows, cols, plan = prepared_statements.execute(engine, sql, params)
+        state.update(exec_success=True, error_message="", rows=rows, columns=cols, plan_cache=plan,
+                     result_cache="miss" if cache else "off")
     except Exception as e:
         state.update(exec_success=False, error_message=str(e), rows=[], columns=[])
+        return state
+    if cache:
+        cache.store(sql, params, rows, cols)
     return state
@@ -1,9 +1,10 @@
 # agents/find_tables.py
 from __future__ import annotations
 from typing import Dict, List
-from sqlalchemy import inspect
 from sqlalchemy.engine import Engine
 
+import schema_catalog
+
 def find_tables_node(state: Dict) -> Dict:
     """
     Exact allowlist rule:
@@ -18,8 +19,8 @@ def find_tables_node(state: Dict) -> Dict:
         state["tables"] = []
         return state
 
-    insp = inspect(engine)
-    all_tables: List[str] = sorted(insp.get_table_names())
+    # underscore-prefixed tables are ingest bookkeeping, never queried by the bot
+    all_tables: List[str] = schema_catalog.tables(engine)
 
     if route == "shipment":
         allowed = [t for t in all_tables if t != "tbl_primary"]
@@ -1,20 +1,25 @@
 import json, re
 from langchain_openai import ChatOpenAI
 
+from db_backend import dialect_of
+from prepared_statements import inline
+
 llm = ChatOpenAI(model="gpt-4o", temperature=0)
 
 def rewrite_sql_query(state: dict) -> dict:
     user_query = state.get("user_query", "")
-    prev_sql = state.get("sql_query", "")
+    # The model sees (and returns) plain SQL, so the template's values are written in
+    prev_sql = inline(state.get("sql_query", ""), state.get("sql_params") or {})
     error_msg = state.get("error_message", "")
     tables = state.get("tables", [])
     retry_count = int(state.get("retry_count", 0))
+    dialect = "DuckDB" if dialect_of(state.get("engine")) == "duckdb" else "PostgreSQL"
 
     messages = [
         {
             "role": "system",
             "content": (
-                "You are an expert SQL fixer for PostgreSQL. "
+                f"You are an expert SQL fixer for {dialect}. "
                 "Given a user intent, allowed tables, the failing SQL, and the error, "
                 "return ONLY a corrected SQL query. Do not include explanations. "
                 "If the query references product name in tbl_product_master, use base_pack_design_name."
@@ -34,6 +39,7 @@ def rewrite_sql_query(state: dict) -> dict:
         fixed_sql = resp.content.strip()
         fixed_sql = re.sub(r"^```sql\s*|^```\s*|```$", "", fixed_sql, flags=re.I|re.M).strip()
         state["sql_query"] = fixed_sql
+        state["sql_params"] = {}
     except Exception as e:
         state["error_message"] = f"Rewrite failed: {e}"
 
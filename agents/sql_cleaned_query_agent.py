@@ -3,12 +3,16 @@ from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
+import os
 import re
+import time
+
+from schema_retrieval import count_tokens, prompt_schema
 
 load_dotenv(override=True)
 
-with open("annotated_schema_haldiram_primary.md", "r", encoding="utf-8") as f:
-    schema_markdown = f.read()
+# The metrics always go into the state (and the reply); set CLEAN_QUERY_DEBUG=1 to also print them
+DEBUG = os.getenv("CLEAN_QUERY_DEBUG", "0") == "1"
 
 # LLM used to clean/schema-align queries
 llm = ChatOpenAI(model="gpt-4o", temperature=0)
@@ -18,8 +22,9 @@ qa_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
 
 # --- Prompt for schema-aligned cleaning ---
 # (returns natural-language rewrite OR the literal token OUT_OF_SCOPE)
+# The schema is only the tables relevant to the question (schema_retrieval.prompt_schema)
 query_clean_prompt = ChatPromptTemplate.from_messages([
-    ("system", f"""
+    ("system", """
 You are a product manager for a Text-to-SQL system.
 
 You will be given:
@@ -38,13 +43,33 @@ CRITICAL:
 - Do NOT generate SQL. Output must remain natural-language and schema-aligned when in scope.
 
 Schema:
-{schema_markdown}
+{schema}
 """),
     ("human", "User query: {user_query}")
 ])
 
 chain = query_clean_prompt | llm | StrOutputParser()
 
+def _clean(user_query: str, route: str | None = None, pruning: bool | None = None) -> tuple[str, dict]:
+    """Run the cleaning chain, streamed so time-to-first-token can be measured."""
+    schema, tables = prompt_schema(user_query, route, pruning)
+    inputs = {"user_query": user_query, "schema": schema}
+    prompt_tokens = sum(count_tokens(m.content) for m in query_clean_prompt.format_messages(**inputs))
+    t0 = time.perf_counter()
+    ttft, parts = None, []
+    for chunk in chain.stream(inputs):
+        if ttft is None:
+            ttft = time.perf_counter() - t0
+        parts.append(chunk)
+    total = time.perf_counter() - t0
+    metrics = {
+        "clean_prompt_tokens": prompt_tokens,
+        "clean_ttft_ms": round((ttft if ttft is not None else total) * 1000, 1),
+        "clean_total_ms": round(total * 1000, 1),
+        "schema_tables": tables,
+    }
+    return "".join(parts), metrics
+
 # Heuristics
 GREETING_PATTERNS = re.compile(
     r"^(hi|hello|hey|hlo|good\s*(morning|afternoon|evening)|what'?s up|how are you)\b",
@@ -89,7 +114,12 @@ def clean_query_node(state: dict) -> dict:
         state["query_result"] = _general_answer_with_cta(user_query)
         return state
 
-    cleaned = (chain.invoke({"user_query": user_query}) or "").strip()
+    cleaned, metrics = _clean(user_query, state.get("route_preference"))
+    cleaned = (cleaned or "").strip()
+    state.update(metrics)
+    if DEBUG:
+        print(f"📊 clean_query: {metrics['clean_prompt_tokens']} prompt tokens, "
+              f"TTFT {metrics['clean_ttft_ms']:.0f} ms, tables {metrics['schema_tables'] or 'all'}")
 
     # If cleaner declares OUT_OF_SCOPE → general answer + CTA (no SQL)
     if cleaned == "OUT_OF_SCOPE":
@@ -0,0 +1,247 @@
+# answer_cache.py
+"""
+Answer cache in front of the compiled workflow. One llm_reply() makes up to four gpt-4o calls
+(cleaning, rewrites, the summary), and "bhujia sales last 3 months" and "Sales of Bhujia in
+last three months" used to pay for all of them twice. Questions are reduced to a canonical
+form before any LLM call, and an equivalent question gets the stored final `query_result`.
+UI payloads ("Use ONLY these tables: ... USER QUESTION: q") are keyed on `q` alone; their
+table allowlist goes into the namespace, since it changes which tables the answer may use.
+
+Canonical form (`canonical`):
+  * lower-cased words (entity_extract.words, so "S B" -> "sb"), number words as digits
+  * every entity the question names (entity_extract spans) replaced by its kind and a digest
+    of the set of values it resolves to. Spellings of one name agree ("S B Markplus" and
+    "sb markplus", "SAWARIYA TRADING" and "sawariya trading"), but a short head that covers
+    several values ("sb markplus" -> every "S B Markplus Private Limited..." row) does not
+    share a key with one full name, since the generated filter differs too
+    (not with ENTITY_MATCHER=trgm, which keeps no dictionaries in the worker)
+  * "past"/"previous" -> "last", "last month" -> "last 1 month", units singular
+  * filler words dropped ("the", "of", "show me", ...); words that change the SQL stay
+  * pieces kept together: "last 3 month", "top 5", "by distributor", "how many", "how much",
+    and a number with its unit ("200 gm", "3 month"); other numbers ("2024",
+    "3 distributors") stand alone
+  * the pieces are a bag, so word order does not matter, unless order carries meaning: a
+    comparison ("A vs B", "versus", "compared to"), a range ("from 2023 to 2024", "between
+    ... and ...") or two standalone numbers. Those questions keep their pieces in order.
+
+Entries live in one LRU per route namespace ("primary", "shipment", "auto" when the caller did
+not choose; "primary@<digest>" with a table allowlist), at most ANSWER_CACHE_MAX each, for ANSWER_CACHE_TTL_SECONDS and only for the day
+they were computed ("last 3 months" moves at midnight). Only answers backed by a successful
+query are stored. Like the other data caches, everything is dropped when the data version
+changes (the ingest hook, or a version check at most every
+ANSWER_CACHE_VERSION_CHECK_SECONDS).
+
+  ANSWER_CACHE=0    bypass the cache
+"""
+from __future__ import annotations
+import hashlib, os, re, time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.engine import Engine
+
+import entity_extract
+from agents.check_entity_node import ENTITY_MATCHER
+from schema_retrieval import QUESTION_FILLER, split_question
+from versioned_cache import Registry, VersionedCache
+
+ENABLED = os.getenv("ANSWER_CACHE", "1") == "1"
+MAX_PER_ROUTE = int(os.getenv("ANSWER_CACHE_MAX", "1000"))
+TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+VERSION_CHECK_SECONDS = float(os.getenv("ANSWER_CACHE_VERSION_CHECK_SECONDS", "5"))
+
+_NUM_WORDS = {
+    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6",
+    "seven": "7", "eight": "8", "nine": "9", "ten": "10", "eleven": "11", "twelve": "12",
+}
+_NUM_WORD_RE = re.compile(r"\b(" + "|".join(_NUM_WORDS) + r")\b")
+_UNITS = {"days": "day", "weeks": "week", "months": "month", "years": "year"}
+_SIZE_UNITS = {
+    "g": "gm", "gm": "gm", "gms": "gm", "gram": "gm", "grams": "gm", "kg": "kg", "kgs": "kg",
+    "ml": "ml", "l": "l", "ltr": "l", "litre": "l", "liter": "l", "pc": "pc", "pcs": "pc",
+    "piece": "pc", "pieces": "pc", "pack": "pack", "packs": "pack",
+}
+_SIZE_RE = re.compile(r"^(\d+)([a-z]+)$")
+_FILLER = QUESTION_FILLER | {"total", "overall", "during", "over", "within", "numbers", "figure"}
+# a count or an amount is a different answer from the list it is asked about
+_QUANTITY = {"many", "much"}
+# words that make the order of the pieces around them matter; "and" only closes a range
+_COMPARE = {"vs", "versus", "against", "compare", "compared", "than"}
+_RANGE_OPEN = {"from", "between", "since"}
+_RANGE_CLOSE = {"to", "till", "until", "through", "and"}
+
+def _singular(w: str) -> str:
+    w = _UNITS.get(w, w)
+    return w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+
+def _unit(w: str) -> Optional[str]:
+    """The canonical unit `w` names ("months" -> "month", "gms" -> "gm"), else None."""
+    if w in _UNITS or w in _UNITS.values():
+        return _UNITS.get(w, w)
+    return _SIZE_UNITS.get(w)
+
+def canonical(question: str, engine: Optional[Engine] = None) -> str:
+    """Canonical form of `question`, a sorted bag unless order matters; `engine` adds resolved entities."""
+    text = _NUM_WORD_RE.sub(lambda m: _NUM_WORDS[m.group(1)], (question or "").lower())
+    ws = entity_extract.words(text)
+    if engine is not None and entity_extract.ENABLED and ENTITY_MATCHER != "trgm":
+        for span in reversed(entity_extract.extract(engine, text)):
+            values = sorted(v for vals in span.values.values() for v in vals)
+            digest = hashlib.sha1("\n".join(values).encode("utf-8")).hexdigest()[:10]
+            ws[span.start:span.end] = [f"@{span.kind}:{digest}"]
+    split: List[str] = []
+    for w in ws:  # "200gm" -> "200", "gm"
+        m = _SIZE_RE.match(w)
+        split += [m.group(1), m.group(2)] if m and _unit(m.group(2)) else [w]
+    ws = split
+
+    pieces: List[str] = []
+    ordered = in_range = False
+    numbers = 0
+    i = 0
+    while i < len(ws):
+        w = ws[i]
+        if w in ("past", "previous"):
+            w = "last"
+        nxt = ws[i + 1] if i + 1 < len(ws) else ""
+        after = ws[i + 2] if i + 2 < len(ws) else ""
+        if w == "last" and nxt.isdigit() and _unit(after) in _UNITS.values():
+            pieces.append(f"last {nxt} {_unit(after)}")
+            i += 3
+        elif w == "last" and _unit(nxt) in _UNITS.values():
+            pieces.append(f"last 1 {_unit(nxt)}")
+            i += 2
+        elif w == "how" and nxt in _QUANTITY:
+            pieces.append(f"how {nxt}")
+            i += 2
+        elif w in ("top", "by") and nxt:
+            pieces.append(f"{w} {nxt if nxt.isdigit() or nxt.startswith('@') else _singular(nxt)}")
+            i += 2
+        elif w.isdigit() and _unit(nxt):
+            pieces.append(f"{w} {_unit(nxt)}")
+            i += 2
+        elif w in _COMPARE:
+            pieces.append("vs")
+            ordered = True
+            i += 2 if nxt in ("to", "with") else 1
+        elif w in _RANGE_OPEN:
+            pieces.append("from")
+            in_range = True
+            i += 1
+        elif w in _RANGE_CLOSE:
+            if in_range:
+                pieces.append("to")
+                ordered, in_range = True, False
+            i += 1
+        else:
+            if w.isdigit():
+                numbers += 1
+            if w not in _FILLER:
+                pieces.append(w if w.startswith("@") else _singular(w))
+            i += 1
+    if ordered or numbers > 1:
+        return " > ".join(pieces)
+    return " | ".join(sorted(set(pieces)))
+
+# ---------- cache ----------
+class AnswerCache(VersionedCache):
+    """Answers of one engine, one LRU per route namespace; entries are (created, day, cost ms, answer)."""
+
+    label, noun = "Answer cache", "answer(s)"
+
+    def __init__(self, engine: Engine):
+        super().__init__(engine, VERSION_CHECK_SECONDS)
+        self._routes: Dict[str, "OrderedDict[str, Tuple[float, str, float, Dict[str, Any]]]"] = {}
+        self._counts: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def namespace(route: Optional[str], allowed: Optional[List[str]] = None) -> str:
+        ns = (route or "").lower().strip() or "auto"
+        if allowed:
+            ns += "@" + hashlib.sha1(",".join(sorted(set(allowed))).encode("utf-8")).hexdigest()[:8]
+        return ns
+
+    def _key(self, question: str, route: Optional[str]) -> Tuple[str, str]:
+        """(namespace, canonical question) of a plain question or a guardrail-prefixed UI payload."""
+        question, allowed = split_question(question)
+        return self.namespace(route, allowed), canonical(question, self.engine)
+
+    def _count(self, ns: str, key: str, n: float = 1) -> None:
+        c = self._counts.setdefault(ns, {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0,
+                                         "saved_ms": 0.0})
+        c[key] += n
+
+    # ---------- data version ----------
+    def _size(self) -> int:
+        return sum(len(d) for d in self._routes.values())
+
+    def _drop_all(self) -> None:
+        self._routes.clear()
+
+    # ---------- lookup / store ----------
+    def lookup(self, question: str, route: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The stored answer for an equivalent question, with `canonical_question` set."""
+        self.check_version()
+        ns, key = self._key(question, route)
+        with self._lock:
+            entries = self._routes.get(ns)
+            entry = entries.get(key) if entries else None
+            if entry is not None and (time.time() - entry[0] > TTL_SECONDS or entry[1] != date.today().isoformat()):
+                del entries[key]
+                self._count(ns, "expired")
+                entry = None
+            if entry is None:
+                self._count(ns, "misses")
+                return None
+            entries.move_to_end(key)
+            self._count(ns, "hits")
+            self._count(ns, "saved_ms", entry[2])
+            return dict(entry[3], canonical_question=key)
+
+    def store(self, question: str, route: Optional[str], result: Dict[str, Any], cost_ms: float,
+              version: Optional[int] = None) -> bool:
+        """
+        Keep the answer of a workflow run that executed its query successfully; `version` is the
+        data version seen before the run, so an answer that straddled an ingest is not kept.
+        """
+        if not result.get("exec_success") or not result.get("query_result") or result.get("awaiting_route_choice"):
+            return False
+        self.check_version()
+        if version is not None and version != self.version:
+            return False
+        ns, key = self._key(question, route)
+        answer = {"query_result": result["query_result"], "route": result.get("route"), "final_answer": True}
+        with self._lock:
+            entries = self._routes.setdefault(ns, OrderedDict())
+            entries[key] = (time.time(), date.today().isoformat(), cost_ms, answer)
+            entries.move_to_end(key)
+            self._count(ns, "stores")
+            while len(entries) > MAX_PER_ROUTE:
+                entries.popitem(last=False)
+                self._count(ns, "evictions")
+        return True
+
+    def evict(self, route: Optional[str] = None) -> int:
+        """Drop one route's namespaces, allowlisted ones included (or all with route=None); returns the answers removed."""
+        with self._lock:
+            base = self.namespace(route)
+            names = [ns for ns in self._routes if not route or ns.split("@")[0] == base]
+            return sum(len(self._routes.pop(ns, {})) for ns in names)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {}
+            for ns in set(self._routes) | set(self._counts):
+                c = dict(self._counts.get(ns, {}))
+                looked = c.get("hits", 0) + c.get("misses", 0)
+                c["hit_rate"] = round(c.get("hits", 0) / looked, 4) if looked else 0.0
+                c["entries"] = len(self._routes.get(ns, {}))
+                routes[ns] = c
+        return {"version": self.version, "invalidations": self.invalidations,
+                "max_per_route": MAX_PER_ROUTE, "routes": routes}
+
+# ---------- per-engine registry ----------
+_registry: Registry[AnswerCache] = Registry(AnswerCache)
+get = _registry.get
+on_new_version = _registry.on_new_version
+stats = _registry.stats
@@ -11,6 +11,8 @@ from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 import os
 
+from ingest.sqlite_snapshot import ensure_snapshot
+
 # Load .env file and get GROQ API key
 load_dotenv()
 api_key = os.getenv("GROQ_API_KEY")
@@ -31,7 +33,12 @@ llm = ChatGroq(groq_api_key=api_key, model_name="Llama3-8b-8192", streaming=True
 @st.cache_resource(ttl="2h")
 def configure_db():
     dbfilepath = (Path(__file__).parent / "combined_output.db").absolute()
-    creator = lambda: sqlite3.connect(f"file:{dbfilepath}?mode=ro", uri=True)
+    # Built at image build time (python -m ingest.sqlite_snapshot); a writable checkout
+    # refreshes it here when combined_output.xlsx changed
+    if os.access(dbfilepath.parent, os.W_OK):
+        ensure_snapshot(str(Path(__file__).parent / "combined_output.xlsx"), dbfilepath)
+    # immutable: the snapshot is replaced, never modified, so skip SQLite's file locking
+    creator = lambda: sqlite3.connect(f"file:{dbfilepath}?mode=ro&immutable=1", uri=True)
     return SQLDatabase(create_engine("sqlite:///", creator=creator))
 
 # Connect to DB
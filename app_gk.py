@@ -10,6 +10,7 @@ from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 from table_relationships import describe_table_relationships
 from tbl_col_info import table_info_and_examples
+from ingest.parquet_cache import read_table
 import os
 import pandas as pd
 import re
@@ -70,7 +71,7 @@ def configure_db():
     csv_folder = Path(__file__).parent / "cooked_data_gk"
     for csv_file in glob.glob(str(csv_folder / "*.csv")):
         table_name = Path(csv_file).stem.lower()
-        df = pd.read_csv(csv_file)
+        df = read_table(csv_file)
         df.to_sql(table_name, conn, index=False, if_exists="replace")
     return SQLDatabase.from_uri("sqlite://", engine_args={"creator": lambda: conn})
 
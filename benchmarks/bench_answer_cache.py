@@ -0,0 +1,80 @@
+# benchmarks/bench_answer_cache.py
+"""
+Answer cache (answer_cache) canonicalization. Each group below is one question and its
+paraphrases; the first phrasing is answered through the non-LLM nodes (entity check, SQL,
+execution) and stored, then every paraphrase is looked up. Reports the paraphrase hit rate,
+that near-miss questions (other window, top-N, metric, breakdown, route) never hit, and the
+cost of a lookup against the workflow it replaces.
+
+    python -m benchmarks.bench_answer_cache
+"""
+from __future__ import annotations
+import argparse, statistics, time
+
+import answer_cache
+from db_backend import create_db_engine
+from agents.execute_sql_query import execute_sql_query
+from benchmarks.bench_prepared import _generate
+
+GROUPS = [
+    ("primary", ["bhujia sales last 3 months", "Sales of Bhujia in last three months",
+                 "what were the bhujia sales over the past 3 months?"]),
+    ("primary", ["top 5 products last 3 months", "Show me the top five products in the last 3 months"]),
+    ("primary", ["SAWARIYA TRADING sales last month", "sales of sawariya trading in the past month",
+                 "Sawariya Trading total sales for last 1 month"]),
+    ("primary", ["sales by distributor last 6 months", "Sales by distributors in the last six months"]),
+    ("shipment", ["Palak Sev shipment last 3 months", "palak sev shipments in last three months"]),
+    ("primary", ["Lassi quantity last 12 months", "quantity of lassi for the last twelve months"]),
+]
+NEAR_MISSES = [
+    ("primary", "bhujia sales last 6 months"),
+    ("primary", "top 3 products last 5 months"),
+    ("primary", "SAWARIYA TRADING sales last week"),
+    ("primary", "sales by super stockist last 6 months"),
+    ("shipment", "bhujia sales last 3 months"),
+    ("primary", "Lassi value last 12 months"),
+    ("primary", "Aloo Bhujia sales last 3 months"),
+]
+
+def _answer(engine, route: str, q: str) -> tuple:
+    t0 = time.perf_counter()
+    st = execute_sql_query(_generate(engine, route, q))
+    st["query_result"] = f"{st.get('columns')}: {st.get('rows')}"
+    return st, (time.perf_counter() - t0) * 1000
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", default=None)
+    args = ap.parse_args()
+
+    engine = create_db_engine(args.backend)
+    cache = answer_cache.get(engine)
+    costs, lookups, hits, total = [], [], 0, 0
+    for route, (first, *paraphrases) in GROUPS:
+        st, ms = _answer(engine, route, first)
+        costs.append(ms)
+        cache.store(first, route, st, ms)
+        for p in paraphrases:
+            t0 = time.perf_counter()
+            got = cache.lookup(p, route)
+            lookups.append((time.perf_counter() - t0) * 1e6)
+            total += 1
+            hits += got is not None and got["query_result"] == st["query_result"]
+            if got is None:
+                print(f"  ⏭️ {p!r}: {answer_cache.canonical(p, engine)} != {answer_cache.canonical(first, engine)}")
+    wrong = [q for route, q in NEAR_MISSES if cache.lookup(q, route) is not None]
+
+    print(f"{'✅' if hits == total else '❌'} paraphrases answered from cache: {hits}/{total}")
+    print(f"{'✅' if not wrong else '❌'} near misses served from cache: {len(wrong)}/{len(NEAR_MISSES)} {wrong}")
+    print(f"lookup {statistics.median(lookups):.0f} us vs non-LLM pipeline {statistics.median(costs):.1f} ms "
+          f"(llm_reply adds up to four gpt-4o calls on top)")
+
+    live = cache.version
+    answer_cache.on_new_version(engine, live + 1)
+    left = sum(cache.lookup(first, route) is not None for route, (first, *_) in GROUPS)
+    print(f"{'✅' if not left else '❌'} new data version: {left} answers left")
+    cache.set_version(live)
+    print(f"📊 {cache.stats()['routes']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/bench_backends.py
+"""
+Per-question latency of the non-LLM pipeline (entity check -> tables -> SQL -> execute) on
+each execution backend, over the standard question set.
+
+    python -m benchmarks.bench_backends --repeat 5
+    python -m benchmarks.bench_backends --backends duckdb
+"""
+from __future__ import annotations
+import argparse, statistics, time
+
+import result_cache
+from db_backend import BACKENDS, configure_db
+from agents.check_entity_node import check_entity_node
+from agents.find_tables import find_tables_node
+from agents.create_sql_query import create_sql_query
+from agents.execute_sql_query import execute_sql_query
+from benchmarks.questions import STANDARD_QUESTIONS
+
+def _run_once(engine, route: str, question: str):
+    state = {"user_query": question, "engine": engine, "route_preference": route}
+    t0 = time.perf_counter()
+    state = check_entity_node(state, engine)
+    state = find_tables_node(state)
+    state = create_sql_query(state)
+    t1 = time.perf_counter()
+    state = execute_sql_query(state)
+    t2 = time.perf_counter()
+    return (t1 - t0) * 1000, (t2 - t1) * 1000, bool(state.get("exec_success"))
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backends", nargs="*", default=list(BACKENDS))
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    result_cache.MAX_BYTES = 0  # time the database, not cached results
+
+    engines = {}
+    for name in args.backends:
+        try:
+            engines[name] = configure_db(name)
+        except Exception as e:
+            print(f"❌ {name}: unavailable ({str(e).splitlines()[0]})")
+
+    header = f"{'question':<45}" + "".join(f"{n + ' prep/exec ms':>28}" for n in engines)
+    print(header)
+    for route, q in STANDARD_QUESTIONS:
+        cells = []
+        for name, engine in engines.items():
+            runs = [_run_once(engine, route, q) for _ in range(args.repeat)]
+            prep = statistics.median(r[0] for r in runs)
+            exe = statistics.median(r[1] for r in runs)
+            ok = "" if all(r[2] for r in runs) else " !"
+            cells.append(f"{prep:>14.1f} / {exe:>8.1f}{ok:>2}")
+        print(f"{q[:44]:<45}" + "".join(f"{c:>28}" for c in cells))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# benchmarks/bench_catalog.py
+"""
+Catalog queries per request for the non-LLM pipeline, cold (right after an ingest invalidated
+the schema catalog) and warm. The warm rounds should report 0.
+
+    python -m benchmarks.bench_catalog --rounds 3
+"""
+from __future__ import annotations
+import argparse, time
+
+import schema_catalog
+from db_backend import configure_db
+from agents.check_entity_node import check_entity_node
+from agents.find_tables import find_tables_node
+from agents.create_sql_query import create_sql_query
+from benchmarks.questions import STANDARD_QUESTIONS
+
+def _prepare(engine, route: str, question: str) -> float:
+    state = {"user_query": question, "engine": engine, "route_preference": route}
+    t0 = time.perf_counter()
+    state = check_entity_node(state, engine)
+    create_sql_query(find_tables_node(state))
+    return (time.perf_counter() - t0) * 1000
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", default=None)
+    ap.add_argument("--rounds", type=int, default=3)
+    args = ap.parse_args()
+
+    engine = configure_db(args.backend)
+    schema_catalog.invalidate(engine)
+    print(f"{'round':<7}{'requests':>10}{'catalog queries':>17}{'max/request':>13}{'prep ms':>10}")
+    for rnd in range(args.rounds):
+        counts, ms = [], 0.0
+        for route, q in STANDARD_QUESTIONS:
+            schema_catalog.begin_request()
+            ms += _prepare(engine, route, q)
+            counts.append(schema_catalog.catalog_queries())
+        label = "cold" if rnd == 0 else f"warm {rnd}"
+        print(f"{label:<7}{len(counts):>10}{sum(counts):>17}{max(counts):>13}{ms:>10.1f}")
+    print(f"📊 catalog stats: {schema_catalog.stats()}")
+
+if __name__ == "__main__":
+    main()
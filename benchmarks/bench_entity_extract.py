@@ -0,0 +1,79 @@
+# benchmarks/bench_entity_extract.py
+"""
+Multi-entity extraction (entity_extract) against dictionary size: compile time, automaton
+nodes and median extraction time per question, on the live entity columns and on synthetic
+product dictionaries. Extraction walks the question once, so its time should stay flat as
+the dictionary grows; the fuzzy index lookup per column is shown for comparison.
+
+    python -m benchmarks.bench_entity_extract
+    python -m benchmarks.bench_entity_extract --sizes 1000 10000 100000 1000000
+"""
+from __future__ import annotations
+import argparse, statistics, time
+
+from db_backend import create_db_engine
+from entity_extract import compile_patterns
+from entity_index import ColumnIndex, _distinct_values
+import schema_catalog
+from schema_registry import ENTITY_COLUMNS
+from benchmarks.questions import STANDARD_QUESTIONS
+from benchmarks.bench_entity_index import _synthetic
+
+MULTI_QUESTIONS = [
+    "Bhujia sales by SAWARIYA TRADING via S B Markplus",
+    "Chips Pudina Treat and Palak Sev sales of Kansal Estate last 3 months",
+    "Aloo Bhujia sales by S B Markplus in Delhi",
+]
+
+def _median_us(fn, questions, rounds: int = 5) -> float:
+    times = []
+    for _ in range(rounds):
+        for q in questions:
+            t0 = time.perf_counter()
+            fn(q)
+            times.append((time.perf_counter() - t0) * 1e6)
+    return statistics.median(times)
+
+def _row(label: str, columns, questions, fuzzy: bool = True) -> None:
+    t0 = time.perf_counter()
+    auto = compile_patterns(columns)
+    build_ms = (time.perf_counter() - t0) * 1000
+    extract_us = _median_us(auto.extract, questions)
+    n = sum(len(vals) for _, _, vals in columns)
+    if fuzzy:
+        idxs = [ColumnIndex.build(t, c, vals) for t, c, vals in columns]
+        fuzzy_us = f"{_median_us(lambda q: [i.best(q) for i in idxs], questions, rounds=1):>12.1f}"
+    else:
+        fuzzy_us = f"{'-':>12}"
+    print(f"{label[:30]:<31}{n:>9}{len(auto.patterns):>10}{len(auto):>10}{build_ms:>11.1f}{extract_us:>12.1f}{fuzzy_us}")
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", default=None)
+    ap.add_argument("--sizes", nargs="*", type=int, default=[1000, 10000, 100000])
+    args = ap.parse_args()
+
+    engine = create_db_engine(args.backend)
+    questions = [q for _, q in STANDARD_QUESTIONS] + MULTI_QUESTIONS
+    live, products = [], []
+    for table, cols in ENTITY_COLUMNS.items():
+        present = schema_catalog.columns(engine, table)
+        for col in [c for c in cols if c in present]:
+            values = _distinct_values(engine, table, col)
+            live.append((table, col, values))
+            if table == "tbl_product_master" and col == "product_name":
+                products = values
+
+    print(f"{'dictionary':<31}{'names':>9}{'patterns':>10}{'nodes':>10}{'build ms':>11}{'extract us':>12}{'fuzzy us':>12}")
+    _row("live entity columns", live, questions)
+    for n in args.sizes:
+        _row(f"synthetic products x{n}", [("bench", "product_name", _synthetic(products, n))],
+             questions, fuzzy=n <= 100000)
+
+    auto = compile_patterns(live)
+    print()
+    for q in MULTI_QUESTIONS:
+        print(f"{q}\n  -> {[(s.text, s.kind) for s in auto.extract(q)]}")
+
+if __name__ == "__main__":
+    main()
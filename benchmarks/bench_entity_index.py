@@ -0,0 +1,77 @@
+# benchmarks/bench_entity_index.py
+"""
+Entity resolution per column: the old full scan (SequenceMatcher over every DISTINCT value)
+vs. the n-gram index (entity_index), on the live entity columns and on synthetic dictionaries
+of growing size. Reports build time, median lookup time and how often both pick the same value.
+
+    python -m benchmarks.bench_entity_index
+    python -m benchmarks.bench_entity_index --sizes 1000 10000 100000
+"""
+from __future__ import annotations
+import argparse, random, statistics, time
+
+from db_backend import create_db_engine
+from entity_index import ColumnIndex, _distinct_values, score
+import schema_catalog
+from schema_registry import ENTITY_COLUMNS
+from benchmarks.questions import STANDARD_QUESTIONS
+
+def _scan(question: str, values):
+    best_v, best_s = None, 0.0
+    for v in values:
+        s = score(question, v)
+        if s > best_s:
+            best_v, best_s = v, s
+    return best_v, best_s
+
+def _median_ms(fn, questions) -> float:
+    times = []
+    for q in questions:
+        t0 = time.perf_counter()
+        fn(q)
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+def _compare(label: str, values, questions, scan: bool = True) -> None:
+    t0 = time.perf_counter()
+    idx = ColumnIndex.build("bench", label, values)
+    build_ms = (time.perf_counter() - t0) * 1000
+    index_ms = _median_ms(idx.best, questions)
+    if scan:
+        scan_ms = _median_ms(lambda q: _scan(q, values), questions)
+        same = sum(abs(idx.best(q)[1] - _scan(q, values)[1]) < 1e-9 for q in questions)
+        extra = f"{scan_ms:>10.2f}{same:>5}/{len(questions)}"
+    else:
+        extra = f"{'-':>10}{'-':>8}"
+    print(f"{label[:40]:<41}{len(idx):>8}{build_ms:>10.1f}{index_ms:>10.3f}{extra}")
+
+def _synthetic(base, n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    words = [w for v in base for w in v.split() if w.isalpha()] or ["namkeen", "bhujia", "sev"]
+    out = set(base)
+    while len(out) < n:
+        out.add(" ".join(rnd.choice(words) for _ in range(rnd.randint(2, 5))) + f" {rnd.randint(1, 999)} GM")
+    return list(out)
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", default=None)
+    ap.add_argument("--sizes", nargs="*", type=int, default=[1000, 10000, 100000])
+    args = ap.parse_args()
+
+    engine = create_db_engine(args.backend)
+    questions = [q for _, q in STANDARD_QUESTIONS]
+    print(f"{'column':<41}{'values':>8}{'build ms':>10}{'index ms':>10}{'scan ms':>10}{'same':>8}")
+    products = []
+    for table, cols in ENTITY_COLUMNS.items():
+        present = schema_catalog.columns(engine, table)
+        for col in [c for c in cols if c in present]:
+            values = _distinct_values(engine, table, col)
+            if table == "tbl_product_master" and col == "product_name":
+                products = values
+            _compare(f"{table}.{col}", values, questions)
+    for n in args.sizes:
+        _compare(f"synthetic products x{n}", _synthetic(products, n), questions, scan=n <= 10000)
+
+if __name__ == "__main__":
+    main()
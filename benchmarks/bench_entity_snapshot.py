@@ -0,0 +1,56 @@
+# benchmarks/bench_entity_snapshot.py
+"""
+Cold start of the entity index in a fresh process: building every entity column from the
+database (DISTINCT scans) vs. mapping the entity_snapshot of the current data version.
+Each run is a new interpreter, so nothing is shared but the snapshot file (and the page cache).
+
+    python -m benchmarks.bench_entity_snapshot
+    python -m benchmarks.bench_entity_snapshot --runs 5
+"""
+from __future__ import annotations
+import argparse, json, os, statistics, subprocess, sys, tempfile
+
+_CHILD = r"""
+import json, time
+from sqlalchemy import event
+from db_backend import create_db_engine
+import entity_index, schema_catalog
+engine = create_db_engine()
+schema_catalog.columns(engine, "tbl_product_master")  # load the catalog outside the timing
+stmts = []
+event.listen(engine, "before_cursor_execute", lambda *a: stmts.append(a[2]))
+t0 = time.perf_counter()
+idx = entity_index.get(engine)
+n = idx.warm()
+warm_ms = (time.perf_counter() - t0) * 1000
+t0 = time.perf_counter()
+idx.best_match("tbl_product_master", "product_name", "bhujia sev 200 gm")
+first_ms = (time.perf_counter() - t0) * 1000
+print(json.dumps({"columns": n, "warm_ms": warm_ms, "first_match_ms": first_ms,
+                  "distinct_queries": sum("DISTINCT" in s for s in stmts)}))
+"""
+
+def _run(snapshot_dir: str) -> dict:
+    env = dict(os.environ, ENTITY_SNAPSHOT_DIR=snapshot_dir)
+    out = subprocess.run([sys.executable, "-c", _CHILD], env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def _report(label: str, runs) -> None:
+    print(f"{label:<22}{runs[0]['columns']:>8}{statistics.median(r['warm_ms'] for r in runs):>12.1f}"
+          f"{statistics.median(r['first_match_ms'] for r in runs):>14.2f}{runs[0]['distinct_queries']:>10}")
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        print(f"{'warm start':<22}{'columns':>8}{'warm ms':>12}{'1st match ms':>14}{'DISTINCT':>10}")
+        _report("database (no snapshot)", [_run("") for _ in range(args.runs)])
+        _run(d)  # writes the snapshot
+        _report("mapped snapshot", [_run(d) for _ in range(args.runs)])
+        size = sum(os.path.getsize(os.path.join(d, f)) for f in os.listdir(d))
+        print(f"\nsnapshot size: {size / 1e6:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_indexes.py
+"""
+EXPLAIN ANALYZE execution time of the generated query shapes (standard question set) with
+the post-ingest indexes dropped vs built. Postgres only.
+
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.bench_indexes --repeat 5
+"""
+from __future__ import annotations
+import argparse, json, statistics
+from typing import Dict, List, Set, Tuple
+from sqlalchemy import text
+
+from db_backend import configure_db
+from ingest.indexes import drop_indexes, ensure_indexes
+from agents.check_entity_node import check_entity_node
+from agents.find_tables import find_tables_node
+from agents.create_sql_query import create_sql_query
+from benchmarks.questions import STANDARD_QUESTIONS
+
+def _generate(engine) -> List[Tuple[str, str, Dict]]:
+    out = []
+    for route, q in STANDARD_QUESTIONS:
+        state = {"user_query": q, "engine": engine, "route_preference": route}
+        state = create_sql_query(find_tables_node(check_entity_node(state, engine)))
+        if state.get("sql_query"):
+            out.append((q, state["sql_query"], state.get("sql_params") or {}))
+    return out
+
+def _scans(node: dict, acc: Set[str]) -> Set[str]:
+    if "Scan" in node.get("Node Type", ""):
+        acc.add(node["Node Type"].replace(" Scan", "").replace("Index Only", "IdxOnly"))
+    for child in node.get("Plans", []):
+        _scans(child, acc)
+    return acc
+
+def _explain(engine, sql: str, params: Dict, repeat: int) -> Tuple[float, str]:
+    times, scans = [], set()
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            raw = conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"), params).scalar()
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+            times.append(plan["Execution Time"])
+            scans = _scans(plan["Plan"], set())
+    return statistics.median(times), "/".join(sorted(scans))
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    engine = configure_db("postgres")
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("bench_indexes needs a Postgres DATABASE_URL")
+    queries = _generate(engine)
+
+    drop_indexes(engine)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    before = [_explain(engine, sql, params, args.repeat) for _, sql, params in queries]
+    built = ensure_indexes(engine)
+    after = [_explain(engine, sql, params, args.repeat) for _, sql, params in queries]
+
+    print(f"{len(built)} indexes built: {', '.join(built)}")
+    print(f"{'question':<45}{'before ms':>11}{'after ms':>10}  plan before -> after")
+    for (q, _, _), (bt, bs), (at, as_) in zip(queries, before, after):
+        print(f"{q[:44]:<45}{bt:>11.2f}{at:>10.2f}  {bs} -> {as_}")
+
+if __name__ == "__main__":
+    main()
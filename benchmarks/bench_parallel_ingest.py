@@ -0,0 +1,61 @@
+# benchmarks/bench_parallel_ingest.py
+"""
+Cold-load wall time, sequential vs the parallel ingest, against the slowest single table.
+The CSVs are copied (rows replicated --scale times) into a scratch folder with no Parquet
+caches, so every run parses from scratch.
+
+    python -m benchmarks.bench_parallel_ingest --scale 50 --workers 1 4
+    python -m benchmarks.bench_parallel_ingest --backend postgres   # uses DATABASE_URL
+"""
+from __future__ import annotations
+import argparse, glob, shutil, tempfile, time
+from pathlib import Path
+from sqlalchemy import create_engine
+
+from db_backend import create_db_engine
+from ingest.loader import ingest_folder
+
+def _scaled_copy(src: str, dst: Path, scale: int) -> None:
+    for path in sorted(glob.glob(str(Path(src) / "*.csv"))):
+        with open(path, "rb") as f:
+            header, *rows = f.read().splitlines(keepends=True)
+        if rows and not rows[-1].endswith(b"\n"):
+            rows[-1] += b"\n"
+        with open(dst / Path(path).name, "wb") as f:
+            f.write(header)
+            for _ in range(scale):
+                f.writelines(rows)
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--folder", default="cooked_data_gk")
+    ap.add_argument("--scale", type=int, default=50)
+    ap.add_argument("--workers", type=int, nargs="*", default=[1, 4])
+    ap.add_argument("--backend", choices=["duckdb", "postgres"], default="duckdb")
+    ap.add_argument("--mode", default="copy")
+    args = ap.parse_args()
+
+    scratch = Path(tempfile.mkdtemp(prefix="bench_ingest_"))
+    try:
+        for w in args.workers:
+            data = scratch / f"csv_{w}"
+            data.mkdir()
+            _scaled_copy(args.folder, data, args.scale)
+            engine = (create_engine(f"duckdb:///{scratch / f'bench_{w}.duckdb'}")
+                      if args.backend == "duckdb" else create_db_engine("postgres"))
+            t0 = time.perf_counter()
+            report = ingest_folder(engine, data, force=True, mode=args.mode, workers=w,
+                                   build_indexes=False, rollups=False)
+            wall = time.perf_counter() - t0
+            slowest = max(report.results, key=lambda r: r.seconds)
+            rows = sum(r.rows for r in report.results)
+            print(f"workers={w:<3} wall={wall:7.2f}s rows={rows:,} "
+                  f"slowest={slowest.table} {slowest.seconds:.2f}s "
+                  f"sum(tables)={sum(r.seconds for r in report.results):.2f}s "
+                  f"failed={len(report.by_status('failed'))}")
+            engine.dispose()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
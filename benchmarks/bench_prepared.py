@@ -0,0 +1,88 @@
+# benchmarks/bench_prepared.py
+"""
+Bound-parameter SQL generation and prepared-plan reuse (prepared_statements).
+
+Generates SQL for variants of the standard questions (other products, windows, top-N) and
+counts distinct SQL texts with the values written in (what used to be sent) vs. distinct
+templates (what is now prepared). On Postgres it then executes every variant with and
+without SQL_PREPARE and reports median latency and the plan-cache hit rate. A name with an
+apostrophe checks that values no longer need quoting.
+
+    python -m benchmarks.bench_prepared
+    DB_BACKEND=postgres python -m benchmarks.bench_prepared --repeat 3
+"""
+from __future__ import annotations
+import argparse, statistics, time
+
+import prepared_statements, result_cache
+from db_backend import create_db_engine
+from prepared_statements import inline
+from agents.check_entity_node import check_entity_node
+from agents.find_tables import find_tables_node
+from agents.create_sql_query import create_sql_query
+from agents.execute_sql_query import execute_sql_query
+from benchmarks.questions import STANDARD_QUESTIONS
+
+VARIANTS = [
+    ("primary", "{item} sales last {n} months"),
+    ("primary", "top {k} products last {n} months"),
+    ("shipment", "{item} shipment last {n} months"),
+    ("primary", "total sales by sb marke for {item} product"),
+]
+ITEMS = ["Bhujia", "Lassi", "Aloo Bhujia", "Moong Dal", "Soan Papdi", "Haldiram's Namkeen", "Rasgulla", "Khatta Meetha"]
+
+def _questions():
+    qs = list(STANDARD_QUESTIONS)
+    for route, tpl in VARIANTS:
+        for i, item in enumerate(ITEMS):
+            qs.append((route, tpl.format(item=item, n=1 + i % 12, k=3 + i)))
+    return qs
+
+def _generate(engine, route: str, q: str) -> dict:
+    state = {"user_query": q, "engine": engine, "route_preference": route}
+    return create_sql_query(find_tables_node(check_entity_node(state, engine)))
+
+def _run(engine, states, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        for st in states:
+            t0 = time.perf_counter()
+            out = execute_sql_query(dict(st))
+            times.append((time.perf_counter() - t0) * 1000)
+            if not out.get("exec_success"):
+                print(f"  ❌ {st['user_query']}: {out.get('error_message', '').splitlines()[0]}")
+    return statistics.median(times)
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", default=None)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    result_cache.MAX_BYTES = 0  # time the database, not cached results
+
+    engine = create_db_engine(args.backend)
+    states = [s for s in (_generate(engine, r, q) for r, q in _questions()) if s.get("sql_query")]
+    literal = {inline(s["sql_query"], s.get("sql_params") or {}) for s in states}
+    templates = {s["sql_query"] for s in states}
+    print(f"{len(states)} questions -> {len(literal)} distinct SQL texts with values inlined, "
+          f"{len(templates)} distinct templates")
+
+    quoted = [s for s in states if any("'" in str(v) for v in (s.get("sql_params") or {}).values())]
+    for s in quoted:
+        ok = execute_sql_query(dict(s)).get("exec_success")
+        print(f"{'✅' if ok else '❌'} apostrophe bound safely: {s['user_query']}")
+
+    if engine.dialect.name != "postgresql":
+        print(f"⏭️ Plan reuse needs Postgres ({engine.dialect.name} executes templates unprepared)")
+        print(f"median execute ms: {_run(engine, states, args.repeat):.2f}")
+        return
+    prepared_statements.PREPARE = False
+    off = _run(engine, states, args.repeat)
+    prepared_statements.PREPARE = True
+    on = _run(engine, states, args.repeat)
+    st = prepared_statements.stats()
+    print(f"median execute ms: unprepared {off:.2f}  prepared {on:.2f}")
+    print(f"plan cache: {st['hits']} hits / {st['misses']} misses (hit rate {st['hit_rate']:.1%})")
+
+if __name__ == "__main__":
+    main()
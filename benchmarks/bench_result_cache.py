@@ -0,0 +1,65 @@
+# benchmarks/bench_result_cache.py
+"""
+Result cache (result_cache) in execute_sql_query. Generates the SQL for the standard questions
+and their variants, then replays them as a day of traffic (every question --repeat times, in
+shuffled order) with the cache off and on. Reports median execute latency, hit rate and the
+cache's memory, checks that cached rows and columns equal a fresh execution, and that an
+ingest-style version bump empties the cache.
+
+    python -m benchmarks.bench_result_cache
+    DB_BACKEND=postgres python -m benchmarks.bench_result_cache --repeat 20
+"""
+from __future__ import annotations
+import argparse, random, statistics, time
+
+import result_cache
+from db_backend import create_db_engine
+from agents.execute_sql_query import execute_sql_query
+from benchmarks.bench_prepared import _generate, _questions
+
+def _replay(states, repeat: int, seed: int = 7) -> float:
+    traffic = [st for st in states for _ in range(repeat)]
+    random.Random(seed).shuffle(traffic)
+    times = []
+    for st in traffic:
+        t0 = time.perf_counter()
+        execute_sql_query(dict(st))
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", default=None)
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args()
+
+    engine = create_db_engine(args.backend)
+    states = [s for s in (_generate(engine, r, q) for r, q in _questions()) if s.get("sql_query")]
+    cache = result_cache.get(engine)
+
+    max_bytes = result_cache.MAX_BYTES
+    result_cache.MAX_BYTES = 0
+    off = _replay(states, args.repeat)
+    fresh = [execute_sql_query(dict(st)) for st in states]
+
+    result_cache.MAX_BYTES = max_bytes
+    cache.clear()
+    on = _replay(states, args.repeat)
+    cached = [execute_sql_query(dict(st)) for st in states]
+    same = sum([tuple(r) for r in a["rows"]] == [tuple(r) for r in b["rows"]] and a["columns"] == b["columns"]
+               for a, b in zip(fresh, cached))
+
+    st = cache.stats()
+    print(f"{len(states)} questions x {args.repeat}: median execute ms uncached {off:.2f}  cached {on:.3f}")
+    print(f"📊 hit rate {st['hit_rate']:.1%}, {st['entries']} results in {st['bytes'] / 1024:.1f} KiB")
+    print(f"{'✅' if same == len(states) else '❌'} cached rows/columns identical to fresh execution: {same}/{len(states)}")
+
+    live = cache.version
+    result_cache.on_new_version(engine, live + 1)
+    keys = {cache.key(st["sql_query"], st.get("sql_params")) for st in states}
+    misses = sum(execute_sql_query(dict(st)).get("result_cache") == "miss" for st in states)
+    print(f"{'✅' if misses == len(keys) else '❌'} new data version: {misses}/{len(keys)} distinct queries re-executed")
+    cache.set_version(live)
+
+if __name__ == "__main__":
+    main()
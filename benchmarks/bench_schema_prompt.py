@@ -0,0 +1,49 @@
+# benchmarks/bench_schema_prompt.py
+"""
+Cleaning-prompt size with the full annotated schema vs. the retrieved top-k schema, over the
+standard question set. With --llm (needs langchain-openai and OPENAI_API_KEY) each variant is
+also sent to the cleaner and time-to-first-token is reported.
+
+    python -m benchmarks.bench_schema_prompt
+    python -m benchmarks.bench_schema_prompt --llm --repeat 3
+"""
+from __future__ import annotations
+import argparse, statistics
+
+from schema_retrieval import count_tokens, prompt_schema
+from benchmarks.questions import STANDARD_QUESTIONS
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--llm", action="store_true")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    clean = None
+    if args.llm:
+        from agents.sql_cleaned_query_agent import _clean
+        clean = _clean
+
+    cols = f"{'full tok':>9}{'pruned tok':>11}"
+    if clean:
+        cols += f"{'full TTFT ms':>14}{'pruned TTFT ms':>16}"
+    print(f"{'question':<45}{cols}  tables")
+    totals = [0, 0]
+    for route, q in STANDARD_QUESTIONS:
+        full, _ = prompt_schema(q, route, pruning=False)
+        pruned, tables = prompt_schema(q, route, pruning=True)
+        row = [count_tokens(full), count_tokens(pruned)]
+        totals[0] += row[0]
+        totals[1] += row[1]
+        line = f"{q[:44]:<45}{row[0]:>9}{row[1]:>11}"
+        if clean:
+            for pruning, width in ((False, 14), (True, 16)):
+                ttft = statistics.median(clean(q, route, pruning)[1]["clean_ttft_ms"] for _ in range(args.repeat))
+                line += f"{ttft:>{width}.0f}"
+        print(f"{line}  {', '.join(tables)}")
+    n = len(STANDARD_QUESTIONS)
+    print(f"📊 schema tokens per prompt: {totals[0] / n:.0f} full -> {totals[1] / n:.0f} pruned "
+          f"({100 * (1 - totals[1] / totals[0]):.0f}% fewer)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_search_text.py
+"""
+Text filters on the fact tables: the old OR over columns x tokens
+(`LOWER(p.col) ILIKE '%tok%'`) against one `p.search_text LIKE '%tok%'` per token on the
+column ingest materializes. Reports median execute time and matching rows per question, and
+the ingest-side cost of add_search_text per row.
+
+    python -m benchmarks.bench_search_text
+    DB_BACKEND=postgres python -m benchmarks.bench_search_text --repeat 10
+"""
+from __future__ import annotations
+import argparse, statistics, time
+
+import schema_registry, search_text
+from db_backend import create_db_engine
+from prepared_statements import execute
+from agents.create_sql_query import _Params, _or_like, _search_like, _tokens, like_slots
+from schema_registry import SEARCH_TEXT_COLUMN, measure_column, search_columns
+
+QUESTIONS = [
+    ("tbl_primary", "Bhujia sales"),
+    ("tbl_primary", "Classic Lassi 200ml sales"),
+    ("tbl_primary", "Ambarsariya Classic Lassi sales by SAWARIYA TRADING"),
+    ("tbl_primary", "Moong Dal sales of Kansal Estate"),
+    ("tbl_shipment", "Palak Sev shipment"),
+    ("tbl_shipment", "Palak Sev 40gm shipment"),
+]
+
+def _sql(fact: str, where: str) -> str:
+    return f'SELECT COUNT(*), SUM(p.{measure_column(fact, "qty")}) FROM "{fact}" p WHERE {where}'
+
+def _time(engine, sql: str, params: dict, repeat: int):
+    times, rows = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = execute(engine, sql, params)[0]
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times), rows[0][0]
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", default=None)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    engine = create_db_engine(args.backend)
+    print(f"{'question':<52}{'OR-ILIKE ms':>12}{'rows':>8}{'search ms':>11}{'rows':>8}")
+    for fact, q in QUESTIONS:
+        toks = _tokens(q)
+        terms = search_text.query_terms(engine, fact, toks)
+        old_p, new_p = _Params(like_slots("tok", toks)), _Params(like_slots("term", terms))
+        old = _or_like("p", search_columns(fact), toks, old_p)
+        new = _search_like(terms, new_p)
+        if not old or not new:
+            print(f"⏭️ {q}: no tokens or no {SEARCH_TEXT_COLUMN} column (re-ingest)")
+            continue
+        old_ms, old_n = _time(engine, _sql(fact, old), dict(old_p), args.repeat)
+        new_ms, new_n = _time(engine, _sql(fact, new), dict(new_p), args.repeat)
+        print(f"{q[:51]:<52}{old_ms:>12.2f}{old_n:>8}{new_ms:>11.2f}{new_n:>8}")
+
+    df = schema_registry.read_csv("cooked_data_gk/tbl_Primary.csv", "tbl_primary").drop(columns=[SEARCH_TEXT_COLUMN])
+    t0 = time.perf_counter()
+    schema_registry.add_search_text(df, "tbl_primary")
+    ms = (time.perf_counter() - t0) * 1000
+    print(f"\n📊 add_search_text: {len(df)} rows in {ms:.1f} ms ({ms * 1000 / max(len(df), 1):.2f} us/row)")
+
+if __name__ == "__main__":
+    main()
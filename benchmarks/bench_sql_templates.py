@@ -0,0 +1,60 @@
+# benchmarks/bench_sql_templates.py
+"""
+Intent-signature template cache (sql_templates) in create_sql_query. Runs the standard
+questions and their name/window/top-N variants through create_sql_query with the cache off and
+on, and reports distinct signatures, hit rate and median generation time per question. Every
+cached answer is checked against a fresh generation.
+
+    python -m benchmarks.bench_sql_templates
+    python -m benchmarks.bench_sql_templates --repeat 20
+"""
+from __future__ import annotations
+import argparse, statistics, time
+
+import sql_templates
+from db_backend import create_db_engine
+from agents.check_entity_node import check_entity_node
+from agents.find_tables import find_tables_node
+from agents.create_sql_query import create_sql_query
+from benchmarks.bench_prepared import _questions
+
+def _run(states, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        for st in states:
+            t0 = time.perf_counter()
+            create_sql_query(dict(st))
+            times.append((time.perf_counter() - t0) * 1e6)
+    return statistics.median(times)
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", default=None)
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args()
+
+    engine = create_db_engine(args.backend)
+    states = [find_tables_node(check_entity_node({"user_query": q, "engine": engine, "route_preference": r}, engine))
+              for r, q in _questions()]
+
+    entries = sql_templates.ENTRIES
+    sql_templates.ENTRIES = 0
+    off = _run(states, args.repeat)
+    fresh = [create_sql_query(dict(st)) for st in states]
+
+    sql_templates.ENTRIES = entries
+    sql_templates.clear()
+    on = _run(states, args.repeat)
+    cached = [create_sql_query(dict(st)) for st in states]
+    same = sum((a.get("sql_query"), a.get("sql_params")) == (b.get("sql_query"), b.get("sql_params"))
+               for a, b in zip(fresh, cached))
+
+    st = sql_templates.stats()
+    print(f"{len(states)} questions -> {st['size']} signatures")
+    print(f"{'✅' if same == len(states) else '❌'} cached SQL and params identical to fresh generation: {same}/{len(states)}")
+    print(f"median create_sql_query us: uncached {off:.1f}  cached {on:.1f}")
+    print(f"📊 hits {st['hits']} / misses {st['misses']} (hit rate {st['hit_rate']:.1%}), "
+          f"avg hit {st['avg_hit_ms'] * 1000:.1f} us vs generate {st['avg_generate_ms'] * 1000:.1f} us")
+
+if __name__ == "__main__":
+    main()
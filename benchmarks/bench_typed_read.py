@@ -0,0 +1,47 @@
+# benchmarks/bench_typed_read.py
+"""
+Parse time and frame memory: untyped read_csv + post-hoc date casting (the old ingest path)
+vs the schema registry's typed read.
+
+    python -m benchmarks.bench_typed_read --folder cooked_data_gk --repeat 5
+"""
+from __future__ import annotations
+import argparse, glob, time
+from pathlib import Path
+import pandas as pd
+
+import schema_registry
+
+def _untyped(path: str, table: str) -> pd.DataFrame:
+    df = pd.read_csv(path, dtype=object)
+    for col, fmt in schema_registry.DATE_COLUMNS.get(table, {}).items():
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format=fmt, errors="coerce").dt.date
+    return df
+
+def _typed(path: str, table: str) -> pd.DataFrame:
+    return schema_registry.read_csv(path, table)
+
+def _time(fn, path: str, table: str, repeat: int):
+    best, df = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        df = fn(path, table)
+        best = min(best, time.perf_counter() - t0)
+    return best, int(df.memory_usage(deep=True).sum())
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--folder", default="cooked_data_gk")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'table':<28}{'untyped ms':>12}{'typed ms':>10}{'untyped MB':>12}{'typed MB':>10}")
+    for path in sorted(glob.glob(str(Path(args.folder) / "*.csv"))):
+        table = schema_registry.table_name_for(path)
+        ut, um = _time(_untyped, path, table, args.repeat)
+        tt, tm = _time(_typed, path, table, args.repeat)
+        print(f"{table:<28}{ut * 1000:>12.1f}{tt * 1000:>10.1f}{um / 2**20:>12.2f}{tm / 2**20:>10.2f}")
+
+if __name__ == "__main__":
+    main()
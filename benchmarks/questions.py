@@ -0,0 +1,17 @@
+# benchmarks/questions.py
+"""Standard question set used by the benchmarks: (route, question)."""
+
+STANDARD_QUESTIONS = [
+    ("primary", "Bhujia sales last 3 months"),
+    ("primary", "total sales by sb marke for Bhujia product"),
+    ("primary", "top 5 products last 6 months"),
+    ("primary", "sales by distributor last 2 months"),
+    ("primary", "sales by super stockist"),
+    ("primary", "SAWARIYA TRADING sales last month"),
+    ("primary", "Lassi quantity last 12 months"),
+    ("primary", "which product sold the most"),
+    ("shipment", "Palak Sev shipment last 3 months"),
+    ("shipment", "top 10 products shipped last 6 months"),
+    ("shipment", "shipment by super stockist last year"),
+    ("shipment", "Kansal dispatch quantity"),
+]
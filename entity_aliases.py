@@ -0,0 +1,264 @@
+# entity_aliases.py
+"""
+Learned aliases for entity phrases. Users repeat the same shorthand ("sb marke", "kansal",
+"palak sev"). Once check_entity_node has resolved a phrase with high confidence, the answer
+is recorded as  phrase -> (table, column, value, confidence)  and the next question with the
+same phrase skips the fuzzy match entirely.
+
+The phrase is the entity span the match resolved, not the whole question: of the question's
+tokens (entity_index.query_tokens, time windows removed), the run from the first to the last
+token found in the matched value, as a substring or a shared prefix of at least four letters.
+So "sb marke sales last 3 months" resolved to "S B MARKPLUS PRIVATE LIMITED" learns
+"sb marke", and "top products of sb marke by distributor" finds it. A lookup tries the
+question's token runs, longest first, and trusts a hit only if no token left outside the run
+is a word of some entity value ("aloo" keeps "aloo bhujia" from reusing the alias of "bhujia").
+That check reads entity_index's words, or asks Postgres (entity_trgm) with ENTITY_MATCHER=trgm,
+which keeps no dictionaries in the worker.
+Learned aliases are kept per route, because the route decides which fact columns are probed
+first.
+
+  * learned aliases: LRU, at most ENTITY_ALIAS_MAX, only for confidence >= ENTITY_ALIAS_MIN_CONFIDENCE,
+    and dropped when the data version changes (the ingest hook, or a version check at most
+    every ENTITY_ALIAS_VERSION_CHECK_SECONDS for workers that did not run the ingest)
+  * pinned aliases: set by an admin (`pin`, which also corrects a wrong learned alias), used for
+    every route, never evicted and kept across data versions
+
+Aliases are saved as JSON under ENTITY_ALIAS_DIR ("" keeps them in memory only), one file per
+database. Learned entries are flushed at most every ENTITY_ALIAS_FLUSH_SECONDS, pins at once.
+"""
+from __future__ import annotations
+import atexit, hashlib, json, os, re, time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+import entity_index, entity_trgm, schema_catalog
+from entity_index import normalize, query_tokens
+from entity_trgm import ENTITY_MATCHER
+from ingest.identifiers import quote
+from versioned_cache import Registry, VersionedCache
+
+ALIAS_DIR = os.getenv("ENTITY_ALIAS_DIR", ".entity_aliases")
+MAX_ALIASES = int(os.getenv("ENTITY_ALIAS_MAX", "5000"))
+# The confidence create_sql_query needs before it filters on a dimension value
+MIN_CONFIDENCE = float(os.getenv("ENTITY_ALIAS_MIN_CONFIDENCE", "0.5"))
+VERSION_CHECK_SECONDS = float(os.getenv("ENTITY_ALIAS_VERSION_CHECK_SECONDS", "30"))
+FLUSH_SECONDS = float(os.getenv("ENTITY_ALIAS_FLUSH_SECONDS", "5"))
+
+# (table, column, value, confidence)
+Alias = Tuple[str, str, str, float]
+
+_WINDOW_RE = re.compile(
+    r"\b(?:last|past|previous)\s+(?:\d+|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve)?"
+    r"\s*(?:days?|weeks?|months?|years?)\b")
+MIN_PREFIX = 4
+
+def _tokens(user_text: str) -> List[str]:
+    """Entity-bearing tokens, time windows removed and runs of single letters joined ("S B" -> "sb")."""
+    out: List[str] = []
+    run = ""
+    for t in query_tokens(_WINDOW_RE.sub(" ", (user_text or "").lower())):
+        if len(t) == 1 and t.isalpha():
+            run += t
+            continue
+        if run:
+            out.append(run)
+            run = ""
+        out.append(t)
+    return out + [run] if run else out
+
+def phrase_key(phrase: str) -> str:
+    """An alias phrase as stored ("S B Marke" -> "sb marke")."""
+    return " ".join(_tokens(phrase))
+
+def _resolves(token: str, value: str) -> bool:
+    norm = normalize(value)
+    if token in norm:
+        return True
+    return len(token) >= MIN_PREFIX and any(
+        len(os.path.commonprefix([token, w])) >= MIN_PREFIX for w in re.findall(r"[a-z0-9]+", value.lower()))
+
+def span_key(user_text: str, value: str) -> str:
+    """The run of question tokens that resolved to `value`; '' when none did."""
+    toks = _tokens(user_text)
+    hits = [i for i, t in enumerate(toks) if _resolves(t, value)]
+    return " ".join(toks[hits[0]:hits[-1] + 1]) if hits else ""
+
+def _runs(toks: List[str]) -> List[Tuple[str, List[str]]]:
+    """(phrase, tokens left outside it) for every contiguous run, longest first."""
+    return [(" ".join(toks[i:i + n]), toks[:i] + toks[i + n:])
+            for n in range(len(toks), 0, -1) for i in range(len(toks) - n + 1)]
+
+class AliasCache(VersionedCache):
+    """Aliases of one engine; learned keys are 'route|phrase', pinned keys the bare phrase."""
+
+    label, noun = "Entity aliases", "learned"  # pins survive a new data version
+
+    def __init__(self, engine: Engine, path: Optional[Path] = None):
+        super().__init__(engine, VERSION_CHECK_SECONDS)
+        self.path = path
+        self._learned: "OrderedDict[str, Alias]" = OrderedDict()
+        self._pinned: Dict[str, Alias] = {}
+        self._dirty, self._saved_at = False, 0.0
+        self.hits = self.misses = self.learned_count = 0
+        self.pins_generation = 0  # bumped on pin/unpin, so entity_extract recompiles
+        self._load()
+
+    # ---------- persistence ----------
+    def _load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            doc = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"❌ Entity alias file unreadable, starting empty: {self.path} ({e})")
+            return
+        self.version = doc.get("version")
+        self._pinned = {k: tuple(v) for k, v in doc.get("pinned", {}).items()}
+        self._learned = OrderedDict((k, tuple(v)) for k, v in doc.get("learned", []))
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with self._lock:
+            doc = {"version": self.version, "pinned": self._pinned, "learned": list(self._learned.items())}
+            self._dirty, self._saved_at = False, time.monotonic()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(doc, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"❌ Entity alias save failed: {e}")
+
+    def _maybe_save(self) -> None:
+        if self._dirty and time.monotonic() - self._saved_at >= FLUSH_SECONDS:
+            self.save()
+
+    # ---------- data version ----------
+    def _size(self) -> int:
+        return len(self._learned)
+
+    def _drop_all(self) -> None:
+        self._learned.clear()
+        self._dirty = True
+
+    def _after_drop(self) -> None:
+        self.save()
+
+    # ---------- lookup ----------
+    def _entity_words(self, tokens: List[str]) -> set:
+        """The `tokens` that are words of some entity value."""
+        if ENTITY_MATCHER == "trgm":
+            try:
+                return entity_trgm.entity_words(self.engine, entity_index.present_columns(self.engine), tokens)
+            except Exception as e:
+                print(f"❌ pg_trgm entity word check failed, not trusting the alias: {str(e).splitlines()[0]}")
+                return set(tokens)
+        return set(tokens) & entity_index.get(self.engine).words()
+
+    def lookup(self, user_text: str, route: str) -> Optional[Alias]:
+        """The alias of the longest entity span in `user_text` with one, pinned before learned."""
+        toks = _tokens(user_text)
+        if not toks:
+            return None
+        self.check_version()
+        found, key, rest = None, "", []
+        with self._lock:
+            for phrase, rest in _runs(toks):
+                key = f"{route}|{phrase}"
+                found = self._pinned.get(phrase) or self._learned.get(key)
+                if found is not None:
+                    break  # the longest span decides; with entity words beside it, match afresh
+        hit = found if found is not None and not (rest and self._entity_words(rest)) else None
+        with self._lock:
+            if hit is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                if key in self._learned:
+                    self._learned.move_to_end(key)
+            return hit
+
+    def learn(self, user_text: str, route: str, alias: Alias) -> bool:
+        """Record a resolution under its entity span if it is confident enough; returns whether it was kept."""
+        phrase = span_key(user_text, alias[2])
+        if not phrase or alias[3] < MIN_CONFIDENCE:
+            return False
+        self.check_version()  # else the first version check would drop what is learned here
+        with self._lock:
+            if phrase in self._pinned:
+                return False
+            key = f"{route}|{phrase}"
+            self._learned[key] = tuple(alias)
+            self._learned.move_to_end(key)
+            while len(self._learned) > MAX_ALIASES:
+                self._learned.popitem(last=False)
+            self.learned_count += 1
+            self._dirty = True
+        self._maybe_save()
+        return True
+
+    # ---------- admin ----------
+    def pin(self, phrase: str, table: str, column: str, value: str) -> Alias:
+        """Pin (or correct) `phrase` to an existing value; learned aliases of the phrase are dropped."""
+        if column not in schema_catalog.columns(self.engine, table):
+            raise ValueError(f"unknown column {table}.{column}")
+        with self.engine.connect() as conn:
+            found = conn.execute(text(f"SELECT 1 FROM {quote(table)} WHERE {quote(column)} = :v LIMIT 1"),
+                                 {"v": value}).first()
+        if found is None:
+            raise ValueError(f"{value!r} does not occur in {table}.{column}")
+        key = phrase_key(phrase)
+        if not key:
+            raise ValueError(f"{phrase!r} has no entity tokens")
+        alias: Alias = (table, column, value, 1.0)
+        with self._lock:
+            self._pinned[key] = alias
+            self.pins_generation += 1
+            for k in [k for k in self._learned if k.split("|", 1)[1] == key]:
+                del self._learned[k]
+        self.save()
+        return alias
+
+    def unpin(self, phrase: str) -> bool:
+        with self._lock:
+            removed = self._pinned.pop(phrase_key(phrase), None) is not None
+            self.pins_generation += removed
+        if removed:
+            self.save()
+        return removed
+
+    def entries(self) -> Dict[str, List[Dict]]:
+        def _row(k: str, a: Alias) -> Dict:
+            return {"phrase": k, "table": a[0], "column": a[1], "value": a[2], "confidence": a[3]}
+        with self._lock:
+            return {"pinned": [_row(k, a) for k, a in self._pinned.items()],
+                    "learned": [_row(k, a) for k, a in reversed(self._learned.items())]}
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "learned": len(self._learned), "pinned": len(self._pinned),
+                "version": self.version, "invalidations": self.invalidations}
+
+# ---------- per-engine registry ----------
+def _path_for(engine: Engine) -> Optional[Path]:
+    if not ALIAS_DIR:
+        return None
+    url = engine.url.render_as_string(hide_password=True)
+    return Path(ALIAS_DIR) / f"aliases_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:10]}.json"
+
+_registry: Registry[AliasCache] = Registry(lambda engine: AliasCache(engine, _path_for(engine)))
+get = _registry.get
+on_new_version = _registry.on_new_version
+stats = _registry.stats
+
+@atexit.register
+def _flush() -> None:
+    for cache in _registry.caches():
+        if cache._dirty:
+            cache.save()
@@ -0,0 +1,243 @@
+# entity_extract.py
+"""
+Every entity a question names, found in one pass. check_entity_node's fuzzy match keeps only
+the best (table, column, value), so "Bhujia sales by SAWARIYA TRADING via S B Markplus" used
+to resolve a single actor and leave the rest to create_sql_query's ILIKE token filters.
+
+An Aho-Corasick automaton is compiled over word tokens from every entity name in the
+entity_index columns, plus the admin-pinned aliases (entity_aliases). Each name contributes
+its full form and its head: the words before the first size/MRP token, minus a trailing
+legal suffix ("Chips Pudina Treat MRP 10|30 GM*4.5 KG" -> "chips pudina treat", "S B Markplus
+Private Limited-2" -> "sb markplus"). Runs of single letters are joined ("s b" -> "sb") in
+names and questions alike. A head that is a word prefix of another head of the same kind
+("chips" next to "chips pudina treat") names a family, not an entity, so it is left to the
+token filters.
+
+`extract(question)` walks the question's words once, which is linear in its length and
+independent of the dictionary size. It returns the leftmost-longest non-overlapping spans,
+each with its kind (superstockist, distributor, product, category, city, ...) and the values
+of every column it matched.
+
+  ENTITY_EXTRACT=0    skip extraction (create_sql_query falls back to the token filters)
+"""
+from __future__ import annotations
+import bisect, os, re, threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.engine import Engine
+
+import entity_aliases, entity_index
+from entity_index import STOPWORDS
+
+ENABLED = os.getenv("ENTITY_EXTRACT", "1") == "1"
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_UNITS = {"mrp", "gm", "gms", "g", "kg", "kgs", "ml", "l", "ltr", "pcs", "pc", "ngp"}
+_LEGAL = {"private", "limited", "pvt", "ltd", "company", "co", "llp"}
+_KIND_PRIORITY = {"superstockist": 3, "distributor": 2, "product": 1}
+
+Key = Tuple[str, str]
+
+def words(s: str) -> List[str]:
+    """Lower-cased [a-z0-9] words, with runs of single letters joined ("S B" -> "sb")."""
+    out: List[str] = []
+    run = ""
+    for w in _WORD_RE.findall((s or "").lower()):
+        if len(w) == 1 and w.isalpha():
+            run += w
+            continue
+        if run:
+            out.append(run)
+            run = ""
+        out.append(w)
+    if run:
+        out.append(run)
+    return out
+
+def head(ws: List[str]) -> List[str]:
+    """Words before the first size/MRP token, without a trailing legal suffix."""
+    out: List[str] = []
+    for w in ws:
+        if w in _UNITS or w[0].isdigit():
+            break
+        out.append(w)
+    while out and out[-1] in _LEGAL:
+        out.pop()
+    return out
+
+def entity_kind(column: str) -> str:
+    c = column.lower()
+    if "super_stockist" in c or "superstockist" in c or "sold_to_party" in c:
+        return "superstockist"
+    if "distributor" in c:
+        return "distributor"
+    if "product_name" in c or "material" in c or "base_pack" in c:
+        return "product"
+    if "category" in c:
+        return "category"
+    return c
+
+def _useful(ws: List[str]) -> bool:
+    return bool(ws) and len("".join(ws)) >= 3 and not all(w in STOPWORDS for w in ws)
+
+# ---------- automaton ----------
+@dataclass
+class Pattern:
+    text: str
+    kind: str
+    values: Dict[Key, List[str]] = field(default_factory=dict)  # (table, column) -> values
+
+@dataclass
+class Span:
+    start: int  # word offsets into words(question)
+    end: int
+    text: str
+    kind: str
+    values: Dict[Key, List[str]]
+
+    def to_dict(self) -> Dict:
+        return {"text": self.text, "kind": self.kind, "start": self.start, "end": self.end,
+                "values": [{"table": t, "column": c, "values": v} for (t, c), v in self.values.items()]}
+
+class Automaton:
+    """Aho-Corasick over word symbols: goto tries, failure links, output links."""
+
+    def __init__(self, patterns: List[Pattern]):
+        self.patterns = patterns
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[int] = [-1]  # pattern id ending at the node
+        self._depth: List[int] = [0]
+        for pid, p in enumerate(patterns):
+            node = 0
+            for w in p.text.split():
+                nxt = self._goto[node].get(w)
+                if nxt is None:
+                    nxt = self._goto[node][w] = len(self._goto)
+                    self._goto.append({})
+                    self._out.append(-1)
+                    self._depth.append(self._depth[node] + 1)
+                node = nxt
+            self._out[node] = pid
+        self._fail = [0] * len(self._goto)
+        self._dict = [-1] * len(self._goto)  # nearest proper suffix node with an output
+        queue = list(self._goto[0].values())
+        for node in queue:  # BFS: a node's failure target is always shallower
+            for w, child in self._goto[node].items():
+                f = self._fail[node]
+                while f and w not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(w, 0)
+                self._fail[child] = target if target != child else 0
+                t = self._fail[child]
+                self._dict[child] = t if self._out[t] >= 0 else self._dict[t]
+                queue.append(child)
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def matches(self, ws: List[str]) -> List[Tuple[int, int, int]]:
+        """Every (start, end, pattern id) occurrence in `ws`, in one left-to-right pass."""
+        out = []
+        node = 0
+        for i, w in enumerate(ws):
+            while node and w not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(w, 0)
+            hit = node if self._out[node] >= 0 else self._dict[node]
+            while hit > 0:
+                out.append((i + 1 - self._depth[hit], i + 1, self._out[hit]))
+                hit = self._dict[hit]
+        return out
+
+    def extract(self, question: str) -> List[Span]:
+        """Leftmost-longest, non-overlapping spans."""
+        ws = words(question)
+        found = sorted(self.matches(ws), key=lambda m: (m[0], -(m[1] - m[0])))
+        spans: List[Span] = []
+        taken = 0
+        for start, end, pid in found:
+            if start < taken:
+                continue
+            p = self.patterns[pid]
+            spans.append(Span(start, end, p.text, p.kind, p.values))
+            taken = end
+        return spans
+
+def compile_patterns(columns: Iterable[Tuple[str, str, Iterable[str]]],
+                     aliases: Iterable[Tuple[str, str, str, str]] = ()) -> Automaton:
+    """Automaton over `columns` ((table, column, values)) and `aliases` ((phrase, table, column, value))."""
+    by_text: Dict[Tuple[str, str], Pattern] = {}
+    heads: Dict[str, set] = {}
+
+    def _add(ws: List[str], kind: str, table: str, column: str, value: str) -> None:
+        text = " ".join(ws)
+        p = by_text.setdefault((text, kind), Pattern(text, kind))
+        vals = p.values.setdefault((table, column), [])
+        if not vals or vals[-1] != value:
+            vals.append(value)
+
+    for table, column, values in columns:
+        kind = entity_kind(column)
+        for v in values:
+            full = words(v)
+            if _useful(full):
+                _add(full, kind, table, column, v)
+            h = head(full)
+            if h != full and _useful(h):
+                _add(h, kind, table, column, v)
+                heads.setdefault(kind, set()).add(" ".join(h))
+    # family names: a head that other heads of its kind extend
+    for kind, hs in heads.items():
+        ordered = sorted(hs)
+        for h in ordered:
+            # sorted order puts h's extensions ("h ...") right after h and its other prefixes
+            i = bisect.bisect_left(ordered, h + " ")
+            if i < len(ordered) and ordered[i].startswith(h + " "):
+                by_text.pop((h, kind), None)
+    for phrase, table, column, value in aliases:
+        ws = words(phrase)
+        if _useful(ws):
+            _add(ws, entity_kind(column), table, column, value)
+
+    # a text claimed by several kinds keeps the most specific one (actors first, as check_entity_node ranks)
+    best: Dict[str, Pattern] = {}
+    for (text, kind), p in by_text.items():
+        cur = best.get(text)
+        if cur is None or _KIND_PRIORITY.get(kind, 0) > _KIND_PRIORITY.get(cur.kind, 0):
+            best[text] = p
+    return Automaton(list(best.values()))
+
+# ---------- per-engine registry ----------
+_lock = threading.Lock()
+_automata: Dict[Engine, Tuple[tuple, Automaton]] = {}
+
+def _signature(engine: Engine) -> tuple:
+    """Changes whenever a column index is rebuilt or the pinned aliases change."""
+    return (entity_index.get(engine).columns(), entity_aliases.get(engine).pins_generation)
+
+def _same(a: tuple, b: tuple) -> bool:
+    # the signature holds the column indexes themselves, compared by identity
+    return a[1] == b[1] and a[0].keys() == b[0].keys() and all(a[0][k] is b[0][k] for k in a[0])
+
+def get(engine: Engine) -> Automaton:
+    """The engine's automaton over the entity columns indexed so far (warmup indexes them all)."""
+    cached = _automata.get(engine)
+    if cached is None:
+        entity_index.get(engine).warm()  # compile over every entity column, not the few built so far
+    sig = _signature(engine)
+    if cached and _same(cached[0], sig):
+        return cached[1]
+    with _lock:
+        cached = _automata.get(engine)
+        if cached and _same(cached[0], sig):
+            return cached[1]
+        columns = [(t, c, [idx.values[i] for i in range(len(idx))]) for (t, c), idx in sig[0].items()]
+        pins = [(r["phrase"], r["table"], r["column"], r["value"])
+                for r in entity_aliases.get(engine).entries()["pinned"]]
+        auto = compile_patterns(columns, pins)
+        _automata[engine] = (sig, auto)
+        return auto
+
+def extract(engine: Engine, question: str) -> List[Span]:
+    return get(engine).extract(question) if ENABLED else []
@@ -0,0 +1,327 @@
+# entity_index.py
+"""
+In-memory fuzzy index over the entity name columns (schema_registry.ENTITY_COLUMNS), so that
+check_entity_node resolves a mention without querying the database.
+
+Every distinct value of a column is normalized the way the matcher always has ([a-z0-9] only,
+lower-cased). Its character trigrams go into an inverted index, kept as CSR arrays: the 36^3
+possible trigrams are addressed directly, and `offsets[g]:offsets[g+1]` slices `postings` to
+the ids of the values that contain trigram g. A lookup first collects the RERANK_CANDIDATES
+values that share the most trigrams with the question. It then reranks only those with
+`score()`, the same containment / token-coverage / SequenceMatcher score the full scan used.
+Reranking visits candidates in order of a vectorized upper bound (character-count overlap,
+as in SequenceMatcher.quick_ratio), and stops as soon as no remaining candidate can beat the
+current best. Columns of at most EXACT_SCAN_MAX values are scanned exactly, so the small
+actor columns rank exactly as before.
+
+Columns are indexed the first time they are asked for (service warmup asks for all of them).
+After an ingest, `refresh(engine, tables)` rebuilds only the columns of the swapped tables.
+Warmup first maps the entity_snapshot file of the current data version, so a new worker only
+queries the database for columns the snapshot lacks; whatever it had to build is saved back.
+"""
+from __future__ import annotations
+import os, re, threading, time
+from difflib import SequenceMatcher
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+import entity_snapshot, schema_catalog
+from ingest.identifiers import quote
+from ingest.version import current_version
+from schema_registry import ENTITY_COLUMNS
+
+NGRAM = 3
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789"
+_CODE = {ch: i for i, ch in enumerate(_ALPHABET)}
+NGRAM_SPACE = len(_ALPHABET) ** NGRAM
+RERANK_CANDIDATES = int(os.getenv("ENTITY_RERANK_CANDIDATES", "8"))
+# Columns this small (the actor columns) are scanned exactly, as the matcher always did
+EXACT_SCAN_MAX = int(os.getenv("ENTITY_EXACT_SCAN_MAX", "32"))
+
+STOPWORDS = {
+    "total","overall","sales","sale","sold","amount","value","qty","quantity","units","pieces","pcs",
+    "of","for","in","last","this","that","these","those","month","months","week","weeks","day","days","year","years",
+    "please","pls","plz","clarify","your","you","me","kindly","the","and","or","to","from","by","on","at","a","an","is","are","was","were"
+}
+
+# ---------- scoring ----------
+def normalize(s: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "", (s or "").lower())
+
+def query_tokens(user_text: str) -> List[str]:
+    return [t for t in re.findall(r"[a-z0-9]+", (user_text or "").lower()) if t not in STOPWORDS]
+
+def score(user_text: str, candidate: str) -> float:
+    """max(SequenceMatcher ratio, 0.85 * question-in-candidate + 0.15 * token coverage)."""
+    return _score_norm(normalize(user_text), query_tokens(user_text), normalize(candidate))
+
+def _cheap(u: str, toks: List[str], c: str) -> float:
+    contain = 1.0 if u in c else 0.0
+    cov = (sum(1 for t in toks if t in c) / len(toks)) if toks else 0.0
+    return 0.85 * contain + 0.15 * cov
+
+def _score_norm(u: str, toks: List[str], c: str) -> float:
+    if not u or not c:
+        return 0.0
+    return max(SequenceMatcher(None, u, c).ratio(), _cheap(u, toks, c))
+
+def char_counts(norm: str) -> np.ndarray:
+    """Per-character counts over the alphabet; their overlap bounds SequenceMatcher.ratio()."""
+    out = np.zeros(len(_ALPHABET), dtype=np.uint8)
+    for ch in norm:
+        i = _CODE[ch]
+        out[i] = min(int(out[i]) + 1, 255)
+    return out
+
+def gram_ids(norm: str) -> np.ndarray:
+    """Sorted distinct trigram ids of a normalized string."""
+    codes = [_CODE[ch] for ch in norm]
+    ids = {(a * 36 + b) * 36 + c for a, b, c in zip(codes, codes[1:], codes[2:])}
+    return np.fromiter(sorted(ids), dtype=np.int32, count=len(ids))
+
+# ---------- storage ----------
+class StringTable:
+    """Strings packed into one UTF-8 blob plus offsets; decoded on access."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob, self.offsets = blob, offsets
+
+    @classmethod
+    def pack(cls, strings: List[str]) -> "StringTable":
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+class ColumnIndex:
+    def __init__(self, table: str, column: str, values: StringTable, norms: StringTable,
+                 offsets: np.ndarray, postings: np.ndarray, short: np.ndarray, counts: np.ndarray):
+        self.table, self.column = table, column
+        self.values, self.norms = values, norms
+        self.offsets, self.postings = offsets, postings  # CSR: trigram id -> value ids
+        self.short = short  # values too short to have a trigram; always reranked
+        self.counts = counts  # (values x alphabet) character counts of the normalized values
+        self.lengths = np.diff(norms.offsets)
+
+    @classmethod
+    def build(cls, table: str, column: str, values: Iterable[str]) -> "ColumnIndex":
+        vals = sorted({str(v).strip() for v in values if v is not None and str(v).strip()})
+        norms = [normalize(v) for v in vals]
+        grams = [gram_ids(n) for n in norms]
+        counts = np.zeros(NGRAM_SPACE, dtype=np.int64)
+        for g in grams:
+            counts[g] += 1
+        offsets = np.zeros(NGRAM_SPACE + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        postings = np.empty(int(offsets[-1]), dtype=np.int32)
+        fill = offsets[:-1].copy()
+        for vid, g in enumerate(grams):  # value ids ascend, so every posting list is sorted
+            postings[fill[g]] = vid
+            fill[g] += 1
+        short = np.array([i for i, n in enumerate(norms) if 0 < len(n) < NGRAM], dtype=np.int32)
+        counts_ = np.stack([char_counts(n) for n in norms]) if norms else \
+            np.zeros((0, len(_ALPHABET)), dtype=np.uint8)
+        return cls(table, column, StringTable.pack(vals), StringTable.pack(norms),
+                   offsets, postings, short, counts_)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """The arrays entity_snapshot persists; `from_arrays` is the inverse."""
+        return {"values_blob": self.values.blob, "values_offsets": self.values.offsets,
+                "norms_blob": self.norms.blob, "norms_offsets": self.norms.offsets,
+                "offsets": self.offsets, "postings": self.postings,
+                "short": self.short, "counts": self.counts}
+
+    @classmethod
+    def from_arrays(cls, table: str, column: str, a: Dict[str, np.ndarray]) -> "ColumnIndex":
+        return cls(table, column, StringTable(a["values_blob"], a["values_offsets"]),
+                   StringTable(a["norms_blob"], a["norms_offsets"]),
+                   a["offsets"], a["postings"], a["short"], a["counts"])
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def candidates(self, u: str, limit: int = RERANK_CANDIDATES) -> np.ndarray:
+        """Ids of the `limit` values sharing the most trigrams with `u`, plus the short ones."""
+        g = gram_ids(u)
+        lists = [self.postings[self.offsets[i]:self.offsets[i + 1]] for i in g]
+        hits = np.concatenate(lists) if lists else np.empty(0, dtype=np.int32)
+        if not len(hits):
+            return self.short
+        ids, counts = np.unique(hits, return_counts=True)
+        if len(ids) > limit:
+            ids = ids[np.argpartition(-counts, limit - 1)[:limit]]
+        return np.concatenate([ids, self.short])
+
+    def best(self, user_text: str) -> Tuple[Optional[str], float]:
+        """(value, score) of the best match, as the full difflib scan would pick it."""
+        u = normalize(user_text)
+        if not u or not len(self):
+            return None, 0.0
+        toks = query_tokens(user_text)
+        if len(self) <= EXACT_SCAN_MAX:
+            best_i, best_s = None, 0.0
+            for i in range(len(self)):
+                s = _score_norm(u, toks, self.norms[i])
+                if s > best_s:
+                    best_i, best_s = i, s
+            return (self.values[best_i] if best_i is not None else None), best_s
+        ids = self.candidates(u)
+        if not len(ids):
+            return None, 0.0
+        overlap = np.minimum(self.counts[ids], char_counts(u)).sum(axis=1)
+        ratio_bound = 2.0 * overlap / (len(u) + self.lengths[ids])
+        norms = [self.norms[int(i)] for i in ids]
+        cheap = [_cheap(u, toks, c) for c in norms]
+        bound = np.maximum(ratio_bound, cheap)
+        best_i, best_s = None, 0.0
+        for k in np.argsort(-bound, kind="stable"):
+            if bound[k] <= best_s:
+                break  # sorted: nothing left can win
+            s = cheap[k]
+            if ratio_bound[k] > max(s, best_s):
+                s = max(s, SequenceMatcher(None, u, norms[k]).ratio())
+            if s > best_s:
+                best_i, best_s = int(ids[k]), s
+        return (self.values[best_i] if best_i is not None else None), best_s
+
+# ---------- per-engine registry ----------
+def _distinct_values(engine: Engine, table: str, column: str) -> List[str]:
+    col = quote(column)
+    sql = text(f"SELECT DISTINCT {col} FROM {quote(table)} WHERE {col} IS NOT NULL")
+    with engine.connect() as conn:
+        return [str(r[0]) for r in conn.execute(sql)]
+
+def present_columns(engine: Engine) -> List[Tuple[str, str]]:
+    """Entity columns present in the live schema."""
+    out = []
+    for table, cols in ENTITY_COLUMNS.items():
+        present = schema_catalog.columns(engine, table)
+        out += [(table, c) for c in cols if c in present]
+    return out
+
+class EntityIndex:
+    """Column indexes of one engine, keyed (table, column)."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._cols: Dict[Tuple[str, str], ColumnIndex] = {}
+        self._lock = threading.Lock()
+        self.build_seconds: Dict[Tuple[str, str], float] = {}
+        self.snapshot: Optional[str] = None  # file the mapped columns came from
+        self.generation = 0  # bumped whenever a column is (re)built or mapped
+        self._words: Tuple[int, FrozenSet[str]] = (-1, frozenset())
+
+    def _build(self, table: str, column: str) -> ColumnIndex:
+        t0 = time.perf_counter()
+        idx = ColumnIndex.build(table, column, _distinct_values(self.engine, table, column))
+        self.build_seconds[(table, column)] = time.perf_counter() - t0
+        return idx
+
+    def column(self, table: str, column: str) -> ColumnIndex:
+        key = (table, column)
+        idx = self._cols.get(key)
+        if idx is None:
+            with self._lock:
+                idx = self._cols.get(key)
+                if idx is None:
+                    idx = self._cols[key] = self._build(table, column)
+                    self.generation += 1
+        return idx
+
+    def columns(self) -> Dict[Tuple[str, str], ColumnIndex]:
+        """The columns indexed so far, keyed (table, column); a rebuilt column is a new object."""
+        return dict(self._cols)
+
+    def words(self) -> FrozenSet[str]:
+        """Lower-cased [a-z0-9] words of every indexed value ("S B MARKPLUS" -> s, b, markplus)."""
+        gen, words = self._words
+        if gen != self.generation:
+            gen = self.generation
+            words = frozenset(w for idx in list(self._cols.values()) for i in range(len(idx))
+                              for w in re.findall(r"[a-z0-9]+", idx.values[i].lower()))
+            self._words = (gen, words)
+        return words
+
+    def best_match(self, table: str, column: str, user_text: str) -> Tuple[Optional[str], float]:
+        return self.column(table, column).best(user_text)
+
+    def _wanted(self) -> List[Tuple[str, str]]:
+        return present_columns(self.engine)
+
+    def _save_snapshot(self, version: int) -> None:
+        if not entity_snapshot.enabled():
+            return
+        try:
+            path = entity_snapshot.save(entity_snapshot.path_for(self.engine, version),
+                                        {k: idx.arrays() for k, idx in list(self._cols.items())})
+            print(f"🗂️ Entity snapshot saved: {path} ({len(self._cols)} columns)")
+        except Exception as e:
+            print(f"❌ Entity snapshot save failed: {str(e).splitlines()[0]}")
+
+    def warm(self) -> int:
+        """Index every entity column present in the live schema; returns the column count."""
+        wanted = self._wanted()
+        version = current_version(self.engine)
+        if entity_snapshot.enabled():
+            path = entity_snapshot.path_for(self.engine, version)
+            mapped = entity_snapshot.load(path) or {}
+            with self._lock:
+                for key in wanted:
+                    if key in mapped and key not in self._cols:
+                        self._cols[key] = ColumnIndex.from_arrays(*key, mapped[key])
+                self.generation += 1
+            if mapped:
+                self.snapshot = str(path)
+                print(f"⏭️ Entity snapshot mapped: {path} ({len(mapped)} columns)")
+        missing = [k for k in wanted if k not in self._cols]
+        for key in missing:
+            self.column(*key)
+        if missing:
+            self._save_snapshot(version)
+        return len(wanted)
+
+    def refresh(self, tables: Iterable[str]) -> List[Tuple[str, str]]:
+        """Rebuild the already-indexed columns of `tables`; readers keep the old index meanwhile."""
+        tables = set(tables)
+        rebuilt = []
+        for key in [k for k in list(self._cols) if k[0] in tables]:
+            try:
+                present = schema_catalog.columns(self.engine, key[0])
+                if key[1] in present:
+                    self._cols[key] = self._build(*key)
+                else:
+                    self._cols.pop(key, None)
+                rebuilt.append(key)
+            except Exception as e:
+                self._cols.pop(key, None)  # rebuilt lazily on next use
+                print(f"❌ Entity index rebuild failed for {key[0]}.{key[1]}: {str(e).splitlines()[0]}")
+        if rebuilt:
+            self.generation += 1
+            self._save_snapshot(current_version(self.engine))
+        return rebuilt
+
+    def stats(self) -> Dict[str, int]:
+        return {f"{t}.{c}": len(idx) for (t, c), idx in self._cols.items()}
+
+_registry_lock = threading.Lock()
+_indexes: Dict[Engine, EntityIndex] = {}
+
+def get(engine: Engine) -> EntityIndex:
+    idx = _indexes.get(engine)
+    if idx is None:
+        with _registry_lock:
+            idx = _indexes.setdefault(engine, EntityIndex(engine))
+    return idx
+
+def refresh(engine: Engine, tables: Iterable[str]) -> List[Tuple[str, str]]:
+    """Called by ingest after a swap; a no-op for engines that have no index yet."""
+    idx = _indexes.get(engine)
+    return idx.refresh(tables) if idx is not None else []
@@ -0,0 +1,102 @@
+# entity_snapshot.py
+"""
+On-disk snapshot of the entity index (entity_index.ColumnIndex arrays: packed values,
+normalized strings, trigram postings, character counts), keyed to the database and its ingest
+data version. A new worker maps the file read-only and serves matches straight from it,
+without re-scanning any DISTINCT column. Every worker mapping the same file shares its pages
+through the OS page cache.
+
+File layout: MAGIC | u64 header length | JSON header | arrays, each 64-byte aligned. The
+header lists every column and, for each of its arrays, the dtype, shape and byte offset
+(relative to the first aligned byte after the header). Files are written under a temporary
+name and renamed into place, so a reader never maps a half-written snapshot.
+
+  ENTITY_SNAPSHOT_DIR=.entity_snapshot   where snapshots live ("" disables them)
+"""
+from __future__ import annotations
+import hashlib, json, os, struct
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import numpy as np
+from sqlalchemy.engine import Engine
+
+MAGIC = b"ENTIDX1\0"
+_ALIGN = 64
+SNAPSHOT_DIR = os.getenv("ENTITY_SNAPSHOT_DIR", ".entity_snapshot")
+KEEP_VERSIONS = 2
+
+Key = Tuple[str, str]
+
+def enabled() -> bool:
+    return bool(SNAPSHOT_DIR)
+
+def path_for(engine: Engine, version: int) -> Path:
+    """One file per (database, data version); the password is left out of the key."""
+    url = engine.url.render_as_string(hide_password=True)
+    db = hashlib.sha1(url.encode("utf-8")).hexdigest()[:10]
+    return Path(SNAPSHOT_DIR) / f"entities_{db}_v{version}.bin"
+
+def _pad(n: int) -> int:
+    return (-n) % _ALIGN
+
+def save(path: Path, columns: Dict[Key, Dict[str, np.ndarray]]) -> Path:
+    """Write `columns` ((table, column) -> named arrays) to `path` atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    entries, blobs, offset = [], [], 0
+    for (table, column), arrays in columns.items():
+        meta = {}
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            meta[name] = [arr.dtype.str, list(arr.shape), offset]
+            blobs.append(arr)
+            offset += arr.nbytes + _pad(arr.nbytes)
+        entries.append({"table": table, "column": column, "arrays": meta})
+    header = json.dumps({"columns": entries}).encode("utf-8")
+    start = len(MAGIC) + 8 + len(header)
+    start += _pad(start)
+
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        f.write(b"\0" * (start - f.tell()))
+        for arr in blobs:
+            f.write(arr.tobytes())
+            f.write(b"\0" * _pad(arr.nbytes))
+    os.replace(tmp, path)
+    _prune(path)
+    return path
+
+def load(path: Path) -> Optional[Dict[Key, Dict[str, np.ndarray]]]:
+    """Read-only views into the mapped file, or None if there is no usable snapshot."""
+    try:
+        mm = np.memmap(path, dtype=np.uint8, mode="r")
+    except (OSError, ValueError):
+        return None
+    if bytes(mm[:len(MAGIC)]) != MAGIC:
+        return None
+    (hlen,) = struct.unpack("<Q", bytes(mm[len(MAGIC):len(MAGIC) + 8]))
+    head_end = len(MAGIC) + 8 + hlen
+    header = json.loads(bytes(mm[len(MAGIC) + 8:head_end]).decode("utf-8"))
+    start = head_end + _pad(head_end)
+    out: Dict[Key, Dict[str, np.ndarray]] = {}
+    for entry in header["columns"]:
+        out[(entry["table"], entry["column"])] = {
+            name: np.ndarray(tuple(shape), dtype=np.dtype(dt), buffer=mm, offset=start + off)
+            for name, (dt, shape, off) in entry["arrays"].items()
+        }
+    return out
+
+def _prune(latest: Path) -> None:
+    """Keep the newest KEEP_VERSIONS snapshots of this database (older workers may still map one)."""
+    prefix = latest.name.rsplit("_v", 1)[0] + "_v"
+    def _version(p: Path) -> int:
+        try:
+            return int(p.stem.rsplit("_v", 1)[1])
+        except (IndexError, ValueError):
+            return -1
+    snaps = sorted((p for p in latest.parent.glob(f"{prefix}*.bin")), key=_version, reverse=True)
+    for old in snaps[KEEP_VERSIONS:]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
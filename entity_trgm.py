@@ -0,0 +1,95 @@
+# entity_trgm.py
+"""
+Server-side entity matching with pg_trgm: the alternative to the in-memory entity_index for
+deployments whose masters are too large to copy into every worker (ENTITY_MATCHER=trgm).
+
+One UNION ALL statement returns the best (table, column, value, score) of every probed column
+in a single round trip. A value is a candidate when its trigrams are close to the whole
+question (`%`) or when it contains a word close to one of the question's tokens (`%>`).
+Both operators are served by the GIN (LOWER(col) gin_trgm_ops) indexes from ingest/indexes.py,
+and admission follows the server's pg_trgm.similarity_threshold and
+pg_trgm.word_similarity_threshold settings. Candidates are scored the way entity_index
+scores them, with pg_trgm's similarity() standing in for SequenceMatcher's ratio:
+
+    GREATEST(similarity(lower(v), q), 0.85 * question-in-value + 0.15 * token coverage)
+"""
+from __future__ import annotations
+import os
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from entity_index import normalize, query_tokens
+from ingest.identifiers import quote
+
+# memory: in-process n-gram index (entity_index); trgm: pg_trgm in Postgres (this module)
+ENTITY_MATCHER = os.getenv("ENTITY_MATCHER", "memory").lower().strip()
+
+# Shorter tokens have too few trigrams for a useful %> probe (they still count for coverage)
+MIN_PROBE_TOKEN = 3
+
+def available(engine: Engine) -> bool:
+    if engine.dialect.name != "postgresql":
+        return False
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+    except Exception:
+        return False
+
+def _column_sql(i: int, table: str, column: str, ntok: int, probe_toks: Sequence[int]) -> str:
+    col = quote(column)
+    admit = " OR ".join([f"LOWER({col}) % :q"] + [f"LOWER({col}) %> :t{k}" for k in probe_toks])
+    cov = " + ".join(f"(strpos(n, :t{k}) > 0)::int" for k in range(ntok)) or "0"
+    return f"""(
+    SELECT :tbl{i} AS tbl, :col{i} AS col, v,
+           GREATEST(similarity(l, :q), 0.85 * (strpos(n, :u) > 0)::int + 0.15 * ({cov}) / {max(ntok, 1)}.0) AS s
+    FROM (
+        SELECT DISTINCT {col} AS v, LOWER({col}) AS l,
+               regexp_replace(LOWER({col}), '[^a-z0-9]+', '', 'g') AS n
+        FROM {quote(table)}
+        WHERE {col} IS NOT NULL AND ({admit})
+    ) c
+    ORDER BY s DESC, length(v) DESC
+    LIMIT 1
+)"""
+
+def best_matches(engine: Engine, probes: List[Tuple[str, str]], user_text: str
+                 ) -> List[Tuple[str, str, str, float]]:
+    """[(table, column, value, score)] with at most one row per probed column, in one query."""
+    u = normalize(user_text)
+    if not u or not probes:
+        return []
+    toks = query_tokens(user_text)
+    probe_toks = [k for k, t in enumerate(toks) if len(t) >= MIN_PROBE_TOKEN]
+    params: Dict[str, object] = {"q": user_text.lower(), "u": u}
+    params.update({f"t{k}": t for k, t in enumerate(toks)})
+    parts = []
+    for i, (table, column) in enumerate(probes):
+        params[f"tbl{i}"], params[f"col{i}"] = table, column
+        parts.append(_column_sql(i, table, column, len(toks), probe_toks))
+    with engine.connect() as conn:
+        rows = conn.execute(text("\nUNION ALL\n".join(parts)), params).fetchall()
+    return [(r[0], r[1], str(r[2]), float(r[3])) for r in rows]
+
+def entity_words(engine: Engine, columns: List[Tuple[str, str]], tokens: Iterable[str]) -> Set[str]:
+    """
+    The `tokens` that are a whole [a-z0-9] word of some value of `columns`, in one query: the
+    server-side counterpart of entity_index's words(). The plain LIKE lets the trigram index
+    narrow the rows before the word test.
+    """
+    toks = sorted(set(tokens))
+    if not toks or not columns:
+        return set()
+    parts = []
+    for k in range(len(toks)):
+        probes = " UNION ALL ".join(
+            f"SELECT 1 FROM {quote(t)} WHERE LOWER({quote(c)}) LIKE :s{k} "
+            f"AND ' ' || regexp_replace(LOWER({quote(c)}), '[^a-z0-9]+', ' ', 'g') || ' ' LIKE :w{k}"
+            for t, c in columns)
+        parts.append(f"SELECT :t{k} AS w WHERE EXISTS ({probes})")
+    params: Dict[str, object] = {}
+    for k, t in enumerate(toks):
+        params[f"t{k}"], params[f"s{k}"], params[f"w{k}"] = t, f"%{t}%", f"% {t} %"
+    with engine.connect() as conn:
+        return {r[0] for r in conn.execute(text("\nUNION ALL\n".join(parts)), params)}
@@ -0,0 +1,90 @@
+# ingest/copy_loader.py
+from __future__ import annotations
+import io
+from typing import Dict, Iterator, List, Optional
+import pandas as pd
+from sqlalchemy.engine import Connection
+from sqlalchemy.types import Integer, BigInteger, SmallInteger
+
+from ingest.identifiers import qualified, quote
+
+COPY_CHUNK_ROWS = 50_000
+_INT_TYPES = (Integer, BigInteger, SmallInteger)
+
+def _is_int_type(t) -> bool:
+    return (isinstance(t, type) and issubclass(t, _INT_TYPES)) or isinstance(t, _INT_TYPES)
+
+def _coerce_for_copy(df: pd.DataFrame, dtype: Dict) -> pd.DataFrame:
+    """
+    COPY parses text strictly, so values that INSERT would cast implicitly must be fixed up:
+    float-read integer columns ('19000102.0') become nullable Int64.
+    """
+    out = df
+    for col, t in dtype.items():
+        if col in out.columns and _is_int_type(t) and not pd.api.types.is_integer_dtype(out[col]):
+            if out is df:
+                out = df.copy()
+            out[col] = pd.to_numeric(out[col], errors="coerce").round().astype("Int64")
+    return out
+
+def _csv_chunks(df: pd.DataFrame, chunk_rows: int) -> Iterator[str]:
+    for start in range(0, len(df), chunk_rows):
+        buf = io.StringIO()
+        df.iloc[start:start + chunk_rows].to_csv(buf, index=False, header=False, na_rep="")
+        yield buf.getvalue()
+
+class _CsvStream(io.RawIOBase):
+    """File-like reader over CSV text chunks so COPY never needs the whole table as one string."""
+    def __init__(self, chunks: Iterator[str]):
+        self._chunks = chunks
+        self._buf = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buf) < size:
+            nxt = next(self._chunks, None)
+            if nxt is None:
+                break
+            self._buf += nxt.encode("utf-8")
+        if size < 0:
+            out, self._buf = self._buf, b""
+        else:
+            out, self._buf = self._buf[:size], self._buf[size:]
+        return out
+
+def _copy_sql(table: str, columns: List[str], schema: Optional[str] = None) -> str:
+    cols = ", ".join(quote(c) for c in columns)
+    return f"COPY {qualified(table, schema)} ({cols}) FROM STDIN WITH (FORMAT csv, NULL '')"
+
+def copy_frame(conn: Connection, df: pd.DataFrame, table: str, dtype: Dict,
+               chunk_rows: int = COPY_CHUNK_ROWS, create: bool = True,
+               schema: Optional[str] = None) -> int:
+    """
+    Load `df` into `table` using COPY FROM STDIN. With `create` the table is replaced by an
+    empty one built through `to_sql`, so column types follow exactly the same
+    TABLE_COLUMN_TYPES rules as the INSERT path; otherwise rows are appended.
+    Runs inside the caller's transaction.
+    """
+    if create:
+        df.head(0).to_sql(name=table, con=conn, schema=schema, index=False, if_exists="replace", dtype=dtype)
+    if df.empty:
+        return 0
+    data = _coerce_for_copy(df, dtype)
+    sql = _copy_sql(table, [str(c) for c in data.columns], schema)
+    raw = conn.connection.dbapi_connection
+    cur = raw.cursor()
+    try:
+        if hasattr(cur, "copy_expert"):  # psycopg2
+            cur.copy_expert(sql, _CsvStream(_csv_chunks(data, chunk_rows)))
+        else:  # psycopg 3
+            with cur.copy(sql) as cp:
+                for chunk in _csv_chunks(data, chunk_rows):
+                    cp.write(chunk)
+    finally:
+        cur.close()
+    return len(data)
+
+def supports_copy(conn: Connection) -> bool:
+    return conn.dialect.name == "postgresql"
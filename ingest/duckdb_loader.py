@@ -0,0 +1,37 @@
+# ingest/duckdb_loader.py
+from __future__ import annotations
+from typing import Dict, Optional
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from ingest.identifiers import qualified, quote
+
+def supports_duckdb(conn: Connection) -> bool:
+    return conn.dialect.name == "duckdb"
+
+def drop_table(conn: Connection, table: str, schema: Optional[str] = None) -> None:
+    """duckdb_engine cannot reflect an existing table for pandas' if_exists='replace'; drop it first."""
+    conn.execute(text(f"DROP TABLE IF EXISTS {qualified(table, schema)}"))
+
+def insert_frame(conn: Connection, df: pd.DataFrame, table: str, dtype: Dict, create: bool = True,
+                 schema: Optional[str] = None) -> int:
+    """
+    Bulk-load `df` into an in-process DuckDB table by scanning the registered frame directly
+    (no per-row INSERTs). As with COPY, the empty table is created through `to_sql` so the
+    schema registry still decides the column types.
+    """
+    if create:
+        drop_table(conn, table, schema)
+        df.head(0).to_sql(name=table, con=conn, schema=schema, index=False, if_exists="replace", dtype=dtype)
+    if df.empty:
+        return 0
+    raw = conn.connection.dbapi_connection
+    view = f"_ingest_{table}"
+    cols = ", ".join(quote(c) for c in df.columns)
+    raw.register(view, df)
+    try:
+        raw.execute(f'INSERT INTO {qualified(table, schema)} ({cols}) SELECT {cols} FROM {quote(view)}')
+    finally:
+        raw.unregister(view)
+    return len(df)
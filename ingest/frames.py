@@ -0,0 +1,42 @@
+# ingest/frames.py
+from __future__ import annotations
+from typing import Dict, Optional
+import pandas as pd
+
+from ingest import parquet_cache
+from ingest.copy_loader import copy_frame, supports_copy
+from ingest.duckdb_loader import drop_table, insert_frame, supports_duckdb
+
+# ---------- read & type ----------
+def read_typed_frame(csv_file: str, table_name: str, digest: Optional[str] = None) -> pd.DataFrame:
+    """
+    Dtypes, NULL spellings, header names and dates all come from the schema registry;
+    the parsed result is served from the Parquet copy beside the CSV while it is fresh.
+    `digest` is the CSV's content hash if already computed, so it is not hashed again.
+    """
+    return parquet_cache.read_table(csv_file, table_name, digest)
+
+# ---------- write ----------
+def write_frame(conn, df: pd.DataFrame, table_name: str, column_types: Dict,
+                mode: str = "to_sql", if_exists: str = "replace", schema: Optional[str] = None) -> None:
+    """
+    Write `df` to `table_name` (in `schema`, default: the connection's). 'copy' is the bulk
+    path: COPY FROM STDIN on Postgres, a frame scan on DuckDB; anything else falls back to
+    to_sql INSERTs.
+    """
+    if mode == "copy" and supports_copy(conn):
+        copy_frame(conn, df, table_name, column_types, create=(if_exists == "replace"), schema=schema)
+        return
+    if mode == "copy" and supports_duckdb(conn):
+        insert_frame(conn, df, table_name, column_types, create=(if_exists == "replace"), schema=schema)
+        return
+    if if_exists == "replace" and supports_duckdb(conn):
+        drop_table(conn, table_name, schema)
+    df.to_sql(
+        name=table_name,
+        con=conn,
+        schema=schema,
+        index=False,
+        if_exists=if_exists,
+        dtype=column_types
+    )
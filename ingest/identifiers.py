@@ -0,0 +1,14 @@
+# ingest/identifiers.py
+"""
+Quoted SQL identifiers for the DDL and bulk-load statements ingest builds as text. Postgres,
+DuckDB and SQLite all take "double-quoted" names with embedded quotes doubled, so a column
+or table named from a CSV header or sheet can never break out of the statement.
+"""
+from __future__ import annotations
+from typing import Optional
+
+def quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+def qualified(table: str, schema: Optional[str] = None) -> str:
+    return f"{quote(schema)}.{quote(table)}" if schema else quote(table)
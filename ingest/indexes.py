@@ -0,0 +1,158 @@
+# ingest/indexes.py
+"""
+Post-ingest indexes for the Postgres tables. A reload (`to_sql(if_exists="replace")` or the
+COPY path) drops the table and its indexes with it, so they are re-created after every load:
+
+  - date columns:        B-tree; BRIN on large tables whose rows are stored in date order
+  - relationship keys:   B-tree on both sides of every edge in relationships.json
+  - search_text:         GIN (search_text gin_trgm_ops), serving the generator's one
+                         `search_text LIKE '%tok%'` predicate per token (the column is
+                         normalized at ingest, so no LOWER() on either side)
+  - search columns:      GIN (LOWER(col) gin_trgm_ops), for tables loaded before
+                         search_text existed and the entity columns the pg_trgm
+                         matcher (entity_trgm) probes with % / %>
+"""
+from __future__ import annotations
+import hashlib, os
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+import schema_registry
+from ingest.identifiers import qualified, quote
+
+BRIN_MIN_ROWS = int(os.getenv("INDEX_BRIN_MIN_ROWS", "1000000"))
+BRIN_MIN_CORRELATION = 0.9
+_PG_NAME_MAX = 63
+
+@dataclass(frozen=True)
+class IndexSpec:
+    table: str
+    column: str
+    kind: str  # 'date' | 'key' | 'trgm' | 'search'
+
+    @property
+    def name(self) -> str:
+        name = f"ix_{self.table}_{self.column}" + ("_trgm" if self.kind in ("trgm", "search") else "")
+        if len(name) > _PG_NAME_MAX:
+            digest = hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+            name = f"{name[:_PG_NAME_MAX - 9]}_{digest}"
+        return name
+
+# ---------- plan ----------
+def planned_indexes(table: str, columns: Iterable[str]) -> List[IndexSpec]:
+    """Indexes `table` should carry, restricted to the columns it actually has."""
+    cols = set(columns)
+    wanted = [(c, "date") for c in schema_registry.DATE_COLUMNS.get(table, {})]
+    for lt, lc, rt, rc in schema_registry.relationship_edges():
+        if lt == table:
+            wanted.append((lc, "key"))
+        if rt == table:
+            wanted.append((rc, "key"))
+    search = schema_registry.search_text_column(table)
+    if search:
+        wanted.append((search, "search"))
+    # ILIKE fallback predicates and the pg_trgm entity matcher (ENTITY_MATCHER=trgm)
+    wanted += [(c, "trgm") for c in schema_registry.search_columns(table) + schema_registry.entity_columns(table)]
+
+    specs, names = [], set()
+    for col, kind in wanted:
+        spec = IndexSpec(table, col, kind)
+        if col in cols and spec.name not in names:
+            names.add(spec.name)
+            specs.append(spec)
+    return specs
+
+def _use_brin(conn: Connection, table: str, column: str, schema: Optional[str]) -> bool:
+    row = conn.execute(text("""
+        SELECT c.reltuples, s.correlation
+        FROM pg_class c
+        LEFT JOIN pg_stats s
+          ON s.schemaname = COALESCE(:s, current_schema()) AND s.tablename = :t AND s.attname = :c
+        WHERE c.oid = to_regclass(:qt)
+    """), {"s": schema, "t": table, "c": column, "qt": qualified(table, schema)}).fetchone()
+    if not row or row[1] is None:
+        return False
+    return row[0] >= BRIN_MIN_ROWS and abs(row[1]) >= BRIN_MIN_CORRELATION
+
+def _ddl(conn: Connection, spec: IndexSpec, schema: Optional[str] = None) -> str:
+    head = f"CREATE INDEX IF NOT EXISTS {quote(spec.name)} ON {qualified(spec.table, schema)}"
+    col = quote(spec.column)
+    if spec.kind == "trgm":
+        return f"{head} USING gin (LOWER({col}) gin_trgm_ops)"
+    if spec.kind == "search":
+        return f"{head} USING gin ({col} gin_trgm_ops)"
+    if spec.kind == "date" and _use_brin(conn, spec.table, spec.column, schema):
+        return f"{head} USING brin ({col})"
+    return f"{head} ({col})"
+
+# ---------- build / drop ----------
+def _ensure_trgm(engine: Engine) -> bool:
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        return True
+    except Exception as e:
+        print(f"❌ pg_trgm unavailable, skipping trigram indexes: {str(e).splitlines()[0]}")
+        return False
+
+def _existing_index_names(engine: Engine, schema: Optional[str]) -> set:
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = COALESCE(:s, current_schema())"
+        ), {"s": schema}).fetchall()
+    return {r[0] for r in rows}
+
+def _target_tables(engine: Engine, tables: Optional[Iterable[str]], schema: Optional[str]) -> List[str]:
+    present = set(inspect(engine).get_table_names(schema=schema))
+    names = sorted(present) if tables is None else list(tables)
+    return [t for t in names if t in present and not t.startswith("_")]
+
+def ensure_indexes(engine: Engine, tables: Optional[Iterable[str]] = None,
+                   schema: Optional[str] = None) -> List[str]:
+    """
+    Create any missing planned index on `tables` (default: every data table) in `schema`
+    (default: the live one) and ANALYZE the tables that got one. Returns the names created.
+    Postgres only: DuckDB prunes range scans with its own zonemaps and has no trigram index.
+    """
+    if engine.dialect.name != "postgresql":
+        return []
+    tables = _target_tables(engine, tables, schema)
+    existing = _existing_index_names(engine, schema)
+    insp = inspect(engine)
+    trgm = None
+    created: List[str] = []
+    for table in tables:
+        cols = [c["name"] for c in insp.get_columns(table, schema=schema)]
+        todo = [s for s in planned_indexes(table, cols) if s.name not in existing]
+        if any(s.kind in ("trgm", "search") for s in todo):
+            trgm = _ensure_trgm(engine) if trgm is None else trgm
+            if not trgm:
+                todo = [s for s in todo if s.kind not in ("trgm", "search")]
+        if not todo:
+            continue
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"ANALYZE {qualified(table, schema)}"))  # fresh stats for the BRIN choice
+                for spec in todo:
+                    conn.execute(text(_ddl(conn, spec, schema)))
+                conn.execute(text(f"ANALYZE {qualified(table, schema)}"))  # expression stats for LOWER(col)
+            created += [s.name for s in todo]
+        except Exception as e:
+            print(f"❌ Index build failed for {table}: {str(e).splitlines()[0]}")
+    return created
+
+def drop_indexes(engine: Engine, tables: Optional[Iterable[str]] = None) -> List[str]:
+    """Drop the planned indexes (benchmarks use this for the 'before' numbers)."""
+    if engine.dialect.name != "postgresql":
+        return []
+    insp = inspect(engine)
+    dropped: List[str] = []
+    with engine.begin() as conn:
+        for table in _target_tables(engine, tables, None):
+            cols = [c["name"] for c in insp.get_columns(table)]
+            for spec in planned_indexes(table, cols):
+                conn.execute(text(f"DROP INDEX IF EXISTS {quote(spec.name)}"))
+                dropped.append(spec.name)
+    return dropped
@@ -0,0 +1,205 @@
+# ingest/loader.py
+from __future__ import annotations
+import glob, time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+import answer_cache, entity_aliases, entity_index, result_cache, schema_catalog, schema_registry
+from ingest import manifest, parallel, staging, version
+from ingest.frames import read_typed_frame, write_frame
+from ingest.indexes import ensure_indexes
+from ingest.report import IngestReport, TableResult, LOADED, FAILED, SKIPPED, rss_bytes
+from ingest.rollups import build_rollups, missing_rollups
+from ingest.streaming import stream_csv
+
+LOADER_MODES = ("to_sql", "copy")
+
+# ---------- one table ----------
+def _check_one(engine: Engine, csv_file: str, table_name: str, entry: Optional[Dict],
+               table_present: bool, force: bool) -> Tuple[TableResult, Optional[Dict]]:
+    """
+    Decide whether `csv_file` needs loading. Returns the result plus, when it does, the
+    manifest fields to record once the staged table is swapped in.
+    """
+    res = TableResult(table=table_name, source=Path(csv_file).name)
+    t0 = time.perf_counter()
+    stat = manifest.file_stat(csv_file)
+    fingerprint = manifest.schema_fingerprint(table_name, csv_file)
+    res.timings["stat"] = time.perf_counter() - t0
+
+    if not force and table_present and manifest.is_unchanged(entry, stat, fingerprint):
+        res.detail = "unchanged: stat match"
+        return res, None
+
+    t0 = time.perf_counter()
+    digest = manifest.content_hash(csv_file)
+    res.timings["hash"] = time.perf_counter() - t0
+
+    if not force and table_present and manifest.is_unchanged(entry, stat, fingerprint, digest):
+        manifest.touch_entry(engine, table_name, stat)
+        res.detail = "unchanged: hash match"
+        return res, None
+    return res, {"stat": stat, "digest": digest, "fingerprint": fingerprint}
+
+def _load_one(engine: Engine, csv_file: str, res: TableResult, mode: str, chunk_rows: int,
+              digest: Optional[str] = None) -> None:
+    """Load `csv_file` into the staging schema; sets res to LOADED or FAILED. `digest`: from _check_one."""
+    table_name = res.table
+    column_types = schema_registry.TABLE_COLUMN_TYPES.get(table_name, {})
+    try:
+        if chunk_rows:
+            res.peak_rss_bytes = max(res.peak_rss_bytes, rss_bytes())
+            def _sample(_rows: int) -> None:
+                res.peak_rss_bytes = max(res.peak_rss_bytes, rss_bytes())
+
+            t0 = time.perf_counter()
+            with engine.begin() as conn:
+                rows = stream_csv(conn, csv_file, table_name, column_types, mode, chunk_rows,
+                                  on_chunk=_sample, schema=staging.STAGING_SCHEMA, digest=digest)
+            res.timings["stream"] = time.perf_counter() - t0
+        else:
+            t0 = time.perf_counter()
+            df = read_typed_frame(csv_file, table_name, digest)
+            res.timings["read"] = time.perf_counter() - t0
+            res.peak_rss_bytes = max(res.peak_rss_bytes, rss_bytes())
+
+            t0 = time.perf_counter()
+            with engine.begin() as conn:
+                write_frame(conn, df, table_name, column_types, mode, schema=staging.STAGING_SCHEMA)
+            res.timings["write"] = time.perf_counter() - t0
+            rows = len(df)
+            res.peak_rss_bytes = max(res.peak_rss_bytes, rss_bytes())
+        res.status, res.rows = LOADED, rows
+    except Exception as e:
+        _fail(res, str(e).splitlines()[0])
+
+def _fail(res: TableResult, detail: str) -> None:
+    res.status, res.detail = FAILED, detail[:200]
+
+# ---------- folder ----------
+def ingest_folder(
+    engine: Engine,
+    csv_folder: Path,
+    *,
+    force: bool = False,
+    mode: str = "to_sql",
+    chunk_rows: int = 0,
+    build_indexes: bool = True,
+    rollups: bool = True,
+    workers: int = 1,
+) -> IngestReport:
+    """
+    Load every CSV in `csv_folder` into a table named after the file stem (lower-cased),
+    typed by the schema registry.
+    Tables whose source file and typing rules match the manifest are skipped, so an
+    unchanged folder costs one stat + header read per file.
+    Changed tables are loaded into the staging schema, rolled up, indexed and validated
+    there, then swapped in together with their manifest rows in one transaction that bumps
+    the data version (ingest.staging, ingest.version).
+    mode: 'to_sql' (batched INSERTs) or 'copy' (COPY on Postgres, frame scan on DuckDB).
+    chunk_rows: when > 0, read/type/write each file in chunks of this many rows so peak
+    memory stays flat regardless of file size.
+    build_indexes: create the date/key/trigram indexes on staged tables, and any that are
+    missing on live ones (Postgres only; see ingest.indexes).
+    rollups: rebuild the daily/monthly fact rollups of every fact that was loaded (or has
+    none yet); see ingest.rollups.
+    workers: when > 1, parse changed CSVs in a process pool and write them over that many
+    pooled connections, masters before facts (see ingest.parallel).
+    """
+    if mode not in LOADER_MODES:
+        raise ValueError(f"Unknown ingest mode {mode!r}; expected one of {LOADER_MODES}")
+    report = IngestReport()
+    started = time.perf_counter()
+    manifest.ensure_manifest(engine)
+    version.ensure_version_table(engine)
+    entries = manifest.read_manifest(engine)
+    present = set(inspect(engine).get_table_names())
+
+    staging.reset_staging(engine)
+    try:
+        pending: Dict[str, Tuple[TableResult, Dict]] = {}
+        sources: Dict[str, str] = {}
+        for csv_file in sorted(glob.glob(str(Path(csv_folder) / "*.csv"))):
+            table_name = Path(csv_file).stem.lower()
+            res, fields = _check_one(
+                engine, csv_file, table_name, entries.get(table_name), table_name in present, force,
+            )
+            report.results.append(res)
+            if fields:
+                pending[table_name] = (res, fields)
+                sources[table_name] = csv_file
+
+        def _load(table: str) -> None:
+            res, fields = pending[table]
+            _load_one(engine, sources[table], res, mode, chunk_rows, fields["digest"])
+
+        if workers > 1 and pending:
+            for table, (secs, peak) in parallel.prepare_caches(
+                    sources, workers, chunk_rows, {t: f["digest"] for t, (_, f) in pending.items()}).items():
+                res = pending[table][0]
+                res.timings["parse"], res.peak_rss_bytes = secs, peak
+            # DuckDB allows one writer per database file
+            writers = workers if engine.dialect.name == "postgresql" else 1
+            parallel.run_waves(parallel.load_waves(list(pending)), _load, writers)
+        else:
+            for table in pending:
+                _load(table)
+        for table in [t for t, (res, _) in pending.items() if res.status == FAILED]:
+            del pending[table]
+
+        for table, (res, _) in list(pending.items()):
+            why = staging.validate(engine, table, res.rows)
+            if why:
+                _fail(res, f"validation: {why}")
+                del pending[table]
+
+        if rollups:
+            t0 = time.perf_counter()
+            facts = {f: None for f in missing_rollups(present)}
+            facts.update({t: staging.STAGING_SCHEMA for t in pending})
+            report.rollups = build_rollups(engine, facts, staging.STAGING_SCHEMA)
+            report.rollup_seconds = time.perf_counter() - t0
+        if build_indexes:
+            t0 = time.perf_counter()
+            report.indexes = ensure_indexes(engine, list(pending), schema=staging.STAGING_SCHEMA)
+            report.index_seconds = time.perf_counter() - t0
+
+        swap = list(pending) + report.rollups
+        if swap:
+            bumped = []
+            def _record(conn) -> None:
+                for table, (res, f) in pending.items():
+                    manifest.write_entry(conn, table, res.source, f["stat"], f["digest"],
+                                         f["fingerprint"], res.rows)
+                bumped.append(version.bump(conn, swap))
+
+            t0 = time.perf_counter()
+            try:
+                staging.swap_in(engine, swap, _record)
+                # only now is the version committed
+                report.swapped, report.data_version = swap, bumped[-1]
+            except Exception as e:
+                for res, _ in pending.values():
+                    _fail(res, f"swap: {str(e).splitlines()[0]}")
+                report.rollups = []
+            report.swap_seconds = time.perf_counter() - t0
+    finally:
+        staging.drop_staging(engine)
+
+    if build_indexes:
+        # Unchanged live tables can still lack indexes (first run, or a plan change)
+        t0 = time.perf_counter()
+        report.indexes += ensure_indexes(engine, [r.table for r in report.by_status(SKIPPED)])
+        report.index_seconds += time.perf_counter() - t0
+    if report.swapped:
+        schema_catalog.on_new_version(engine, report.data_version)
+        entity_index.refresh(engine, report.swapped)
+        entity_aliases.on_new_version(engine, report.data_version)
+        result_cache.on_new_version(engine, report.data_version)
+        answer_cache.on_new_version(engine, report.data_version)
+    else:
+        report.data_version = version.current_version(engine)  # unchanged, or the swap rolled back
+    report.total_seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,84 @@
+# ingest/manifest.py
+from __future__ import annotations
+import hashlib, json, os
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+import schema_registry
+
+MANIFEST_TABLE = "_ingest_manifest"
+_HASH_CHUNK = 1 << 20
+
+# ---------- source fingerprints ----------
+def file_stat(path: str) -> Dict[str, int]:
+    st = os.stat(path)
+    return {"size_bytes": int(st.st_size), "mtime_ns": int(st.st_mtime_ns)}
+
+def content_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def schema_fingerprint(table: str, csv_file: str) -> str:
+    """Changes whenever the CSV header or the registry rules applied to it change."""
+    payload = {
+        "columns": schema_registry.csv_header(csv_file),
+        "spec": schema_registry.spec_fingerprint(table),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+# ---------- manifest table ----------
+def ensure_manifest(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+                table_name         VARCHAR(255) PRIMARY KEY,
+                source_file        TEXT NOT NULL,
+                size_bytes         BIGINT NOT NULL,
+                mtime_ns           BIGINT NOT NULL,
+                content_hash       VARCHAR(64) NOT NULL,
+                schema_fingerprint VARCHAR(64) NOT NULL,
+                row_count          BIGINT NOT NULL,
+                loaded_at          VARCHAR(32) NOT NULL
+            )
+        """))
+
+def read_manifest(engine: Engine) -> Dict[str, Dict]:
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT * FROM {MANIFEST_TABLE}")).mappings().fetchall()
+    return {r["table_name"]: dict(r) for r in rows}
+
+def write_entry(conn: Connection, table: str, source_file: str, stat: Dict[str, int],
+                digest: str, fingerprint: str, row_count: int) -> None:
+    """Upsert one manifest row; runs on the caller's connection so it commits with the load."""
+    conn.execute(text(f"DELETE FROM {MANIFEST_TABLE} WHERE table_name = :t"), {"t": table})
+    conn.execute(text(f"""
+        INSERT INTO {MANIFEST_TABLE}
+            (table_name, source_file, size_bytes, mtime_ns, content_hash, schema_fingerprint, row_count, loaded_at)
+        VALUES (:t, :f, :s, :m, :h, :fp, :n, :at)
+    """), {
+        "t": table, "f": source_file, "s": stat["size_bytes"], "m": stat["mtime_ns"],
+        "h": digest, "fp": fingerprint, "n": int(row_count),
+        "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    })
+
+def touch_entry(engine: Engine, table: str, stat: Dict[str, int]) -> None:
+    """Record a new mtime for a file whose bytes did not change (e.g. after a fresh checkout)."""
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            UPDATE {MANIFEST_TABLE} SET size_bytes = :s, mtime_ns = :m WHERE table_name = :t
+        """), {"s": stat["size_bytes"], "m": stat["mtime_ns"], "t": table})
+
+def is_unchanged(entry: Optional[Dict], stat: Dict[str, int], fingerprint: str,
+                 digest: Optional[str] = None) -> bool:
+    """Without a digest only the stat fast path is checked; with one, the content hash decides."""
+    if not entry or entry.get("schema_fingerprint") != fingerprint:
+        return False
+    if digest is None:
+        return (int(entry.get("size_bytes", -1)) == stat["size_bytes"]
+                and int(entry.get("mtime_ns", -1)) == stat["mtime_ns"])
+    return entry.get("content_hash") == digest
@@ -0,0 +1,68 @@
+# ingest/parallel.py
+"""
+Parallel cold loads. Parsing and typing a CSV is the CPU-bound part of a load, so it runs in a
+process pool, and each worker leaves its result in the Parquet cache beside the file. The
+writes then read those caches over separate pooled connections: master tables in the first
+wave, facts in the second. The staging swap publishes them together either way.
+"""
+from __future__ import annotations
+import multiprocessing, os, time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ingest import parquet_cache
+from ingest.report import rss_bytes
+from schema_registry import FACT_TABLES
+
+_FACTS = {t for tables in FACT_TABLES.values() for t in tables}
+
+def _prepare(csv_file: str, table: str, chunk_rows: int, digest: Optional[str]) -> Tuple[float, int]:
+    """Worker: refresh the Parquet cache of one CSV; returns (seconds, worker peak RSS)."""
+    t0 = time.perf_counter()
+    peak = rss_bytes()
+    if chunk_rows:
+        for _ in parquet_cache.iter_chunks(csv_file, table, chunk_rows, digest):  # bounded memory
+            peak = max(peak, rss_bytes())
+    else:
+        parquet_cache.build(csv_file, table, digest=digest)
+        peak = max(peak, rss_bytes())
+    return time.perf_counter() - t0, peak
+
+def prepare_caches(sources: Dict[str, str], workers: int, chunk_rows: int = 0,
+                   digests: Optional[Dict[str, str]] = None) -> Dict[str, Tuple[float, int]]:
+    """
+    Parse every stale CSV in `sources` (table -> csv path) across up to `workers` processes
+    (capped at the CPU count). `digests` (table -> content hash) are the hashes the loader
+    already took, so neither the freshness check nor the workers read the files again for them.
+    Returns table -> (parse seconds, peak RSS) for the ones parsed. A table whose worker
+    fails is simply parsed again by the writer.
+    """
+    if parquet_cache.pq is None:
+        return {}  # nothing to hand over between processes without the cache
+    digests = digests or {}
+    stale = {t: csv for t, csv in sources.items() if not parquet_cache.is_fresh(csv, t, digests.get(t))}
+    procs = min(workers, len(stale), os.cpu_count() or 1)
+    if procs < 2:
+        return {}  # one process would only add a Parquet round trip to the writer's own parse
+    out: Dict[str, Tuple[float, int]] = {}
+    # spawn, not fork: ingest may run on the service's background init thread
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=procs, mp_context=ctx) as pool:
+        futures = {t: pool.submit(_prepare, csv, t, chunk_rows, digests.get(t)) for t, csv in stale.items()}
+        for table, fut in futures.items():
+            try:
+                out[table] = fut.result()
+            except Exception as e:
+                print(f"❌ Parallel parse failed for {table}: {e}")
+    return out
+
+def load_waves(tables: List[str]) -> List[List[str]]:
+    """Masters (everything that is not a fact) first, then the facts that reference them."""
+    masters = [t for t in tables if t not in _FACTS]
+    facts = [t for t in tables if t in _FACTS]
+    return [w for w in (masters, facts) if w]
+
+def run_waves(waves: List[List[str]], load: Callable[[str], None], workers: int) -> None:
+    for wave in waves:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(wave)))) as pool:
+            list(pool.map(load, wave))
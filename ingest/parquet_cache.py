@@ -0,0 +1,150 @@
+# ingest/parquet_cache.py
+"""
+Typed Parquet copies of the source CSVs, written beside each file (`tbl_Primary.csv` ->
+`tbl_Primary.parquet`). Each Parquet file records the size/mtime/sha256 of the CSV it was
+built from plus the schema-registry spec, and is rebuilt as soon as either changes.
+
+    python -m ingest.parquet_cache cooked_data_gk all_tables output_csv
+"""
+from __future__ import annotations
+import glob, json, os, sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import pandas as pd
+
+import schema_registry
+from ingest.manifest import content_hash, file_stat
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:  # optional dependency: fall back to parsing the CSV
+    pa = pq = None
+
+_META_KEY = b"csv_cache"
+
+def cache_path(csv_path: str) -> Path:
+    return Path(csv_path).with_suffix(".parquet")
+
+# ---------- freshness ----------
+def _source_meta(csv_path: str, table: str, digest: Optional[str] = None) -> Dict:
+    meta = dict(file_stat(csv_path))
+    meta["sha256"] = digest or content_hash(csv_path)
+    meta["spec"] = schema_registry.spec_fingerprint(table)
+    return meta
+
+def _stored_meta(pq_path: Path) -> Optional[Dict]:
+    try:
+        raw = (pq.read_schema(pq_path).metadata or {}).get(_META_KEY)
+        return json.loads(raw) if raw else None
+    except Exception:
+        return None
+
+def is_fresh(csv_path: str, table: Optional[str] = None, digest: Optional[str] = None) -> bool:
+    """`digest`: the CSV's content hash when the caller already has it (the loader does)."""
+    if pq is None:
+        return False
+    table = table or schema_registry.table_name_for(csv_path)
+    stored = _stored_meta(cache_path(csv_path))
+    if not stored or stored.get("spec") != schema_registry.spec_fingerprint(table):
+        return False
+    stat = file_stat(csv_path)
+    if stored.get("size_bytes") == stat["size_bytes"] and stored.get("mtime_ns") == stat["mtime_ns"]:
+        return True
+    return stored.get("sha256") == (digest or content_hash(csv_path))
+
+# ---------- build ----------
+def _with_meta(tbl: "pa.Table", meta: Dict) -> "pa.Table":
+    merged = dict(tbl.schema.metadata or {})
+    merged[_META_KEY] = json.dumps(meta).encode("utf-8")
+    return tbl.replace_schema_metadata(merged)
+
+def build(csv_path: str, table: Optional[str] = None, df: Optional[pd.DataFrame] = None,
+          digest: Optional[str] = None) -> Optional[Path]:
+    """Write the typed Parquet copy of `csv_path`; returns None if pyarrow is missing or the dir is read-only."""
+    if pq is None:
+        return None
+    table = table or schema_registry.table_name_for(csv_path)
+    meta = _source_meta(csv_path, table, digest)
+    if df is None:
+        df = schema_registry.read_csv(csv_path, table)
+    target = cache_path(csv_path)
+    tmp = target.with_suffix(".parquet.tmp")
+    try:
+        pq.write_table(_with_meta(pa.Table.from_pandas(df, preserve_index=False), meta), tmp)
+        os.replace(tmp, target)
+    except Exception as e:
+        print(f"❌ Parquet cache not written for {csv_path}: {e}")
+        tmp.unlink(missing_ok=True)
+        return None
+    return target
+
+# ---------- read ----------
+def read_table(csv_path: str, table: Optional[str] = None, digest: Optional[str] = None) -> pd.DataFrame:
+    """Typed frame for `csv_path`, served from the memory-mapped Parquet copy when it is fresh."""
+    table = table or schema_registry.table_name_for(csv_path)
+    if pq is None:
+        return schema_registry.read_csv(csv_path, table)
+    if is_fresh(csv_path, table, digest):
+        try:
+            return pq.read_table(cache_path(csv_path), memory_map=True).to_pandas()
+        except Exception:
+            pass  # unreadable cache: rebuild below
+    df = schema_registry.read_csv(csv_path, table)
+    build(csv_path, table, df, digest)
+    return df
+
+def iter_chunks(csv_path: str, table: Optional[str] = None, chunk_rows: int = 50_000,
+                digest: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Bounded-memory variant of read_table. A stale cache is rebuilt incrementally while the CSV
+    chunks stream through, so neither path ever holds the whole table.
+    """
+    table = table or schema_registry.table_name_for(csv_path)
+    if pq is None:
+        yield from schema_registry.read_csv(csv_path, table, chunksize=chunk_rows)
+        return
+    if is_fresh(csv_path, table, digest):
+        pf = pq.ParquetFile(cache_path(csv_path), memory_map=True)
+        for batch in pf.iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+
+    meta = _source_meta(csv_path, table, digest)
+    target = cache_path(csv_path)
+    tmp = target.with_suffix(".parquet.tmp")
+    writer, schema, failed = None, None, False
+    try:
+        for chunk in schema_registry.read_csv(csv_path, table, chunksize=chunk_rows):
+            if not failed:
+                try:
+                    if writer is None:
+                        schema = _with_meta(pa.Table.from_pandas(chunk, preserve_index=False), meta).schema
+                        writer = pq.ParquetWriter(tmp, schema)
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                except Exception as e:
+                    print(f"❌ Parquet cache not written for {csv_path}: {e}")
+                    failed = True
+            yield chunk
+        if writer is not None and not failed:
+            writer.close()
+            writer = None
+            os.replace(tmp, target)
+    finally:
+        if writer is not None:  # failed or abandoned mid-stream
+            writer.close()
+        tmp.unlink(missing_ok=True)
+
+# ---------- CLI ----------
+def build_folder(folder: str) -> List[str]:
+    """Refresh stale caches in `folder`; returns the CSVs that were (re)converted."""
+    built = []
+    for csv_path in sorted(glob.glob(str(Path(folder) / "*.csv"))):
+        if not is_fresh(csv_path) and build(csv_path):
+            built.append(csv_path)
+    return built
+
+if __name__ == "__main__":
+    for folder in sys.argv[1:] or ["cooked_data_gk", "all_tables", "output_csv"]:
+        done = build_folder(folder)
+        print(f"✅ {folder}: {len(done)} Parquet file(s) rebuilt")
@@ -0,0 +1,77 @@
+# ingest/report.py
+from __future__ import annotations
+import os, resource
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+LOADED, SKIPPED, FAILED = "loaded", "skipped", "failed"
+
+_ICONS = {LOADED: "✅", SKIPPED: "⏭️", FAILED: "❌"}
+
+def rss_bytes() -> int:
+    """Current resident set size; falls back to the process high-water mark off Linux."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+@dataclass
+class TableResult:
+    table: str
+    source: str
+    status: str = SKIPPED
+    rows: int = 0
+    detail: str = ""
+    timings: Dict[str, float] = field(default_factory=dict)  # step -> seconds
+    peak_rss_bytes: int = 0
+
+    @property
+    def seconds(self) -> float:
+        return sum(self.timings.values())
+
+    @property
+    def rows_per_sec(self) -> float:
+        busy = sum(v for k, v in self.timings.items() if k not in ("stat", "hash"))
+        return self.rows / busy if busy > 0 else 0.0
+
+@dataclass
+class IngestReport:
+    results: List[TableResult] = field(default_factory=list)
+    total_seconds: float = 0.0
+    indexes: List[str] = field(default_factory=list)  # created after the load
+    index_seconds: float = 0.0
+    rollups: List[str] = field(default_factory=list)  # rebuilt after the load
+    rollup_seconds: float = 0.0
+    swapped: List[str] = field(default_factory=list)  # staged tables swapped in
+    swap_seconds: float = 0.0
+    data_version: int = 0
+
+    def by_status(self, status: str) -> List[TableResult]:
+        return [r for r in self.results if r.status == status]
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.by_status(LOADED))
+
+    def summary(self) -> str:
+        lines = []
+        for r in self.results:
+            steps = " ".join(f"{k}={v * 1000:.0f}ms" for k, v in r.timings.items())
+            rows = ""
+            if r.status == LOADED:
+                rows = f" rows={r.rows} {r.rows_per_sec:,.0f} rows/s peak_rss={r.peak_rss_bytes / 2**20:.0f}MB"
+            why = f" ({r.detail})" if r.detail else ""
+            lines.append(f"{_ICONS.get(r.status, '•')} {r.status:<7} {r.table}{rows} [{steps}]{why}")
+        if self.indexes:
+            lines.append(f"🗂️ indexes: {len(self.indexes)} created in {self.index_seconds:.2f}s")
+        if self.rollups:
+            lines.append(f"📊 rollups: {len(self.rollups)} rebuilt in {self.rollup_seconds:.2f}s")
+        if self.swapped:
+            lines.append(f"🔁 swapped {len(self.swapped)} table(s) in {self.swap_seconds:.2f}s "
+                         f"-> data version {self.data_version}")
+        lines.append(
+            f"Ingest: {len(self.by_status(LOADED))} loaded, {len(self.by_status(SKIPPED))} skipped, "
+            f"{len(self.by_status(FAILED))} failed in {self.total_seconds:.2f}s"
+        )
+        return "\n".join(lines)
@@ -0,0 +1,76 @@
+# ingest/rollups.py
+"""
+Daily and monthly rollups of the fact tables over (date bucket, product, distributor,
+superstockist), built in-database in the staging schema during ingest and swapped in together
+with the facts they summarize (ingest/staging.py). Each rollup keeps the fact's column names
+(the date column holds the bucket, each measure holds its SUM), so a generated
+`SUM(p.<measure>) ... FROM "<fact>" p` query runs unchanged against it.
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.types import Numeric
+
+import schema_registry
+from ingest.identifiers import qualified, quote
+from schema_registry import ROLLUP_DIMENSIONS, ROLLUP_GRAINS, rollup_table
+
+def _table_columns(conn: Connection, table: str, schema: Optional[str]) -> List[str]:
+    rows = conn.execute(text("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = :t AND table_schema = COALESCE(:s, current_schema())
+        ORDER BY ordinal_position
+    """), {"t": table, "s": schema}).fetchall()
+    return [r[0] for r in rows]
+
+def rollup_select(fact: str, grain: str, columns: Iterable[str], schema: Optional[str] = None) -> str:
+    """SELECT that aggregates `fact` to `grain`, restricted to the columns it actually has."""
+    cols = set(columns)
+    date_col = schema_registry.fact_date_column(fact)
+    if not date_col or date_col not in cols:
+        raise ValueError(f"{fact} has no date column to bucket on")
+    types = schema_registry.TABLE_COLUMN_TYPES.get(fact, {})
+    dims = [c for c in ROLLUP_DIMENSIONS.get(fact, []) if c in cols]
+    measures = [c for c, t in types.items() if c in cols and c not in dims
+                and issubclass(t if isinstance(t, type) else type(t), Numeric)]
+
+    bucket = quote(date_col) if grain == "daily" else f"CAST(DATE_TRUNC('month', {quote(date_col)}) AS DATE)"
+    select = [f"{bucket} AS {quote(date_col)}"] + [quote(d) for d in dims]
+    select += [f"SUM({quote(m)}) AS {quote(m)}" for m in measures] + ["COUNT(*) AS row_count"]
+    group = ", ".join(str(i) for i in range(1, len(dims) + 2))
+    return f"SELECT {', '.join(select)} FROM {qualified(fact, schema)} GROUP BY {group}"
+
+def build_rollups(engine: Engine, sources: Dict[str, Optional[str]], schema: Optional[str]) -> List[str]:
+    """
+    Build every grain of each fact in `sources` (fact -> schema to read it from) into
+    `schema`. Returns the rollup tables written.
+    """
+    built: List[str] = []
+    for fact, src_schema in sources.items():
+        if fact not in ROLLUP_DIMENSIONS:
+            continue
+        for grain in ROLLUP_GRAINS:
+            name = rollup_table(fact, grain)
+            target = qualified(name, schema)
+            try:
+                with engine.begin() as conn:
+                    cols = _table_columns(conn, fact, src_schema)
+                    if not cols:
+                        break
+                    conn.execute(text(f"DROP TABLE IF EXISTS {target}"))
+                    conn.execute(text(f"CREATE TABLE {target} AS {rollup_select(fact, grain, cols, src_schema)}"))
+                    if conn.dialect.name == "postgresql":
+                        date_col = schema_registry.fact_date_column(fact)
+                        conn.execute(text(f"CREATE INDEX ON {target} ({quote(date_col)})"))
+                        conn.execute(text(f"ANALYZE {target}"))
+                built.append(name)
+            except Exception as e:
+                print(f"❌ Rollup build failed for {name}: {str(e).splitlines()[0]}")
+    return built
+
+def missing_rollups(present: Iterable[str]) -> List[str]:
+    """Facts that are loaded but lack at least one rollup grain."""
+    present = set(present)
+    return [f for f in ROLLUP_DIMENSIONS
+            if f in present and any(rollup_table(f, g) not in present for g in ROLLUP_GRAINS)]
@@ -0,0 +1,146 @@
+# ingest/sqlite_snapshot.py
+"""
+Read-only SQLite snapshot of combined_output.xlsx for the SQL-agent Streamlit app (app.py).
+Every sheet becomes a typed table with indexes on its key/date/filter columns and ANALYZE
+statistics, so the container opens one indexed file instead of parsing the workbook.
+The snapshot records the workbook's size/mtime/sha256 and is rebuilt only when it changes.
+
+    python -m ingest.sqlite_snapshot                     # combined_output.xlsx -> .db
+    python -m ingest.sqlite_snapshot --xlsx book.xlsx --db book.db --force
+"""
+from __future__ import annotations
+import argparse, os, re, sqlite3, time
+from pathlib import Path
+from typing import Dict, List, Optional
+import pandas as pd
+
+from ingest.identifiers import quote
+from ingest.manifest import content_hash, file_stat
+
+DEFAULT_XLSX = "combined_output.xlsx"
+META_TABLE = "_snapshot_meta"
+# Text columns with few distinct values are filters (status, state, brand ...) worth an
+# index, but only once a table is big enough for a scan to hurt
+FILTER_MIN_ROWS = 1000
+FILTER_MAX_DISTINCT_RATIO = 0.05
+
+_KEY_RE = re.compile(r"(^id$|_id$|_code$|code$|_number$)", re.IGNORECASE)
+_DATE_RE = re.compile(r"(date|_at$|created|modified|updated)", re.IGNORECASE)
+
+def snapshot_path(xlsx: str) -> Path:
+    return Path(xlsx).with_suffix(".db")
+
+# ---------- freshness ----------
+def _source_meta(xlsx: str, digest: Optional[str] = None) -> Dict[str, str]:
+    meta = {k: str(v) for k, v in file_stat(xlsx).items()}
+    meta["sha256"] = digest or content_hash(xlsx)
+    return meta
+
+def _stored_meta(db: Path) -> Dict[str, str]:
+    if not db.exists():
+        return {}
+    try:
+        with sqlite3.connect(f"file:{db}?mode=ro", uri=True) as conn:
+            return dict(conn.execute(f"SELECT key, value FROM {META_TABLE}").fetchall())
+    except sqlite3.Error:
+        return {}
+
+def is_fresh(xlsx: str, db: Optional[Path] = None) -> bool:
+    stored = _stored_meta(db or snapshot_path(xlsx))
+    if not stored:
+        return False
+    stat = {k: str(v) for k, v in file_stat(xlsx).items()}
+    if all(stored.get(k) == v for k, v in stat.items()):
+        return True
+    return stored.get("sha256") == content_hash(xlsx)
+
+# ---------- typing ----------
+def _table_name(sheet: str) -> str:
+    return re.sub(r"\W+", "_", sheet.strip()).strip("_") or "sheet"
+
+def _type_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop empty 'Unnamed' columns, make all-numeric text numeric, store datetimes as ISO text."""
+    df = df.loc[:, [c for c in df.columns
+                    if not (str(c).startswith("Unnamed:") and df[c].isna().all())]].copy()
+    df.columns = [str(c).strip() for c in df.columns]
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            df[col] = s.dt.strftime("%Y-%m-%d %H:%M:%S").str.replace(" 00:00:00", "", regex=False)
+            continue
+        if not pd.api.types.is_numeric_dtype(s):
+            num = pd.to_numeric(s, errors="coerce")
+            if num.notna().sum() == 0 or num.notna().sum() != s.notna().sum():
+                continue  # text (or mixed) stays text
+            s = num
+        if pd.api.types.is_float_dtype(s) and s.dropna().mod(1).eq(0).all():
+            s = s.astype("Int64")
+        df[col] = s
+    return df
+
+def _index_columns(df: pd.DataFrame) -> List[str]:
+    cols = []
+    for col in df.columns:
+        name = col.replace(" ", "_")
+        if _KEY_RE.search(name) or _DATE_RE.search(name):
+            cols.append(col)
+        elif (len(df) >= FILTER_MIN_ROWS and not pd.api.types.is_numeric_dtype(df[col])
+              and 1 < df[col].nunique() <= FILTER_MAX_DISTINCT_RATIO * len(df)):
+            cols.append(col)
+    return cols
+
+# ---------- build ----------
+def build(xlsx: str = DEFAULT_XLSX, db: Optional[Path] = None) -> Path:
+    """Write the snapshot to a temp file and swap it in, so open readers keep the old one."""
+    db = Path(db or snapshot_path(xlsx))
+    meta = _source_meta(xlsx)
+    sheets = pd.read_excel(xlsx, sheet_name=None)
+    tmp = db.with_suffix(".db.tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    try:
+        used: Dict[str, int] = {}
+        for sheet, raw in sheets.items():
+            table = _table_name(sheet)
+            used[table] = used.get(table, 0) + 1
+            if used[table] > 1:
+                table = f"{table}_{used[table]}"
+            df = _type_frame(raw)
+            if df.columns.empty:
+                continue
+            df.to_sql(table, conn, index=False, if_exists="replace")
+            for col in _index_columns(df):
+                ix = re.sub(r"\W+", "_", f"ix_{table}__{col}")
+                conn.execute(f"CREATE INDEX {quote(ix)} ON {quote(table)} ({quote(col)})")
+        conn.execute(f"CREATE TABLE {META_TABLE} (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.executemany(f"INSERT INTO {META_TABLE} VALUES (?, ?)", list(meta.items()))
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.commit()
+        conn.execute("VACUUM")
+    except Exception:
+        conn.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    conn.close()
+    os.replace(tmp, db)
+    return db
+
+def ensure_snapshot(xlsx: str = DEFAULT_XLSX, db: Optional[Path] = None, force: bool = False) -> Path:
+    """Path of an up-to-date snapshot, building it first if the workbook changed."""
+    db = Path(db or snapshot_path(xlsx))
+    if not force and is_fresh(xlsx, db):
+        print(f"⏭️ SQLite snapshot {db.name} is up to date")
+        return db
+    t0 = time.perf_counter()
+    build(xlsx, db)
+    print(f"✅ SQLite snapshot {db.name} rebuilt from {Path(xlsx).name} in {time.perf_counter() - t0:.1f}s")
+    return db
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--xlsx", default=DEFAULT_XLSX)
+    ap.add_argument("--db", default=None)
+    ap.add_argument("--force", action="store_true")
+    args = ap.parse_args()
+    ensure_snapshot(args.xlsx, Path(args.db) if args.db else None, force=args.force)
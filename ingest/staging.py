@@ -0,0 +1,79 @@
+# ingest/staging.py
+"""
+Refreshes are written to the STAGING_SCHEMA, indexed and validated there, then swapped into
+the served schema in one transaction, so a query running during ingest sees either the old
+tables or the new ones, never a half-loaded or missing table.
+
+  Postgres: ALTER TABLE .. SET SCHEMA (live table -> RETIRED_SCHEMA, staged table -> live);
+            indexes move with their table
+  DuckDB:   no SET SCHEMA, so the swap is CREATE OR REPLACE TABLE .. AS SELECT from staging
+            inside the transaction (MVCC readers keep their snapshot)
+"""
+from __future__ import annotations
+from typing import Callable, Iterable, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+import schema_registry
+from ingest.identifiers import qualified, quote
+
+STAGING_SCHEMA = "_staging"
+RETIRED_SCHEMA = "_retired"
+SWAP_LOCK_TIMEOUT = "10s"
+
+def reset_staging(engine: Engine) -> None:
+    """Start each refresh from an empty staging schema (drops leftovers of a failed run)."""
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {quote(STAGING_SCHEMA)} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {quote(STAGING_SCHEMA)}"))
+
+def drop_staging(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {quote(STAGING_SCHEMA)} CASCADE"))
+
+# ---------- validation ----------
+def validate(engine: Engine, table: str, expected_rows: int) -> Optional[str]:
+    """Why the staged `table` must not be swapped in, or None if it is fine."""
+    src = qualified(table, STAGING_SCHEMA)
+    date_col = schema_registry.fact_date_column(table)
+    with engine.connect() as conn:
+        n = int(conn.execute(text(f"SELECT COUNT(*) FROM {src}")).scalar() or 0)
+        if n != expected_rows:
+            return f"staged {n} rows, expected {expected_rows}"
+        if date_col and n:
+            dated = conn.execute(text(f"SELECT COUNT({quote(date_col)}) FROM {src}")).scalar()
+            if not dated:
+                return f"{date_col} is NULL on every row (date format changed?)"
+    return None
+
+# ---------- swap ----------
+def _swap_postgres(conn: Connection, tables: List[str]) -> None:
+    conn.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+    live_schema = conn.execute(text("SELECT current_schema()")).scalar()
+    conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {quote(RETIRED_SCHEMA)}"))
+    for t in tables:
+        conn.execute(text(f"DROP TABLE IF EXISTS {qualified(t, RETIRED_SCHEMA)}"))
+        if conn.execute(text("SELECT to_regclass(:qt)"), {"qt": quote(t)}).scalar() is not None:
+            conn.execute(text(f"ALTER TABLE {quote(t)} SET SCHEMA {quote(RETIRED_SCHEMA)}"))
+        conn.execute(text(f"ALTER TABLE {qualified(t, STAGING_SCHEMA)} SET SCHEMA {quote(live_schema)}"))
+    conn.execute(text(f"DROP SCHEMA {quote(RETIRED_SCHEMA)} CASCADE"))
+
+def _swap_duckdb(conn: Connection, tables: List[str]) -> None:
+    for t in tables:
+        conn.execute(text(f"CREATE OR REPLACE TABLE {quote(t)} AS SELECT * FROM {qualified(t, STAGING_SCHEMA)}"))
+
+def swap_in(engine: Engine, tables: Iterable[str],
+            in_transaction: Optional[Callable[[Connection], None]] = None) -> None:
+    """
+    Replace the live copies of `tables` with their staged ones in a single transaction.
+    `in_transaction` runs on the same connection before commit (manifest rows, version bump),
+    so bookkeeping can never disagree with the data being served.
+    """
+    tables = list(tables)
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            _swap_postgres(conn, tables)
+        else:
+            _swap_duckdb(conn, tables)
+        if in_transaction:
+            in_transaction(conn)
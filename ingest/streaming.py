@@ -0,0 +1,49 @@
+# ingest/streaming.py
+from __future__ import annotations
+from typing import Callable, Dict, Iterator, Optional
+import pandas as pd
+
+from ingest import parquet_cache
+from ingest.frames import write_frame
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+def iter_typed_chunks(csv_file: str, table_name: str, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                      digest: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """Yield `chunk_rows`-sized frames typed by the schema registry (dates included)."""
+    yield from parquet_cache.iter_chunks(csv_file, table_name, chunk_rows, digest)
+
+def _align(chunk: pd.DataFrame, first: pd.DataFrame) -> pd.DataFrame:
+    """
+    Later chunks are inferred independently by pandas; integer columns that pick up a NULL
+    turn float, which COPY rejects. Keep them integral so every chunk fits the table created
+    from the first one. Columns that need a fixed type belong in the schema registry.
+    """
+    for col in chunk.columns:
+        if col in first.columns and pd.api.types.is_integer_dtype(first[col]) \
+                and not pd.api.types.is_integer_dtype(chunk[col]):
+            chunk[col] = pd.to_numeric(chunk[col], errors="coerce").round().astype("Int64")
+    return chunk
+
+def stream_csv(conn, csv_file: str, table_name: str, column_types: Dict,
+               mode: str = "to_sql", chunk_rows: int = DEFAULT_CHUNK_ROWS,
+               on_chunk: Optional[Callable[[int], None]] = None, schema: Optional[str] = None,
+               digest: Optional[str] = None) -> int:
+    """
+    Read, type and write `csv_file` one chunk at a time on the caller's connection, so peak
+    memory is bounded by `chunk_rows` rather than the file size. The first chunk replaces
+    the table; the rest append. `digest`: the CSV's content hash, if the caller has it.
+    Returns the number of rows written.
+    """
+    rows, first = 0, None
+    for chunk in iter_typed_chunks(csv_file, table_name, chunk_rows, digest):
+        if first is None:
+            first = chunk.head(0)
+            write_frame(conn, chunk, table_name, column_types, mode, if_exists="replace", schema=schema)
+        else:
+            write_frame(conn, _align(chunk, first), table_name, column_types, mode, if_exists="append",
+                        schema=schema)
+        rows += len(chunk)
+        if on_chunk:
+            on_chunk(rows)
+    return rows
@@ -0,0 +1,41 @@
+# ingest/version.py
+"""
+Monotonically increasing data version. Every staging swap that changes served data bumps it in
+the same transaction, so anything cached against the data (entity dictionaries, result and
+answer caches) can key on `current_version()` and never outlive the rows it was built from.
+"""
+from __future__ import annotations
+from datetime import datetime, timezone
+from typing import Iterable
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+VERSION_TABLE = "_data_version"
+
+def ensure_version_table(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+                version    BIGINT PRIMARY KEY,
+                tables     TEXT NOT NULL,
+                swapped_at VARCHAR(32) NOT NULL
+            )
+        """))
+
+def current_version(engine: Engine) -> int:
+    """0 before the first swap (or when the table does not exist yet)."""
+    try:
+        with engine.connect() as conn:
+            v = conn.execute(text(f"SELECT MAX(version) FROM {VERSION_TABLE}")).scalar()
+    except Exception:
+        return 0
+    return int(v or 0)
+
+def bump(conn: Connection, tables: Iterable[str]) -> int:
+    """Record a new version on the caller's (swap) connection; returns it."""
+    nxt = int(conn.execute(text(f"SELECT COALESCE(MAX(version), 0) + 1 FROM {VERSION_TABLE}")).scalar())
+    conn.execute(text(f"INSERT INTO {VERSION_TABLE} (version, tables, swapped_at) VALUES (:v, :t, :at)"), {
+        "v": nxt, "t": ",".join(sorted(tables)),
+        "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    })
+    return nxt
@@ -0,0 +1,161 @@
+# join_graph.py
+"""
+Join graph over the live tables, built once per schema-catalog generation (at startup and
+again after each ingest) and shared by every request. Edges come from three sources, cheapest
+first:
+
+  1. relationships.json               (schema_registry.relationship_edges)
+  2. foreign keys declared in the DB  (schema_catalog.foreign_keys)
+  3. discovered keys                  conventional fact -> dimension key pairs, then *_id
+                                      columns shared by two tables
+
+An edge is kept only if both of its columns exist. The cheapest join path between every pair
+of tables is precomputed when the graph is built, so `path(fact, dim)` is a dict lookup.
+Paths never pass through a second fact table, because that would multiply the rows being
+summed.
+"""
+from __future__ import annotations
+import heapq, itertools, threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.engine import Engine
+
+import schema_catalog
+from schema_registry import FACT_TABLES, relationship_edges
+
+# Edge cost per source; a path's cost is the sum, so one declared hop beats two discovered ones
+COST_DECLARED = 1
+COST_FOREIGN_KEY = 1
+COST_KEY_PAIR = 2
+COST_SHARED_ID = 3
+
+# (fact column, dimension column) naming conventions of the cooked_data_gk tables
+KEY_PAIRS: List[Tuple[str, str]] = [
+    ("product_id", "product_id"),
+    ("material", "product_id"),
+    ("base_pack_design_id", "base_pack_design_id"),
+    ("sku_id", "sku_id"),
+    ("distributor_id", "distributor_erp_id"),
+    ("super_stockist_id", "superstockist_id"),
+    ("sold_to_party", "superstockist_id"),
+]
+
+_FACTS = {t for tables in FACT_TABLES.values() for t in tables}
+
+@dataclass(frozen=True)
+class JoinEdge:
+    left_table: str
+    left_column: str
+    right_table: str
+    right_column: str
+    source: str  # 'declared' | 'foreign_key' | 'key_pair' | 'shared_id'
+    cost: int
+
+    def reversed(self) -> "JoinEdge":
+        return JoinEdge(self.right_table, self.right_column, self.left_table, self.left_column,
+                        self.source, self.cost)
+
+JoinPath = Tuple[JoinEdge, ...]
+
+class JoinGraph:
+    def __init__(self, columns: Dict[str, Iterable[str]], edges: Iterable[JoinEdge]):
+        self.columns = {t: set(cs) for t, cs in columns.items()}
+        self.edges: List[JoinEdge] = []
+        self._adj: Dict[str, List[JoinEdge]] = {t: [] for t in self.columns}
+        seen = set()
+        for e in edges:
+            key = frozenset([(e.left_table, e.left_column), (e.right_table, e.right_column)])
+            if key in seen or e.left_table == e.right_table:
+                continue
+            if e.left_column not in self.columns.get(e.left_table, ()) or \
+               e.right_column not in self.columns.get(e.right_table, ()):
+                continue
+            seen.add(key)
+            self.edges.append(e)
+            self._adj[e.left_table].append(e)
+            self._adj[e.right_table].append(e.reversed())
+        self._paths: Dict[Tuple[str, str], JoinPath] = {}
+        for src in self.columns:
+            self._paths.update(self._shortest_from(src))
+
+    def _shortest_from(self, src: str) -> Dict[Tuple[str, str], JoinPath]:
+        """Dijkstra from `src`; ties go to the edge listed first (declared before discovered)."""
+        best: Dict[str, int] = {src: 0}
+        paths: Dict[Tuple[str, str], JoinPath] = {}
+        tie = itertools.count()
+        heap: List = [(0, next(tie), src, ())]
+        while heap:
+            cost, _, node, path = heapq.heappop(heap)
+            if cost > best.get(node, cost):
+                continue
+            if node != src:
+                if (src, node) in paths:
+                    continue
+                paths[(src, node)] = path
+                if node in _FACTS:
+                    continue  # never join onward through another fact
+            for e in self._adj.get(node, []):
+                nxt = cost + e.cost
+                if nxt < best.get(e.right_table, nxt + 1):
+                    best[e.right_table] = nxt
+                    heapq.heappush(heap, (nxt, next(tie), e.right_table, path + (e,)))
+        return paths
+
+    def path(self, src: str, dst: str) -> Optional[JoinPath]:
+        """Cheapest join chain from `src` to `dst`, or None if they are not connected."""
+        return self._paths.get((src, dst))
+
+    def neighbours(self, table: str) -> List[JoinEdge]:
+        return list(self._adj.get(table, []))
+
+# ---------- build ----------
+def _discovered(columns: Dict[str, Iterable[str]]) -> List[JoinEdge]:
+    cols = {t: set(cs) for t, cs in columns.items()}
+    out: List[JoinEdge] = []
+    for fact in [t for t in cols if t in _FACTS]:
+        for dim in [t for t in cols if t not in _FACTS]:
+            out += [JoinEdge(fact, fc, dim, dc, "key_pair", COST_KEY_PAIR)
+                    for fc, dc in KEY_PAIRS if fc in cols[fact] and dc in cols[dim]]
+    for a, b in itertools.combinations(sorted(cols), 2):
+        if a in _FACTS and b in _FACTS:
+            continue
+        out += [JoinEdge(a, c, b, c, "shared_id", COST_SHARED_ID)
+                for c in sorted(cols[a] & cols[b]) if c.endswith("_id")]
+    return out
+
+def build(columns: Dict[str, Iterable[str]],
+          foreign_keys: Iterable[Tuple[str, str, str, str]] = ()) -> JoinGraph:
+    """Graph over `columns` (table -> column names); pure, so it can be built without a DB."""
+    edges = [JoinEdge(lt, lc, rt, rc, "declared", COST_DECLARED) for lt, lc, rt, rc in relationship_edges()]
+    edges += [JoinEdge(lt, lc, rt, rc, "foreign_key", COST_FOREIGN_KEY) for lt, lc, rt, rc in foreign_keys]
+    edges += _discovered(columns)
+    return JoinGraph(columns, edges)
+
+_lock = threading.Lock()
+_graphs: Dict[Engine, Tuple[int, JoinGraph]] = {}
+
+def get(engine: Engine) -> JoinGraph:
+    """The engine's join graph, rebuilt only when the schema catalog has been invalidated."""
+    gen = schema_catalog.generation()
+    cached = _graphs.get(engine)
+    if cached and cached[0] == gen:
+        return cached[1]
+    with _lock:
+        cached = _graphs.get(engine)
+        if cached and cached[0] == gen:
+            return cached[1]
+        tables = schema_catalog.tables(engine)
+        graph = build({t: schema_catalog.columns(engine, t) for t in tables},
+                      schema_catalog.foreign_keys(engine))
+        _graphs[engine] = (gen, graph)
+        return graph
+
+# ---------- SQL ----------
+def join_clauses(path: JoinPath, alias: str, base: str = "p") -> str:
+    """LEFT JOINs from `base` along `path`; the last table gets `alias`, hops `alias`_1, ..."""
+    sql, prev = "", base
+    for i, e in enumerate(path, start=1):
+        a = alias if i == len(path) else f"{alias}_{i}"
+        sql += f'\nLEFT JOIN "{e.right_table}" {a} ON {prev}.{e.left_column} = {a}.{e.right_column}'
+        prev = a
+    return sql
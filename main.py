@@ -13,6 +13,7 @@ from tbl_col_info import table_info_and_examples
 from calculator import calculator_tool
 from sql_tool import clean_sql_query
 from today import get_today_date
+from ingest.parquet_cache import read_table
 import os
 import pandas as pd
 import re
@@ -91,7 +92,7 @@ def configure_db():
     csv_folder = Path.cwd() / "cooked_data_gk"
     for csv_file in glob.glob(str(csv_folder / "*.csv")):
         table_name = Path(csv_file).stem.lower()
-        df = pd.read_csv(csv_file)
+        df = read_table(csv_file)
         df.to_sql(table_name, conn, index=False, if_exists="replace")
     return SQLDatabase.from_uri("sqlite://", engine_args={"creator": lambda: conn})
 
@@ -14,6 +14,7 @@ from langchain.agents.agent import AgentExecutor
 
 from table_relationships import describe_table_relationships
 from tbl_col_info import table_info_and_examples
+from ingest.parquet_cache import read_table
 
 # ----- Streamlit Setup -----
 st.set_page_config(page_title="IQ Bot - Sales Assistant", page_icon="🧠")
@@ -55,7 +56,7 @@ def configure_db():
     csv_folder = Path(__file__).parent / "cooked_data_gk"
     for csv_file in glob.glob(str(csv_folder / "*.csv")):
         table_name = Path(csv_file).stem.lower()
-        df = pd.read_csv(csv_file)
+        df = read_table(csv_file)
         df.to_sql(table_name, conn, index=False, if_exists="replace")
     return SQLDatabase.from_uri("sqlite://", engine_args={"creator": lambda: conn})
 
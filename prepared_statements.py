@@ -0,0 +1,130 @@
+# prepared_statements.py
+"""
+Server-side prepared statements for the generated SQL. create_sql_query emits a template with
+named placeholders (:tok_0, :window_1, ...) plus a parameter dict, so every question of one
+shape has the same SQL text. On Postgres the template is PREPAREd once per connection, and
+later questions of that shape EXECUTE the saved plan with their own values. Each pooled
+connection keeps an LRU of its statements in its `info` dict (PREPARED_PER_CONNECTION,
+DEALLOCATEd on eviction), so statements die with their session.
+
+DuckDB runs in-process and has no EXECUTE with bound arguments. There the template is just
+executed with bound parameters. SQL without parameters (the LLM rewriter's) is run as-is.
+
+  SQL_PREPARE=0                 never prepare (e.g. behind a transaction-pooling pgbouncer)
+  PREPARED_PER_CONNECTION=64    statements kept per connection
+"""
+from __future__ import annotations
+import hashlib, os, re, threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+from db_backend import adapt_sql, dialect_of
+
+PREPARE = os.getenv("SQL_PREPARE", "1") == "1"
+PER_CONNECTION = int(os.getenv("PREPARED_PER_CONNECTION", "64"))
+
+# Same placeholder syntax as sqlalchemy.text(): `:name`, but not `::type` casts
+_PARAM_RE = re.compile(r"(?<![:\w\\]):(\w+)(?!:)")
+_INFO_KEY = "prepared_statements"
+# invalid_sql_statement_name; feature_not_supported ("cached plan must not change result
+# type", after an ingest changed a column's type): prepare again once
+_REPREPARE_CODES = {"26000", "0A000"}
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "unprepared": 0, "evictions": 0}
+
+def to_positional(sql: str) -> Tuple[str, List[str]]:
+    """(`sql` with $1..$n placeholders, parameter names in $-order); repeated names share a slot."""
+    names: List[str] = []
+
+    def _slot(m: re.Match) -> str:
+        if m.group(1) not in names:
+            names.append(m.group(1))
+        return f"${names.index(m.group(1)) + 1}"
+    return _PARAM_RE.sub(_slot, sql), names
+
+def _literal(v: Any) -> str:
+    if v is None:
+        return "NULL"
+    if isinstance(v, bool):
+        return "TRUE" if v else "FALSE"
+    if isinstance(v, (int, float)):
+        return repr(v)
+    if isinstance(v, (list, tuple)):
+        return "ARRAY[" + ", ".join(_literal(x) for x in v) + "]"
+    return "'" + str(v).replace("'", "''") + "'"
+
+def inline(sql: str, params: Dict[str, Any]) -> str:
+    """The template with its values written in as literals, for prompts and logs only."""
+    if not params:
+        return sql
+    return _PARAM_RE.sub(lambda m: _literal(params[m.group(1)]) if m.group(1) in params else m.group(0), sql)
+
+def _count(key: str) -> None:
+    with _lock:
+        _stats[key] += 1
+
+def _prepared(conn: Connection, sql: str) -> Tuple[str, List[str], bool]:
+    """(statement name, parameter order, cache hit) for `sql` on this connection."""
+    cache: "OrderedDict[str, Tuple[str, List[str]]]" = conn.connection.info.setdefault(_INFO_KEY, OrderedDict())
+    entry = cache.get(sql)
+    if entry is not None:
+        cache.move_to_end(sql)
+        return entry[0], entry[1], True
+    pg_sql, names = to_positional(sql)
+    name = "q_" + hashlib.sha1(sql.encode("utf-8")).hexdigest()[:16]
+    conn.exec_driver_sql(f"PREPARE {name} AS {pg_sql}")
+    cache[sql] = (name, names)
+    while len(cache) > PER_CONNECTION:
+        _, (old, _) = cache.popitem(last=False)
+        conn.exec_driver_sql(f"DEALLOCATE {old}")
+        _count("evictions")
+    return name, names, False
+
+def _execute_prepared(conn: Connection, sql: str, params: Dict[str, Any]):
+    name, names, hit = _prepared(conn, sql)
+    _count("hits" if hit else "misses")
+    args = ", ".join(f"%({n})s" for n in names)  # psycopg2 binds the EXECUTE arguments
+    rs = conn.exec_driver_sql(f"EXECUTE {name}({args})" if names else f"EXECUTE {name}",
+                              {n: params[n] for n in names})
+    return rs, "hit" if hit else "miss"
+
+def execute(engine: Engine, sql: str, params: Dict[str, Any] | None = None) -> Tuple[List[Any], List[str], str]:
+    """
+    (rows, column names, plan) of `sql` bound to `params`, through a prepared plan where
+    possible; plan is 'hit' or 'miss' (prepared on this connection now) or 'unprepared'.
+    """
+    params = params or {}
+    sql = adapt_sql(sql, engine)
+    with engine.connect() as conn:
+        if PREPARE and params and dialect_of(engine) == "postgresql":
+            try:
+                rs, plan = _execute_prepared(conn, sql, params)
+            except DBAPIError as e:
+                code = getattr(e.orig, "pgcode", None)
+                if code not in _REPREPARE_CODES:
+                    raise
+                conn.rollback()
+                entry = conn.connection.info.get(_INFO_KEY, {}).pop(sql, None)
+                if entry is None:  # PREPARE itself failed: nothing stale to retry
+                    raise
+                if code == "0A000":  # the statement exists, only its plan is stale
+                    conn.exec_driver_sql(f"DEALLOCATE {entry[0]}")
+                rs, plan = _execute_prepared(conn, sql, params)
+        else:
+            _count("unprepared")
+            rs, plan = conn.execute(text(sql), params), "unprepared"
+        try:
+            return rs.fetchall(), list(rs.keys()), plan
+        except Exception:
+            return [], [], plan
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        out = dict(_stats)
+    prepared = out["hits"] + out["misses"]
+    out["hit_rate"] = round(out["hits"] / prepared, 4) if prepared else 0.0
+    return out
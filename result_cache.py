@@ -0,0 +1,200 @@
+# result_cache.py
+"""
+Result cache for execute_sql_query. Field staff ask the same questions many times a day
+("Bhujia sales last 3 months"), and every repeat used to run the same SQL again. Results are
+kept per engine, keyed by the SQL text with its whitespace collapsed, the bound parameters
+and the data version (ingest.version). SQL that reads CURRENT_DATE also keys on today's date,
+so "last 3 months" moves on at midnight.
+
+  * memory: LRU bounded by RESULT_CACHE_MB of pickled results; entries older than
+    RESULT_CACHE_TTL_SECONDS are dropped on lookup, and a result larger than a quarter of the
+    cap is not cached
+  * disk (RESULT_CACHE_DIR, off by default): entries evicted from memory are spilled there as
+    pickles and promoted back on a hit; the directory is kept under RESULT_CACHE_DISK_MB
+  * invalidation: the ingest hook (`on_new_version`) clears memory and disk the moment a swap
+    lands; workers that did not run the ingest check the version at most every
+    RESULT_CACHE_VERSION_CHECK_SECONDS
+
+  RESULT_CACHE_MB=64  (0 disables)
+"""
+from __future__ import annotations
+import hashlib, json, os, pickle, re, time
+from collections import OrderedDict
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.engine import Engine
+
+from versioned_cache import Registry, VersionedCache
+
+MAX_BYTES = int(float(os.getenv("RESULT_CACHE_MB", "64")) * (1 << 20))
+TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "")
+DISK_MAX_BYTES = int(float(os.getenv("RESULT_CACHE_DISK_MB", "512")) * (1 << 20))
+VERSION_CHECK_SECONDS = float(os.getenv("RESULT_CACHE_VERSION_CHECK_SECONDS", "5"))
+
+_WS_RE = re.compile(r"\s+")
+_TODAY_RE = re.compile(r"\b(CURRENT_DATE|CURRENT_TIMESTAMP|NOW\(\))", re.IGNORECASE)
+
+# (rows, columns) as execute_sql_query puts them in the state
+Result = Tuple[List[tuple], List[str]]
+
+def normalize_sql(sql: str) -> str:
+    return _WS_RE.sub(" ", (sql or "").strip().rstrip(";"))
+
+class ResultCache(VersionedCache):
+    """Results of one engine; entries are (created, size, pickled (rows, columns))."""
+
+    label, noun = "Result cache", "result(s)"
+
+    def __init__(self, engine: Engine, spill_dir: Optional[Path] = None):
+        super().__init__(engine, VERSION_CHECK_SECONDS)
+        self.spill_dir = spill_dir
+        self.prefix = hashlib.sha1(engine.url.render_as_string(hide_password=True).encode("utf-8")).hexdigest()[:10]
+        self._mem: "OrderedDict[str, Tuple[float, int, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = self.disk_hits = self.misses = self.stores = 0
+        self.evictions = self.spills = self.expired = 0
+
+    # ---------- keys ----------
+    def key(self, sql: str, params: Optional[Dict[str, Any]] = None) -> str:
+        sql = normalize_sql(sql)
+        parts = [sql, params or {}, self.version, date.today().isoformat() if _TODAY_RE.search(sql) else None]
+        return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    # ---------- data version ----------
+    def _size(self) -> int:
+        return len(self._mem)
+
+    def _drop_all(self) -> None:
+        self._mem.clear()
+        self._bytes = 0
+
+    def _after_drop(self) -> None:
+        self._clear_disk()
+
+    # ---------- disk spill ----------
+    def _disk_path(self, key: str) -> Optional[Path]:
+        return self.spill_dir / f"{self.prefix}_{key}.pkl" if self.spill_dir else None
+
+    def _spill(self, key: str, entry: Tuple[float, int, bytes]) -> None:
+        path = self._disk_path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(pickle.dumps((entry[0], entry[2])))
+            os.replace(tmp, path)
+            self.spills += 1
+            self._trim_disk()
+        except OSError as e:
+            print(f"❌ Result cache spill failed: {e}")
+
+    def _trim_disk(self) -> None:
+        files = sorted(self.spill_dir.glob(f"{self.prefix}_*.pkl"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        for p in files:
+            if total <= DISK_MAX_BYTES:
+                break
+            total -= p.stat().st_size
+            p.unlink(missing_ok=True)
+
+    def _clear_disk(self) -> None:
+        if self.spill_dir and self.spill_dir.exists():
+            for p in self.spill_dir.glob(f"{self.prefix}_*.pkl"):
+                p.unlink(missing_ok=True)
+
+    def _from_disk(self, key: str) -> Optional[Tuple[float, bytes]]:
+        path = self._disk_path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            created, blob = pickle.loads(path.read_bytes())
+        except (OSError, pickle.PickleError, EOFError, ValueError):
+            path.unlink(missing_ok=True)
+            return None
+        path.unlink(missing_ok=True)  # promoted back to memory, or expired
+        return created, blob
+
+    # ---------- lookup / store ----------
+    def lookup(self, sql: str, params: Optional[Dict[str, Any]] = None) -> Optional[Result]:
+        self.check_version()
+        key = self.key(sql, params)
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                if now - entry[0] <= TTL_SECONDS:
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    return pickle.loads(entry[2])
+                self._drop(key)
+                self.expired += 1
+        spilled = self._from_disk(key)
+        if spilled is not None:
+            created, blob = spilled
+            if now - created <= TTL_SECONDS:
+                self._put(key, created, blob)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return pickle.loads(blob)
+        with self._lock:
+            self.expired += spilled is not None
+            self.misses += 1
+        return None
+
+    def store(self, sql: str, params: Optional[Dict[str, Any]], rows: List[Any], columns: List[str]) -> bool:
+        """Cache a successful result; False when it is too large to keep."""
+        blob = pickle.dumps(([tuple(r) for r in rows], list(columns)), protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > MAX_BYTES // 4:
+            return False
+        self.check_version()
+        self._put(self.key(sql, params), time.time(), blob)
+        with self._lock:
+            self.stores += 1
+        return True
+
+    def _drop(self, key: str) -> None:
+        entry = self._mem.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def _put(self, key: str, created: float, blob: bytes) -> None:
+        evicted = []
+        with self._lock:
+            self._drop(key)
+            self._mem[key] = (created, len(blob), blob)
+            self._bytes += len(blob)
+            while self._bytes > MAX_BYTES and len(self._mem) > 1:
+                old_key, old = self._mem.popitem(last=False)
+                self._bytes -= old[1]
+                self.evictions += 1
+                evicted.append((old_key, old))
+        for old_key, old in evicted:
+            if time.time() - old[0] <= TTL_SECONDS:
+                self._spill(old_key, old)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._bytes = 0
+        self._clear_disk()
+
+    def stats(self) -> Dict[str, Any]:
+        looked = self.hits + self.misses
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                "hit_rate": round(self.hits / looked, 4) if looked else 0.0,
+                "entries": len(self._mem), "bytes": self._bytes, "max_bytes": MAX_BYTES,
+                "stores": self.stores, "evictions": self.evictions, "spills": self.spills,
+                "expired": self.expired, "version": self.version, "invalidations": self.invalidations}
+
+# ---------- per-engine registry ----------
+_registry: Registry[ResultCache] = Registry(lambda engine: ResultCache(engine, Path(CACHE_DIR) if CACHE_DIR else None))
+get = _registry.get
+on_new_version = _registry.on_new_version
+stats = _registry.stats
+
+def enabled() -> bool:
+    return MAX_BYTES > 0
@@ -0,0 +1,138 @@
+# schema_catalog.py
+"""
+Process-wide, in-memory copy of the live schema's catalog: tables -> ordered columns -> data
+type, plus declared foreign keys. The first lookup per engine loads it with one
+information_schema query for the columns and one for the foreign keys. Every later
+`has_table` / `columns` / `tables` call is answered from memory, so the agents stop making
+catalog round trips on each question. Like the other data caches (versioned_cache), a
+catalog is dropped when the data version moves on: ingest_folder() calls `on_new_version()`
+once it has swapped new tables in, and every other worker reads the version table at most
+every SCHEMA_CATALOG_VERSION_CHECK_SECONDS. The next lookup reloads. `invalidate()` drops a
+catalog outright. `generation()` changes whenever a loaded catalog is dropped, so structures
+derived from the catalog (join_graph, sql_templates) know when to rebuild.
+
+`begin_request()` starts a per-request counter and `catalog_queries()` reads it. It counts
+the catalog queries issued on the request's behalf and stays at 0 once the catalog is warm.
+"""
+from __future__ import annotations
+import os
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from versioned_cache import Registry, VersionedCache
+
+VERSION_CHECK_SECONDS = float(os.getenv("SCHEMA_CATALOG_VERSION_CHECK_SECONDS", "5"))
+
+_COLUMNS_SQL = text("""
+    SELECT table_name, column_name, data_type
+    FROM information_schema.columns
+    WHERE table_schema = current_schema()
+    ORDER BY table_name, ordinal_position
+""")
+_FOREIGN_KEYS_SQL = text("""
+    SELECT kcu.table_name, kcu.column_name, ccu.table_name, ccu.column_name
+    FROM information_schema.table_constraints tc
+    JOIN information_schema.key_column_usage kcu
+      ON kcu.constraint_name = tc.constraint_name AND kcu.table_schema = tc.table_schema
+    JOIN information_schema.constraint_column_usage ccu
+      ON ccu.constraint_name = tc.constraint_name AND ccu.table_schema = tc.table_schema
+    WHERE tc.constraint_type = 'FOREIGN KEY' AND tc.table_schema = current_schema()
+""")
+
+_stats = {"loads": 0, "hits": 0, "invalidations": 0}
+_generation = 0
+
+# A mutable holder, so LangGraph's per-node context copies still count into the request's cell
+_request: ContextVar[Optional[Dict[str, int]]] = ContextVar("catalog_request", default=None)
+
+# ---------- load ----------
+def _load(engine: Engine) -> Dict:
+    cols: Dict[str, Dict[str, str]] = {}
+    with engine.connect() as conn:
+        for table, column, dtype in conn.execute(_COLUMNS_SQL).fetchall():
+            cols.setdefault(table, {})[column] = dtype
+        try:
+            fks = [tuple(r) for r in conn.execute(_FOREIGN_KEYS_SQL).fetchall()]
+        except Exception:
+            fks = []  # backends without constraint_column_usage declare none anyway
+    return {"columns": cols, "foreign_keys": fks}
+
+class Catalog(VersionedCache):
+    """The catalog of one engine, loaded on first lookup, for one data version."""
+
+    label, noun = "Schema catalog", "catalog"
+
+    def __init__(self, engine: Engine):
+        super().__init__(engine, VERSION_CHECK_SECONDS)
+        self.data: Optional[Dict] = None
+
+    def _size(self) -> int:
+        return int(self.data is not None)
+
+    def _drop_all(self) -> None:
+        global _generation
+        if self.data is not None:
+            self.data = None
+            _stats["invalidations"] += 1
+            _generation += 1
+
+_registry: Registry[Catalog] = Registry(Catalog)
+on_new_version = _registry.on_new_version
+
+def _catalog(engine: Engine) -> Dict:
+    cache = _registry.get(engine)
+    cache.check_version()
+    cat = cache.data
+    if cat is not None:
+        _stats["hits"] += 1
+        return cat
+    with cache._lock:
+        cat = cache.data
+        if cat is None:  # not loaded by another thread while we waited
+            cat = cache.data = _load(engine)
+            _stats["loads"] += 1
+            counter = _request.get()
+            if counter is not None:
+                counter["queries"] += 2
+    return cat
+
+# ---------- lookups ----------
+def tables(engine: Engine, include_internal: bool = False) -> List[str]:
+    """Sorted table names; underscore-prefixed ingest bookkeeping is hidden by default."""
+    return sorted(t for t in _catalog(engine)["columns"] if include_internal or not t.startswith("_"))
+
+def has_table(engine: Engine, table: str) -> bool:
+    return table in _catalog(engine)["columns"]
+
+def columns(engine: Engine, table: str) -> Dict[str, str]:
+    """column -> data_type in ordinal order ({} if the table does not exist)."""
+    return dict(_catalog(engine)["columns"].get(table, {}))
+
+def foreign_keys(engine: Engine) -> List[Tuple[str, str, str, str]]:
+    """(table, column, referenced_table, referenced_column) declared in the live schema."""
+    return list(_catalog(engine)["foreign_keys"])
+
+def invalidate(engine: Optional[Engine] = None) -> None:
+    """Forget the catalog of `engine` (default: every engine); the next lookup reloads it."""
+    global _generation
+    for cache in _registry.caches() if engine is None else [_registry.get(engine)]:
+        with cache._lock:
+            cache._drop_all()
+    _generation += 1  # even with nothing loaded: the caller knows the schema changed
+
+def generation() -> int:
+    return _generation
+
+# ---------- metrics ----------
+def begin_request() -> None:
+    _request.set({"queries": 0})
+
+def catalog_queries() -> int:
+    """Catalog queries issued since begin_request() in this context."""
+    counter = _request.get()
+    return counter["queries"] if counter else 0
+
+def stats() -> Dict[str, int]:
+    return dict(_stats, engines=sum(c.data is not None for c in _registry.caches()))
@@ -0,0 +1,392 @@
+# schema_registry.py
+"""
+Single source of truth for the cooked_data_gk tables: column types, date formats, NULL
+spellings, header clean-up and the semantic roles (facts, measures, entity name columns)
+that ingest, the entity matcher and the SQL generator all rely on.
+"""
+from __future__ import annotations
+import csv, hashlib, json, re, unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from sqlalchemy.types import Date, Numeric, String, Integer, Boolean
+
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PYARROW = True
+except Exception:
+    _HAS_PYARROW = False
+
+# ---------------------------------------------------------------------
+# Column types (DB side); keys are normalized, post-rename column names
+# ---------------------------------------------------------------------
+TABLE_COLUMN_TYPES: Dict[str, Dict] = {
+    "tbl_primary": {
+        "bill_date": Date,
+        "sales_order_date": Date,
+        "invoiced_total_quantity": Numeric,
+        "ordered_quantity": Numeric,
+        "short_close_qty": Numeric,
+        "distributor_id": Integer,
+        "distributor_name": String,
+        "product_id": String,
+        "product_name": String,
+        "super_stockist_id": Integer,
+        "super_stockist_name": String,
+    },
+    "tbl_shipment": {
+        "invoice_date": Date,
+        "actual_billed_quantity": Numeric,
+        "sold_to_party": Integer,
+        "sold_to_party_name": String,
+        "city": String,
+        "sales_district": String,
+        "supplying_plant": String,
+        "material": String,
+        "material_description": String,
+    },
+    "tbl_product_master": {
+        "industy_segment_name": String,
+        "pack_size_name": String,
+        "base_pack_design_name": String,
+        "industy_segment_id": String,
+        "pack_size_id": String,
+        "base_pack_design_id": String,
+        "product_name": String,
+        "ptr": Numeric,
+        "ptd": Numeric,
+        "display_mrp": Numeric,
+        "mrp": Numeric,
+        "alternate_product_category": String,
+        "product_id": String,
+        "is_promoted": Boolean,
+        "product_weight_in_gm": Integer,
+    },
+    "tbl_superstockist_master": {
+        "superstockist_name": String,
+        "superstockist_id": Integer,
+    },
+    "tbl_distributor_master": {
+        "superstockist_name": String,
+        "distributor_name": String,
+        "distributor_erp_id": Integer,
+        "distributor_channel": String,
+        "distributor_segmentation": String,
+        "state": String,
+        "city_of_warehouse_address": String,
+        "temp_created_date": Date,
+    },
+}
+
+DATE_COLUMNS: Dict[str, Dict[str, str]] = {
+    "tbl_primary": {
+        "bill_date": "%d/%m/%y",
+        "sales_order_date": "%d/%m/%y",
+    },
+    "tbl_shipment": {
+        "invoice_date": "%d/%m/%y",
+    },
+    "tbl_distributor_master": {
+        "temp_created_date": "%d/%m/%y",
+    },
+}
+
+# CSV header -> documented column name (annotated_schema_haldiram_primary.md)
+COLUMN_RENAMES: Dict[str, Dict[str, str]] = {
+    "tbl_product_master": {
+        "product": "product_name",
+        "product_erp_id": "product_id",
+        "alternate_category": "alternate_product_category",
+    },
+}
+
+NA_VALUES: List[str] = ["NULL", "null", "Null", "NA", "N/A", "#N/A", "nan", "NaN", ""]
+
+# pyarrow's multi-threaded reader only pays off once its start-up cost is amortized
+PYARROW_MIN_BYTES = 4 << 20
+
+# ---------------------------------------------------------------------
+# Semantic roles
+# ---------------------------------------------------------------------
+FACT_TABLES: Dict[str, List[str]] = {
+    "primary": ["tbl_primary"],
+    "shipment": ["tbl_shipment", "tbl_dispatch", "tbl_secondary", "tbl_shipments"],
+}
+
+# The date a time window filters on, per fact
+FACT_DATE_COLUMN: Dict[str, str] = {
+    "tbl_primary": "bill_date",
+    "tbl_shipment": "invoice_date",
+}
+
+# hint ('qty'|'value') -> measure column, per fact
+MEASURE_COLUMNS: Dict[str, Dict[str, str]] = {
+    "tbl_primary": {"qty": "invoiced_total_quantity"},
+    "tbl_shipment": {"qty": "actual_billed_quantity"},
+}
+
+# Fuzzy-matchable name columns; fact lists are in probe order (actors first)
+ENTITY_COLUMNS: Dict[str, List[str]] = {
+    "tbl_primary": ["super_stockist_name", "distributor_name", "product_name", "material_description", "material"],
+    "tbl_shipment": ["sold_to_party_name", "material_description", "city", "sales_district", "material"],
+    "tbl_superstockist_master": ["superstockist_name"],
+    "tbl_distributor_master": ["distributor_name"],
+    "tbl_product_master": ["product_name", "base_pack_design_name", "material_description", "alternate_product_category"],
+}
+DIMENSION_TABLES: List[str] = ["tbl_superstockist_master", "tbl_distributor_master", "tbl_product_master"]
+
+# Text columns folded into each table's SEARCH_TEXT_COLUMN at ingest (normalize_search)
+SEARCH_COLUMNS: Dict[str, List[str]] = {
+    "tbl_primary": ["super_stockist_name", "distributor_name", "product_name"],
+    "tbl_shipment": ["sold_to_party_name", "material_description", "material"],
+    "tbl_superstockist_master": ["superstockist_name"],
+    "tbl_distributor_master": ["distributor_name"],
+    "tbl_product_master": ["product_name", "base_pack_design_name"],
+}
+
+# Materialized search column; bump SEARCH_NORMALIZATION when normalize_search changes
+SEARCH_TEXT_COLUMN = "search_text"
+SEARCH_NORMALIZATION = 1
+for _t in SEARCH_COLUMNS:
+    TABLE_COLUMN_TYPES.setdefault(_t, {})[SEARCH_TEXT_COLUMN] = String
+
+# Join edges: relationships.json is the machine-readable source (DB column names); the prose
+# relationship_tables.txt is still fed to prompts and parsed only when the JSON is missing
+RELATIONSHIPS_JSON = "relationships.json"
+RELATIONSHIPS_FILE = "relationship_tables.txt"
+
+# Pre-aggregated rollups (ingest/rollups.py): the fact's date column is bucketed per grain,
+# these columns are grouped on, and every Numeric column is summed under its own name
+ROLLUP_DIMENSIONS: Dict[str, List[str]] = {
+    "tbl_primary": ["product_id", "product_name", "distributor_id", "distributor_name",
+                    "super_stockist_id", "super_stockist_name", SEARCH_TEXT_COLUMN],
+    "tbl_shipment": ["material", "material_description", "sold_to_party", "sold_to_party_name",
+                     SEARCH_TEXT_COLUMN],
+}
+ROLLUP_GRAINS = ("daily", "monthly")
+
+# ---------------------------------------------------------------------
+# Header normalization
+# ---------------------------------------------------------------------
+def normalize_header(name: str) -> str:
+    """'\\ufeffSuper _Stockist_State ' -> 'super_stockist_state'"""
+    n = str(name).replace("\ufeff", "").strip().lower()
+    n = re.sub(r"\s*_\s*", "_", n)
+    return re.sub(r"\s+", "_", n)
+
+def canonical_columns(table: str, header: List[str]) -> Dict[str, str]:
+    """raw CSV header -> column name used in the DB."""
+    renames = COLUMN_RENAMES.get(table, {})
+    out = {}
+    for raw in header:
+        n = normalize_header(raw)
+        out[raw] = renames.get(n, n)
+    return out
+
+def csv_header(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        return next(csv.reader(f), [])
+
+# ---------------------------------------------------------------------
+# Read-time typing
+# ---------------------------------------------------------------------
+def _pandas_dtype(sql_type) -> Optional[str]:
+    t = sql_type if isinstance(sql_type, type) else type(sql_type)
+    if issubclass(t, Date):
+        return "string"  # parsed with the declared format after the read
+    if issubclass(t, Integer):
+        return "Int64"
+    if issubclass(t, Numeric):
+        return "float64"
+    if issubclass(t, Boolean):
+        return "boolean"
+    if issubclass(t, String):
+        return "string"
+    return None
+
+def read_options(table: str, header: List[str]) -> Dict:
+    """read_csv kwargs (dtype keyed by raw header, na_values) for one table."""
+    types = TABLE_COLUMN_TYPES.get(table, {})
+    dtype = {}
+    for raw, col in canonical_columns(table, header).items():
+        pd_t = _pandas_dtype(types[col]) if col in types else None
+        if pd_t:
+            dtype[raw] = pd_t
+    return {"dtype": dtype, "na_values": NA_VALUES, "keep_default_na": True}
+
+def apply_dates(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    for col, fmt in DATE_COLUMNS.get(table, {}).items():
+        if col in df.columns:
+            try:
+                df[col] = pd.to_datetime(df[col], format=fmt, errors="coerce").dt.date
+            except Exception as e:
+                print(f"❌ Date parsing failed for {table}.{col}: {e}")
+    return df
+
+def finalize_frame(df: pd.DataFrame, table: str, header: List[str]) -> pd.DataFrame:
+    df = df.rename(columns=canonical_columns(table, header))
+    return add_search_text(apply_dates(df, table), table)
+
+# ---------------------------------------------------------------------
+# Search text
+# ---------------------------------------------------------------------
+_MOJIBAKE_RE = re.compile("[\u00c2\u00c3]")  # 'Â'/'Ã': UTF-8 bytes once decoded as cp1252
+_DIGIT_ALPHA_RE = re.compile(r"(?<=\d)(?=[a-z])|(?<=[a-z])(?=\d)")
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+def normalize_search(s: Optional[str]) -> str:
+    """
+    'Ambarsariya Â Classic Lassi' -> 'ambarsariya classic lassi', 'Bhujia 200Gm*24' ->
+    'bhujia 200 gm 24': mojibake repaired, accents and punctuation folded, lower-cased,
+    sizes split from their units.
+    """
+    if not s:
+        return ""
+    s = str(s)
+    if _MOJIBAKE_RE.search(s):
+        try:
+            s = s.encode("cp1252").decode("utf-8")
+        except UnicodeError:
+            s = _MOJIBAKE_RE.sub(" ", s)  # stray lead byte before a plain space
+    s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii").lower()
+    s = _DIGIT_ALPHA_RE.sub(" ", s)
+    return " ".join(_NON_WORD_RE.split(s)).strip()
+
+def add_search_text(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    """
+    Fill SEARCH_TEXT_COLUMN with the normalized SEARCH_COLUMNS of each row, so the generator
+    filters one indexed column with plain LIKE instead of LOWER() over several. Values repeat
+    heavily, so each distinct one is normalized once.
+    """
+    cols = [c for c in SEARCH_COLUMNS.get(table, []) if c in df.columns]
+    if not cols:
+        return df
+    parts = []
+    for c in cols:
+        vals = df[c].astype("string")
+        memo = {v: normalize_search(v) for v in vals.dropna().unique()}
+        parts.append(vals.map(memo, na_action="ignore").fillna(""))
+    text_ = parts[0]
+    for p in parts[1:]:
+        text_ = text_ + " " + p
+    df[SEARCH_TEXT_COLUMN] = text_.str.strip().astype(object)
+    return df
+
+def table_name_for(path: str) -> str:
+    return Path(path).stem.lower()
+
+def read_csv(path: str, table: Optional[str] = None, chunksize: Optional[int] = None, **kwargs):
+    """
+    Typed read of one source CSV. Returns a DataFrame, or an iterator of typed frames when
+    `chunksize` is given. Uses the pyarrow engine for large files when installed (not for
+    chunked reads).
+    """
+    table = table or table_name_for(path)
+    header = csv_header(path)
+    opts = read_options(table, header)
+    opts.update(kwargs)
+    if chunksize:
+        def _chunks():
+            with pd.read_csv(path, chunksize=chunksize, **opts) as reader:
+                for chunk in reader:
+                    yield finalize_frame(chunk, table, header)
+        return _chunks()
+    if _HAS_PYARROW and "engine" not in opts and Path(path).stat().st_size >= PYARROW_MIN_BYTES:
+        try:
+            return finalize_frame(pd.read_csv(path, engine="pyarrow", **opts), table, header)
+        except Exception:
+            pass  # quirky files fall back to the C parser
+    return finalize_frame(pd.read_csv(path, **opts), table, header)
+
+def spec_fingerprint(table: str) -> str:
+    """Changes whenever any read/typing rule for `table` changes."""
+    payload = {
+        "types": {c: getattr(t, "__name__", str(t)) for c, t in sorted(TABLE_COLUMN_TYPES.get(table, {}).items())},
+        "dates": DATE_COLUMNS.get(table, {}),
+        "renames": COLUMN_RENAMES.get(table, {}),
+        "na": NA_VALUES,
+        "search": [SEARCH_COLUMNS.get(table, []), SEARCH_NORMALIZATION],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+# ---------------------------------------------------------------------
+# Lookups for agents
+# ---------------------------------------------------------------------
+def fact_candidates(route: str) -> List[str]:
+    return FACT_TABLES.get(route, FACT_TABLES["primary"])
+
+def entity_columns(table: str) -> List[str]:
+    return ENTITY_COLUMNS.get(table, [])
+
+def fact_date_column(table: str) -> Optional[str]:
+    return FACT_DATE_COLUMN.get(table)
+
+def measure_column(table: str, hint: str) -> Optional[str]:
+    return MEASURE_COLUMNS.get(table, {}).get(hint)
+
+def search_columns(table: str) -> List[str]:
+    return SEARCH_COLUMNS.get(table, [])
+
+def search_text_column(table: str) -> Optional[str]:
+    return SEARCH_TEXT_COLUMN if table in SEARCH_COLUMNS else None
+
+def rollup_table(fact: str, grain: str) -> str:
+    return f"_rollup_{fact}_{grain}"
+
+# ---------------------------------------------------------------------
+# Relationships (relationships.json / relationship_tables.txt)
+# ---------------------------------------------------------------------
+_REL_HEADING_RE = re.compile(r"^#+\s*\d*\.?\s*(\w+)\s*↔\s*(\w+)")
+_REL_EDGE_RE = re.compile(r"^\s*-\s*`?(\w+)\.(\w+)`?\s*→\s*`?(\w+)\.(\w+)`?")
+
+def _canonical_column(table: str, col: str) -> str:
+    col = normalize_header(col)
+    return COLUMN_RENAMES.get(table.lower(), {}).get(col, col)
+
+def _json_edges(path: str) -> Optional[List[Tuple[str, str, str, str]]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+    except OSError:
+        return None
+    items = doc.get("relationships", []) if isinstance(doc, dict) else doc
+    edges = []
+    for r in items:
+        lt, rt = r["left_table"].lower(), r["right_table"].lower()
+        edge = (lt, _canonical_column(lt, r["left_column"]), rt, _canonical_column(rt, r["right_column"]))
+        if edge not in edges:
+            edges.append(edge)
+    return edges
+
+def relationship_edges(path: Optional[str] = None) -> List[Tuple[str, str, str, str]]:
+    """
+    (left_table, left_col, right_table, right_col) for every declared relationship, in DB
+    column names. Read from relationships.json, else from the '- a.x → b.y' lines of the
+    prose file. A prose edge listed under a '#### a ↔ b' heading takes its tables from the
+    heading (the file says tbl_primary.sold_to_party under the shipment section).
+    """
+    if path is None or path.endswith(".json"):
+        edges = _json_edges(path or RELATIONSHIPS_JSON)
+        if edges is not None or path is not None:
+            return edges or []
+    try:
+        with open(path or RELATIONSHIPS_FILE, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+    edges, heading = [], None
+    for line in lines:
+        h = _REL_HEADING_RE.match(line.strip())
+        if h:
+            heading = (h.group(1).lower(), h.group(2).lower())
+            continue
+        m = _REL_EDGE_RE.match(line)
+        if not m:
+            continue
+        lt, lc, rt, rc = m.group(1).lower(), m.group(2), m.group(3).lower(), m.group(4)
+        if heading and rt in heading:
+            lt = heading[0] if heading[1] == rt else heading[1]
+        edge = (lt, _canonical_column(lt, lc), rt, _canonical_column(rt, rc))
+        if edge not in edges:
+            edges.append(edge)
+    return edges
@@ -0,0 +1,259 @@
+# schema_retrieval.py
+"""
+Question-specific schema for the clean_query_node prompt. Without it, every cleaning call
+carries the whole of annotated_schema_haldiram_primary.md.
+
+The per-table sections (kb_haldiram_primary.pkl, plus any table the pickle lacks from the
+markdown) are split into one document per table description and one per column. A BM25
+index over those documents is built once per process. `prompt_schema(question)` returns the
+top-k tables, rendered in the original section format. Each table keeps the question's
+best-matching columns first, and the rest are added until the token budget is spent. A
+question that matches nothing gets every table's one-line description, so the cleaner can
+still tell when the question is OUT_OF_SCOPE.
+
+  SCHEMA_PRUNING=0          send the full markdown (the old prompt, for comparisons)
+  SCHEMA_TOP_K_TABLES=2     tables per prompt
+  SCHEMA_TOKEN_BUDGET=900   schema tokens per prompt
+"""
+from __future__ import annotations
+import json, math, os, pickle, re, threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from schema_registry import FACT_TABLES
+
+try:
+    import tiktoken
+    _ENC = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _ENC = None
+
+SCHEMA_MARKDOWN = "annotated_schema_haldiram_primary.md"
+SCHEMA_KB = "kb_haldiram_primary.pkl"
+
+PRUNING = os.getenv("SCHEMA_PRUNING", "1") == "1"
+TOP_K_TABLES = int(os.getenv("SCHEMA_TOP_K_TABLES", "2"))
+TOKEN_BUDGET = int(os.getenv("SCHEMA_TOKEN_BUDGET", "900"))
+
+_BM25_K1, _BM25_B = 1.2, 0.75
+# Added to a table's score when the question names it ("shipment", "product master"), so the
+# fact a question is routed to outranks tables that merely mention the word
+_NAME_BOOST = 5.0
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_SECTION_RE = re.compile(r"^###\s+\*\*(\w+)\*\*\s*$", re.MULTILINE)
+_JSON_RE = re.compile(r"```json\s*(.*?)```", re.DOTALL)
+_USER_Q_RE = re.compile(r"USER QUESTION:\s*(.*)", re.IGNORECASE | re.DOTALL)
+_ALLOWED_RE = re.compile(r'Use ONLY these tables:\s*(.*?)\.\s', re.IGNORECASE | re.DOTALL)
+
+# Words that phrase a question without naming anything in it; answer_cache drops them too
+QUESTION_FILLER = frozenset({
+    "a", "an", "the", "of", "for", "in", "on", "at", "with", "all", "is", "are", "was", "were",
+    "did", "do", "does", "can", "could", "would", "i", "me", "my", "we", "us", "our", "you",
+    "show", "tell", "give", "get", "what", "whats", "how", "much", "many",
+    "please", "pls", "plz", "kindly",
+})
+_STOPWORDS = QUESTION_FILLER | {
+    "by", "to", "from", "and", "or", "which", "last", "this", "that", "its", "it", "be", "as", "each", "per",
+}
+# Business words in questions -> the words the schema uses for them
+_SYNONYMS: Dict[str, List[str]] = {
+    "ss": ["super", "stockist"], "superstockist": ["super", "stockist"], "stockist": ["super", "stockist"],
+    "sales": ["invoiced", "quantity", "sales"], "sold": ["invoiced", "quantity"], "sale": ["invoiced", "quantity", "sales"],
+    "sku": ["product"], "item": ["product"], "items": ["product"], "brand": ["product", "base", "pack"],
+    "dispatch": ["shipment"], "secondary": ["shipment"], "shipped": ["shipment", "billed"],
+    "distributors": ["distributor"], "products": ["product"], "dealer": ["distributor"],
+}
+
+def count_tokens(s: str) -> int:
+    """tiktoken count when installed, else the usual ~4 characters per token estimate."""
+    if _ENC is not None:
+        return len(_ENC.encode(s))
+    return max(1, len(s) // 4)
+
+def tokenize(s: str) -> List[str]:
+    """Lower-cased words; snake_case names also yield their joined form (super_stockist -> superstockist)."""
+    words = _TOKEN_RE.findall((s or "").lower())
+    joined = [w.replace("_", "") for w in re.findall(r"[a-z0-9]+(?:_[a-z0-9]+)+", (s or "").lower())]
+    return words + joined
+
+def _query_terms(question: str) -> List[str]:
+    terms: List[str] = []
+    for t in tokenize(question):
+        if t in _STOPWORDS:
+            continue
+        terms.append(t)
+        terms += _SYNONYMS.get(t, [])
+    return terms
+
+# ---------- sections ----------
+@dataclass
+class TableSection:
+    table: str
+    description: str
+    columns: List[str] = field(default_factory=list)  # "col : description <sample values: ...>"
+
+    def render(self, columns: Optional[List[str]] = None) -> str:
+        cols = self.columns if columns is None else columns
+        body = ",\n".join(f"  [{json.dumps(c, ensure_ascii=False)}]" for c in cols)
+        return (f"### **{self.table}**\n```json\n[{json.dumps(self.description, ensure_ascii=False)}, \n"
+                f"[\n{body}\n]]\n```")
+
+def _parse_section(table: str, text: str) -> Optional[TableSection]:
+    m = _JSON_RE.search(text)
+    try:
+        doc = json.loads(m.group(1)) if m else None
+    except ValueError:
+        doc = None
+    if not doc:
+        return None
+    cols = [c[0] if isinstance(c, list) else str(c) for c in (doc[1] if len(doc) > 1 else [])]
+    return TableSection(table, str(doc[0]), cols)
+
+def load_sections(markdown_path: str = SCHEMA_MARKDOWN, kb_path: str = SCHEMA_KB) -> Dict[str, TableSection]:
+    """Sections from the KB pickle, plus any table that only the markdown documents."""
+    raw: Dict[str, str] = {}
+    try:
+        with open(markdown_path, "r", encoding="utf-8") as f:
+            md = f.read()
+        heads = list(_SECTION_RE.finditer(md))
+        for i, h in enumerate(heads):
+            end = heads[i + 1].start() if i + 1 < len(heads) else len(md)
+            raw[h.group(1)] = md[h.start():end]
+    except OSError:
+        pass
+    try:
+        with open(kb_path, "rb") as f:
+            raw.update(pickle.load(f))
+    except Exception:
+        pass
+    out = {}
+    for table, text in raw.items():
+        sec = _parse_section(table, text)
+        if sec:
+            out[table] = sec
+    return out
+
+# ---------- BM25 ----------
+class SchemaIndex:
+    """BM25 over one document per table description and one per column."""
+
+    def __init__(self, sections: Dict[str, TableSection]):
+        self.sections = sections
+        self.docs: List[Tuple[str, Optional[int]]] = []  # (table, column index | None)
+        self._tf: List[Counter] = []
+        for table, sec in sections.items():
+            self._add((table, None), f"{table} {sec.description}")
+            for i, col in enumerate(sec.columns):
+                self._add((table, i), f"{table} {col}")
+        n = len(self.docs)
+        self._avg_len = sum(sum(tf.values()) for tf in self._tf) / n if n else 0.0
+        df = Counter(t for tf in self._tf for t in tf)
+        self._idf = {t: math.log(1 + (n - d + 0.5) / (d + 0.5)) for t, d in df.items()}
+
+    def _add(self, key: Tuple[str, Optional[int]], text: str) -> None:
+        self.docs.append(key)
+        self._tf.append(Counter(tokenize(text)))
+
+    def _score(self, i: int, terms: List[str]) -> float:
+        tf, length = self._tf[i], sum(self._tf[i].values())
+        s = 0.0
+        for t in terms:
+            f = tf.get(t)
+            if f:
+                norm = f + _BM25_K1 * (1 - _BM25_B + _BM25_B * length / (self._avg_len or 1))
+                s += self._idf[t] * f * (_BM25_K1 + 1) / norm
+        return s
+
+    def rank(self, question: str, allowed: Optional[List[str]] = None
+             ) -> List[Tuple[str, float, Dict[int, float]]]:
+        """[(table, score, {column index: score})] best first; a table scores its best document."""
+        terms = _query_terms(question)
+        tables: Dict[str, float] = {}
+        cols: Dict[str, Dict[int, float]] = {}
+        for i, (table, col) in enumerate(self.docs):
+            if allowed is not None and table not in allowed:
+                continue
+            s = self._score(i, terms)
+            if s <= 0:
+                continue
+            tables[table] = max(tables.get(table, 0.0), s)
+            if col is not None:
+                cols.setdefault(table, {})[col] = s
+        for table in tables:
+            if set(terms) & (set(tokenize(table)) - {"tbl"}):
+                tables[table] += _NAME_BOOST
+        ranked = sorted(tables.items(), key=lambda kv: -kv[1])
+        return [(t, s, cols.get(t, {})) for t, s in ranked]
+
+    def select(self, question: str, top_k: int = TOP_K_TABLES, budget: int = TOKEN_BUDGET,
+               allowed: Optional[List[str]] = None) -> Tuple[str, List[str]]:
+        """(schema markdown for the prompt, tables included)."""
+        ranked = self.rank(question, allowed)[:top_k]
+        if not ranked:
+            secs = [s for t, s in self.sections.items() if allowed is None or t in allowed]
+            return "\n\n".join(s.render([]) for s in secs), []
+        parts: List[str] = []
+        spent = 0
+        for table, _, col_scores in ranked:
+            sec = self.sections[table]
+            spent += count_tokens(sec.render([]))
+            # best-matching columns first, then the rest in file order; the best one always fits
+            order = sorted(col_scores, key=lambda i: -col_scores[i])
+            order += [i for i in range(len(sec.columns)) if i not in col_scores]
+            keep = []
+            for i in order:
+                cost = count_tokens(sec.columns[i]) + 3
+                if keep and spent + cost > budget:
+                    continue
+                keep.append(i)
+                spent += cost
+            parts.append(sec.render([sec.columns[i] for i in sorted(keep)]))
+        return "\n\n".join(parts), [t for t, _, _ in ranked]
+
+# ---------- public ----------
+_lock = threading.Lock()
+_index: Optional[SchemaIndex] = None
+_full: Optional[str] = None
+
+def get_index() -> SchemaIndex:
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = SchemaIndex(load_sections())
+    return _index
+
+def full_schema() -> str:
+    global _full
+    if _full is None:
+        with open(SCHEMA_MARKDOWN, "r", encoding="utf-8") as f:
+            _full = f.read()
+    return _full
+
+_SHIPMENT_WORDS = ("shipment", "dispatch", "secondary", "delivery", "invoice")
+
+def split_question(user_query: str) -> Tuple[str, Optional[List[str]]]:
+    """(question text, table allowlist) from a guardrail-prefixed UI payload."""
+    m = _USER_Q_RE.search(user_query or "")
+    question = m.group(1).strip() if m else (user_query or "").strip()
+    a = _ALLOWED_RE.search(user_query or "")
+    allowed = re.findall(r'"(\w+)"', a.group(1)) if a else None
+    return question, allowed
+
+def prompt_schema(user_query: str, route: Optional[str] = None,
+                  pruning: Optional[bool] = None) -> Tuple[str, List[str]]:
+    """
+    (schema markdown for the cleaning prompt, tables chosen; [] = full or descriptions only).
+    Like find_tables_node, the other route's fact table is left out; without a route
+    preference it is inferred the way create_sql_query does.
+    """
+    if not (PRUNING if pruning is None else pruning):
+        return full_schema(), []
+    question, allowed = split_question(user_query)
+    route = (route or "").lower().strip()
+    if route not in FACT_TABLES:
+        route = "shipment" if any(w in question.lower() for w in _SHIPMENT_WORDS) else "primary"
+    other = {t for r, ts in FACT_TABLES.items() if r != route for t in ts}
+    pool = [t for t in (allowed or get_index().sections) if t not in other]
+    return get_index().select(question, allowed=pool)
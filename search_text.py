@@ -0,0 +1,92 @@
+# search_text.py
+"""
+Query side of the materialized search column. Ingest folds each table's SEARCH_COLUMNS into
+one normalized `search_text` (schema_registry.normalize_search); create_sql_query then filters
+it with one `search_text LIKE :tok` per question term, ANDed, which a single trigram index
+serves on Postgres.
+
+The old OR over columns x tokens shrugged off words that name nothing ("shipment", "show");
+AND does not. So tokens are first checked against the table's vocabulary: the set of words
+in the normalized distinct values of its search columns, taken from the entity index, plus their
+runs of up to PHRASE_WORDS words ("40 gm"). A term is kept only if it is one of them, so
+"show" does not pass for "showroom" nor "40 kg" for "40 gm ... 10 kg". When no term is known,
+`query_terms` returns nothing and the generator keeps the per-column OR filter it used before
+the search column existed.
+
+With ENTITY_MATCHER=trgm the workers keep no entity dictionaries, so the vocabulary is not
+built: the terms are checked in the database instead, one EXISTS per term over the table's
+search column, as whole words of some row's `search_text` (the LIKE on the bare term lets
+the trigram index narrow the rows).
+"""
+from __future__ import annotations
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+import entity_index, schema_catalog
+from entity_trgm import ENTITY_MATCHER
+from ingest.identifiers import quote
+from schema_registry import SEARCH_TEXT_COLUMN, normalize_search, search_columns
+
+PHRASE_WORDS = 3
+
+_lock = threading.Lock()
+# (engine, table) -> (the ColumnIndex objects the words came from, words)
+_vocab: Dict[Tuple[Engine, str], Tuple[tuple, FrozenSet[str]]] = {}
+
+def vocabulary(engine: Engine, table: str) -> FrozenSet[str]:
+    """Words and short word runs of the normalized values of `table`'s search columns."""
+    present = schema_catalog.columns(engine, table)
+    idx = entity_index.get(engine)
+    cols = tuple(idx.column(table, c) for c in search_columns(table) if c in present)
+    cached = _vocab.get((engine, table))
+    # the cache holds the column indexes themselves, so a rebuilt one never compares equal
+    if cached and len(cached[0]) == len(cols) and all(a is b for a, b in zip(cached[0], cols)):
+        return cached[1]
+    with _lock:
+        words = set()
+        for c in cols:
+            for i in range(len(c)):
+                ws = normalize_search(c.values[i]).split()
+                for n in range(1, PHRASE_WORDS + 1):
+                    words.update(" ".join(ws[k:k + n]) for k in range(len(ws) - n + 1))
+        vocab = frozenset(words)
+        _vocab[(engine, table)] = (cols, vocab)
+    return vocab
+
+def _known(term: str, vocab: FrozenSet[str]) -> bool:
+    ws = term.split()
+    if len(ws) <= PHRASE_WORDS:
+        return term in vocab
+    return all(" ".join(ws[k:k + PHRASE_WORDS]) in vocab for k in range(len(ws) - PHRASE_WORDS + 1))
+
+def known_terms(terms: Iterable[str], vocab: FrozenSet[str]) -> List[str]:
+    """The normalized `terms` that are whole `vocab` words or word runs, in order."""
+    return [t for t in terms if _known(t, vocab)]
+
+def server_terms(engine: Engine, table: str, terms: List[str]) -> List[str]:
+    """known_terms resolved in the database: the `terms` that are whole words of some row's search text."""
+    col = quote(SEARCH_TEXT_COLUMN)
+    checks = [f"EXISTS (SELECT 1 FROM {quote(table)} WHERE {col} LIKE :s{i} AND ' ' || {col} || ' ' LIKE :w{i})"
+              for i in range(len(terms))]
+    params = {}
+    for i, t in enumerate(terms):
+        params[f"s{i}"], params[f"w{i}"] = f"%{t}%", f"% {t} %"
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT " + ", ".join(checks)), params).one()
+    return [t for t, known in zip(terms, row) if known]
+
+def query_terms(engine: Engine, table: str, tokens: Iterable[str]) -> List[str]:
+    """Normalized `tokens` worth a `search_text LIKE` predicate on `table`; [] when none is known."""
+    terms: List[str] = []
+    for t in tokens:
+        n = normalize_search(t)
+        if n and n not in terms:
+            terms.append(n)
+    if not terms:
+        return []
+    if ENTITY_MATCHER == "trgm":
+        return server_terms(engine, table, terms)
+    return known_terms(terms, vocabulary(engine, table))
@@ -0,0 +1,76 @@
+# sql_templates.py
+"""
+Signature -> SQL template cache for create_sql_query. Most questions are a few shapes with
+different names and windows ("X last N months", "top N products", "by distributor"). Each
+question is parsed into an intent, and the intent minus its values (route, fact, measure hint,
+whether there is a window or top-N, breakdown kind, entity columns, token counts, schema
+catalog generation) is its signature. The first question of a shape generates the SQL. Later
+ones take the cached template and bind their own values to its slots, skipping the catalog
+probes, join planning, rollup routing and string assembly.
+
+An ingest bumps the catalog generation, so templates of the old schema stop matching and age
+out of the LRU.
+
+  SQL_TEMPLATE_CACHE=256    templates kept (0 disables)
+"""
+from __future__ import annotations
+import os, threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+ENTRIES = int(os.getenv("SQL_TEMPLATE_CACHE", "256"))
+
+@dataclass(frozen=True)
+class Template:
+    sql: str
+    rollup_table: Optional[str]
+    slots: Tuple[Tuple[str, str], ...]  # (placeholder, intent slot)
+
+_lock = threading.Lock()
+_cache: "OrderedDict[tuple, Template]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "hit_ms": 0.0, "miss_ms": 0.0}
+
+def lookup(signature: tuple) -> Optional[Template]:
+    if ENTRIES <= 0:
+        return None
+    with _lock:
+        tpl = _cache.get(signature)
+        if tpl is None:
+            _stats["misses"] += 1
+            return None
+        _cache.move_to_end(signature)
+        _stats["hits"] += 1
+        return tpl
+
+def store(signature: tuple, template: Template) -> None:
+    if ENTRIES <= 0:
+        return
+    with _lock:
+        _cache[signature] = template
+        _cache.move_to_end(signature)
+        while len(_cache) > ENTRIES:
+            _cache.popitem(last=False)
+            _stats["evictions"] += 1
+
+def timed(kind: str, ms: float) -> None:
+    """Add one create_sql_query run ('hit' or 'miss') to the timing totals."""
+    if ENTRIES <= 0:
+        return
+    with _lock:
+        _stats[f"{kind}_ms"] += ms
+
+def clear() -> None:
+    with _lock:
+        _cache.clear()
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        out: Dict[str, Any] = dict(_stats)
+        out["size"], out["capacity"] = len(_cache), ENTRIES
+    hits, misses = out["hits"], out["misses"]
+    out["hit_rate"] = round(hits / (hits + misses), 4) if hits + misses else 0.0
+    out["avg_hit_ms"] = round(out.pop("hit_ms") / hits, 4) if hits else 0.0
+    out["avg_generate_ms"] = round(out.pop("miss_ms") / misses, 4) if misses else 0.0
+    out["saved_ms"] = round(hits * max(out["avg_generate_ms"] - out["avg_hit_ms"], 0.0), 2)
+    return out
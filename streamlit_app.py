@@ -3,8 +3,8 @@ from __future__ import annotations
 from typing import List, Set, Dict, Any
 import json
 import streamlit as st
-from sqlalchemy import inspect
 
+import schema_catalog
 from service import get_engine, llm_reply
 
 # -------------------- Page --------------------
@@ -19,8 +19,7 @@ st.set_page_config(
 ENGINE = get_engine()
 
 def get_all_tables() -> List[str]:
-    insp = inspect(ENGINE)
-    return sorted(insp.get_table_names())
+    return schema_catalog.tables(ENGINE)
 
 def allowed_tables_for(domain: str, all_tables: List[str]) -> List[str]:
     """Primary → all except tbl_shipment; Shipment → all except tbl_primary."""
@@ -0,0 +1,37 @@
+# tests/conftest.py
+"""
+Tests run on throwaway DuckDB files, with every on-disk cache (entity snapshots, learned
+aliases, spilled results) switched off so nothing leaks between tests or into the checkout.
+"""
+from __future__ import annotations
+import os, sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ["DB_BACKEND"] = "duckdb"
+os.environ["ENTITY_SNAPSHOT_DIR"] = ""
+os.environ["ENTITY_ALIAS_DIR"] = ""
+os.environ["RESULT_CACHE_DIR"] = ""
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+import schema_catalog
+
+@pytest.fixture
+def engine(tmp_path):
+    eng = create_engine(f"duckdb:///{tmp_path / 'test.duckdb'}")
+    yield eng
+    eng.dispose()
+
+@pytest.fixture
+def load(engine):
+    """load(table, df): write `df` as `table` and drop the catalog's view of the engine."""
+    def _load(table: str, df: pd.DataFrame) -> None:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{table}"')
+        df.to_sql(table, engine, index=False)
+        schema_catalog.invalidate(engine)
+    return _load
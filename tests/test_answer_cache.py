@@ -0,0 +1,81 @@
+# tests/test_answer_cache.py
+import pandas as pd
+import pytest
+
+from answer_cache import AnswerCache, canonical
+
+@pytest.mark.parametrize("a, b", [
+    ("bhujia vs lassi growth from 2023 to 2024", "lassi vs bhujia growth from 2023 to 2024"),
+    ("bhujia vs lassi growth from 2023 to 2024", "bhujia vs lassi growth from 2024 to 2023"),
+    ("sales between 2023 and 2024", "sales between 2024 and 2023"),
+    ("top 3 distributors for 5 products", "top 5 distributors for 3 products"),
+    ("3 distributors with 5 products", "5 distributors with 3 products"),
+    ("2024 sales", "sales last 1 year"),
+    ("bhujia sales 2024", "bhujia sales 2023"),
+    ("bhujia 200 gm sales", "bhujia 400 gm sales"),
+    ("bhujia 200 gm sales", "bhujia 200 kg sales"),
+    ("sales since 2023", "sales 2023"),
+    ("bhujia sales last 3 months", "bhujia sales last 6 months"),
+    ("top 5 products", "top 3 products"),
+    ("how many distributors sold bhujia", "distributors sold bhujia"),
+    ("how much bhujia did we sell", "how many bhujia did we sell"),
+])
+def test_different_questions_get_different_keys(a, b):
+    assert canonical(a) != canonical(b)
+
+@pytest.mark.parametrize("a, b", [
+    ("bhujia sales last 3 months", "Sales of Bhujia in the past three months"),
+    ("bhujia versus lassi", "show me Bhujia compared to lassi"),
+    ("sales from 2023 to 2024", "sales between 2023 and 2024"),
+    ("bhujia 200gm sales", "Bhujia 200 gms sales"),
+    ("top 5 products last 3 months", "Show me the top five products in the last 3 months"),
+    ("how many distributors sold bhujia", "How many distributors sold Bhujia?"),
+])
+def test_paraphrases_share_a_key(a, b):
+    assert canonical(a) == canonical(b)
+
+def test_a_number_pairs_only_with_a_unit():
+    assert "2024 sale" not in canonical("2024 sales")
+    assert "3 distributor" not in canonical("3 distributors")
+    assert "200 gm" in canonical("bhujia 200 gms")
+    assert "3 month" in canonical("sales in 3 months")
+
+def test_swapped_entities_differ_with_resolution(engine, load):
+    load("tbl_primary", pd.DataFrame({
+        "super_stockist_name": ["S B MARKPLUS PRIVATE LIMITED"] * 2,
+        "distributor_name": ["SAWARIYA TRADING", "KANSAL ESTATE"],
+        "product_name": ["Bhujia 200 GM", "Classic Lassi 200 ML"], "actual_billed_quantity": [1, 2]}))
+    a = canonical("SAWARIYA TRADING vs Kansal Estate sales", engine)
+    b = canonical("Kansal Estate vs SAWARIYA TRADING sales", engine)
+    assert "@" in a and a != b
+    assert a == canonical("sawariya trading versus kansal estate sales", engine)
+
+def _ui(question, tables):
+    return "Use ONLY these tables: " + ", ".join(f'"{t}"' for t in tables) \
+        + f". Do NOT reference any other tables.\n\nUSER QUESTION: {question}"
+
+def test_ui_payload_is_keyed_on_the_question(engine):
+    cache = AnswerCache(engine)
+    ns, key = cache._key(_ui("bhujia sales last 3 months", ["tbl_primary"]), "primary")
+    assert key == canonical("bhujia sales last 3 months", engine)
+    assert ns.startswith("primary@") and ns != cache.namespace("primary")
+    assert cache._key(_ui("bhujia sales", ["tbl_primary", "tbl_product_master"]), "primary")[0] != ns
+    assert cache._key(_ui("bhujia sales", ["tbl_product_master", "tbl_primary"]), "primary")[0] \
+        == cache._key(_ui("bhujia sales", ["tbl_primary", "tbl_product_master"]), "primary")[0]
+
+def test_ui_answer_is_served_for_the_same_allowlist_only(engine):
+    cache = AnswerCache(engine)
+    result = {"exec_success": True, "query_result": "42"}
+    assert cache.store(_ui("bhujia sales", ["tbl_primary"]), "primary", result, 10.0)
+    assert cache.lookup(_ui("Sales of Bhujia", ["tbl_primary"]), "primary")["query_result"] == "42"
+    assert cache.lookup(_ui("bhujia sales", ["tbl_shipment"]), "primary") is None
+    assert cache.lookup("bhujia sales", "primary") is None
+    assert cache.evict("primary") == 1
+
+def test_entity_keys_follow_the_resolved_values(engine, load):
+    load("tbl_primary", pd.DataFrame({
+        "super_stockist_name": ["S B MARKPLUS PRIVATE LIMITED", "S B MARKPLUS PRIVATE LIMITED-2"],
+        "distributor_name": ["SAWARIYA TRADING", "KANSAL ESTATE"],
+        "product_name": ["Bhujia 200 GM", "Classic Lassi 200 ML"], "actual_billed_quantity": [1, 2]}))
+    assert canonical("S B Markplus sales", engine) == canonical("sb markplus sales", engine)
+    assert canonical("sb markplus sales", engine) != canonical("S B Markplus Private Limited sales", engine)
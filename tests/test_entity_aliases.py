@@ -0,0 +1,63 @@
+# tests/test_entity_aliases.py
+import pandas as pd
+import pytest
+
+import entity_index
+from entity_aliases import AliasCache, span_key
+
+SB = ("tbl_primary", "super_stockist_name", "S B MARKPLUS PRIVATE LIMITED", 0.9)
+BHUJIA = ("tbl_primary", "product_name", "Bhujia 200 GM", 0.9)
+
+@pytest.fixture
+def aliases(engine, load):
+    load("tbl_primary", pd.DataFrame({
+        "super_stockist_name": ["S B MARKPLUS PRIVATE LIMITED"] * 3,
+        "distributor_name": ["SAWARIYA TRADING", "KANSAL ESTATE", "KANSAL ESTATE"],
+        "product_name": ["Bhujia 200 GM", "Aloo Bhujia 400 GM", "Classic Lassi"],
+        "actual_billed_quantity": [1, 2, 3]}))
+    entity_index.get(engine).warm()
+    return AliasCache(engine)
+
+def test_key_is_the_resolved_span():
+    assert span_key("sb marke sales last 3 months", SB[2]) == "sb marke"
+    assert span_key("total sales of S B Marke in the past six months", SB[2]) == "sb marke"
+    assert span_key("sales last 3 months", SB[2]) == ""
+
+def test_alias_fires_for_other_questions_naming_the_span(aliases):
+    assert aliases.learn("sb marke sales last 3 months", "primary", SB)
+    assert aliases.entries()["learned"][0]["phrase"] == "primary|sb marke"
+    assert aliases.lookup("top sb marke sales last month", "primary") == SB
+    assert aliases.lookup("sb marke sales last 3 months", "shipment") is None
+
+def test_alias_does_not_bind_unrelated_words(aliases):
+    aliases.learn("sb marke sales last 3 months", "primary", SB)
+    assert aliases.lookup("sales last 3 months", "primary") is None
+    assert aliases.lookup("kansal sales last 3 months", "primary") is None
+
+def test_entity_words_beside_the_span_match_afresh(aliases):
+    assert aliases.learn("bhujia sales", "primary", BHUJIA)
+    assert aliases.lookup("bhujia sales last week", "primary") == BHUJIA
+    assert aliases.lookup("aloo bhujia sales", "primary") is None
+
+def test_unresolved_or_weak_matches_are_not_learned(aliases):
+    assert not aliases.learn("sales last 3 months", "primary", SB)
+    assert not aliases.learn("sb marke sales", "primary", SB[:3] + (0.2,))
+
+def test_trgm_mode_checks_entity_words_in_the_database(engine, load, monkeypatch):
+    import entity_aliases
+    load("tbl_primary", pd.DataFrame({
+        "super_stockist_name": ["S B MARKPLUS PRIVATE LIMITED"] * 2,
+        "distributor_name": ["SAWARIYA TRADING", "KANSAL ESTATE"],
+        "product_name": ["Bhujia 200 GM", "Aloo Bhujia 400 GM"], "actual_billed_quantity": [1, 2]}))
+    monkeypatch.setattr(entity_aliases, "ENTITY_MATCHER", "trgm")
+    aliases = AliasCache(engine)
+    assert aliases.learn("bhujia sales", "primary", BHUJIA)
+    assert aliases.lookup("bhujia sales last week", "primary") == BHUJIA
+    assert aliases.lookup("aloo bhujia sales", "primary") is None
+    assert entity_index.get(engine).columns() == {}  # no dictionaries in the worker
+
+def test_pin_checks_the_value_exists(aliases):
+    assert aliases.pin("sbm", *SB[:3]) == SB[:3] + (1.0,)
+    assert aliases.lookup("sbm sales", "shipment") == SB[:3] + (1.0,)
+    with pytest.raises(ValueError):
+        aliases.pin("sbm", "tbl_primary", "super_stockist_name", "NOBODY")
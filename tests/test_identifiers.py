@@ -0,0 +1,23 @@
+# tests/test_identifiers.py
+import pandas as pd
+from sqlalchemy import text
+
+from ingest.duckdb_loader import insert_frame
+from ingest.identifiers import qualified, quote
+from ingest.indexes import IndexSpec, _ddl
+
+def test_quote_doubles_embedded_quotes():
+    assert quote('say "hi"') == '"say ""hi"""'
+    assert qualified('t"x', 's"y') == '"s""y"."t""x"'
+    assert qualified("t") == '"t"'
+
+def test_index_ddl_escapes_the_column():
+    ddl = _ddl(None, IndexSpec("widgets", 'id"; DROP TABLE widgets; --', "key"))
+    assert 'ON "widgets" ("id""; DROP TABLE widgets; --")' in ddl
+
+def test_duckdb_insert_with_quoted_names(engine):
+    table, column = 'odd"table', 'odd "name"'
+    with engine.begin() as conn:
+        insert_frame(conn, pd.DataFrame({column: [1, 2]}), table, {})
+    with engine.connect() as conn:
+        assert conn.execute(text(f"SELECT SUM({quote(column)}) FROM {quote(table)}")).scalar() == 3
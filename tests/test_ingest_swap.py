@@ -0,0 +1,57 @@
+# tests/test_ingest_swap.py
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+import result_cache
+from ingest import loader, staging, version
+
+def _csv(folder, rows):
+    pd.DataFrame({"widget_id": list(range(rows)), "widget_name": [f"w{i}" for i in range(rows)]}) \
+        .to_csv(folder / "widgets.csv", index=False)
+
+def _ingest(engine, folder):
+    return loader.ingest_folder(engine, folder, build_indexes=False, rollups=False)
+
+def _rows(engine):
+    with engine.connect() as conn:
+        return conn.execute(text('SELECT COUNT(*) FROM "widgets"')).scalar()
+
+@pytest.fixture
+def hooks(monkeypatch):
+    seen = []
+    monkeypatch.setattr(result_cache, "on_new_version", lambda engine, v: seen.append(v))
+    return seen
+
+def test_swap_bumps_the_version_and_runs_hooks(engine, tmp_path, hooks):
+    _csv(tmp_path, 3)
+    report = _ingest(engine, tmp_path)
+    assert report.swapped == ["widgets"] and report.data_version == 1 == version.current_version(engine)
+    assert hooks == [1] and _rows(engine) == 3
+
+def test_unchanged_run_keeps_the_version_and_skips_hooks(engine, tmp_path, hooks):
+    _csv(tmp_path, 3)
+    _ingest(engine, tmp_path)
+    report = _ingest(engine, tmp_path)
+    assert report.swapped == [] and report.data_version == 1
+    assert hooks == [1]
+
+def test_failed_swap_rolls_back(engine, tmp_path, hooks, monkeypatch):
+    _csv(tmp_path, 3)
+    _ingest(engine, tmp_path)
+    _csv(tmp_path, 5)
+
+    def _fail_after_swap(conn, tables):
+        swap(conn, tables)  # the live table is replaced inside the transaction ...
+        raise RuntimeError("disk full")  # ... which then fails
+    swap = staging._swap_duckdb
+    monkeypatch.setattr(staging, "_swap_duckdb", _fail_after_swap)
+
+    report = _ingest(engine, tmp_path)
+    assert report.swapped == [] and report.data_version == 1 == version.current_version(engine)
+    assert report.results[0].status == "failed" and "disk full" in report.results[0].detail
+    assert hooks == [1] and _rows(engine) == 3
+
+    monkeypatch.setattr(staging, "_swap_duckdb", swap)
+    report = _ingest(engine, tmp_path)  # the manifest was rolled back too, so it loads again
+    assert report.data_version == 2 and _rows(engine) == 5
@@ -0,0 +1,39 @@
+# tests/test_parquet_cache.py
+import os
+import pandas as pd
+import pytest
+
+from ingest import loader, manifest, parquet_cache
+
+pytest.importorskip("pyarrow")
+
+@pytest.fixture
+def hashes(monkeypatch):
+    seen = []
+    real = manifest.content_hash
+    def _counting(path):
+        seen.append(os.path.basename(path))
+        return real(path)
+    monkeypatch.setattr(manifest, "content_hash", _counting)
+    monkeypatch.setattr(parquet_cache, "content_hash", _counting)
+    return seen
+
+def _csv(folder, rows):
+    path = folder / "widgets.csv"
+    pd.DataFrame({"widget_id": list(range(rows))}).to_csv(path, index=False)
+    return str(path)
+
+def test_load_hashes_each_changed_csv_once(engine, tmp_path, hashes):
+    _csv(tmp_path, 3)
+    loader.ingest_folder(engine, tmp_path, build_indexes=False, rollups=False)
+    assert hashes == ["widgets.csv"]
+
+def test_touched_csv_is_fresh_by_the_given_digest(tmp_path, hashes):
+    path = _csv(tmp_path, 3)
+    digest = manifest.content_hash(path)
+    parquet_cache.build(path, "widgets", digest=digest)
+    os.utime(path, ns=(0, 0))  # same content, new mtime
+    hashes.clear()
+    assert parquet_cache.is_fresh(path, "widgets", digest)
+    assert hashes == []
+    assert not parquet_cache.is_fresh(path, "widgets", "0" * 64)
@@ -0,0 +1,62 @@
+# tests/test_prepared_statements.py
+"""
+PREPARE/EXECUTE runs only on Postgres: set TEST_DATABASE_URL to a scratch database (the tests
+create and drop their own table) to run the second half.
+"""
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+
+import prepared_statements
+from prepared_statements import inline, to_positional
+
+def test_placeholders_become_positional_and_repeats_share_a_slot():
+    sql, names = to_positional("SELECT x::text, :a, :b, CAST(:a AS INTERVAL) WHERE x = ANY(:ent_2)")
+    assert sql == "SELECT x::text, $1, $2, CAST($1 AS INTERVAL) WHERE x = ANY($3)"
+    assert names == ["a", "b", "ent_2"]
+
+def test_inline_quotes_values_for_display():
+    assert inline("WHERE n ILIKE :t AND k = ANY(:e)", {"t": "%Haldiram's%", "e": [1, 2]}) == \
+        "WHERE n ILIKE '%Haldiram''s%' AND k = ANY(ARRAY[1, 2])"
+
+@pytest.fixture
+def pg():
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL not set")
+    pytest.importorskip("psycopg2")
+    engine = create_engine(url, pool_size=1, max_overflow=0)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS _prepared_test"))
+        conn.execute(text("CREATE TABLE _prepared_test (name TEXT, qty INTEGER, d DATE)"))
+        conn.execute(text("INSERT INTO _prepared_test VALUES ('Haldiram''s Bhujia', 2, CURRENT_DATE), "
+                          "('Lassi', 3, CURRENT_DATE - 400)"))
+    yield engine
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS _prepared_test"))
+    engine.dispose()
+
+SQL = ("SELECT SUM(qty) AS total FROM _prepared_test "
+       "WHERE name ILIKE :tok_0 AND name = ANY(:ent_1) AND d >= CURRENT_DATE - CAST(:window_2 AS INTERVAL)")
+
+def test_execute_binds_psycopg2_arguments_and_reuses_the_plan(pg):
+    params = {"tok_0": "%haldiram's%", "ent_1": ["Haldiram's Bhujia", "Lassi"], "window_2": "3 months"}
+    rows, cols, plan = prepared_statements.execute(pg, SQL, params)
+    assert (rows, cols, plan) == ([(2,)], ["total"], "miss")
+    rows, _, plan = prepared_statements.execute(pg, SQL, dict(params, tok_0="%lassi%", window_2="2 years"))
+    assert (rows, plan) == ([(3,)], "hit")
+
+def test_stale_plan_is_prepared_again(pg):
+    params = {"tok_0": "%%", "ent_1": ["Lassi"], "window_2": "2 years"}
+    assert prepared_statements.execute(pg, SQL, params)[2] == "miss"
+    with pg.begin() as conn:
+        conn.execute(text("ALTER TABLE _prepared_test ALTER COLUMN qty TYPE BIGINT"))
+    rows, _, plan = prepared_statements.execute(pg, SQL, params)
+    assert rows == [(3,)] and plan == "miss"
+
+def test_failing_prepare_surfaces_the_database_error(pg):
+    from sqlalchemy.exc import DBAPIError
+    with pytest.raises(DBAPIError) as err:
+        prepared_statements.execute(pg, "SELECT * FROM _no_such_table WHERE x = :x_0", {"x_0": 1})
+    assert "_no_such_table" in str(err.value)
@@ -0,0 +1,48 @@
+# tests/test_rollup_routing.py
+import pandas as pd
+import pytest
+
+import schema_catalog
+from agents.create_sql_query import _rollup_source, create_sql_query
+from ingest.rollups import build_rollups
+from schema_registry import add_search_text
+
+DAILY, MONTHLY = "_rollup_tbl_primary_daily", "_rollup_tbl_primary_monthly"
+
+@pytest.fixture
+def facts(engine, load):
+    today = pd.Timestamp.today().normalize()
+    df = pd.DataFrame({
+        "bill_date": [today - pd.Timedelta(days=d) for d in (1, 2, 40, 400)],
+        "invoiced_total_quantity": [1.0, 2.0, 3.0, 4.0],
+        "product_id": ["P1", "P1", "P2", "P2"], "product_name": ["Bhujia 200 GM"] * 2 + ["Classic Lassi"] * 2,
+        "distributor_id": [1, 1, 2, 2], "distributor_name": ["SAWARIYA TRADING"] * 2 + ["KANSAL ESTATE"] * 2,
+        "super_stockist_id": [9] * 4, "super_stockist_name": ["S B MARKPLUS PRIVATE LIMITED"] * 4,
+        "ordered_quantity": [1.0] * 4})
+    load("tbl_primary", add_search_text(df, "tbl_primary"))
+    assert build_rollups(engine, {"tbl_primary": None}, None) == [DAILY, MONTHLY]
+    schema_catalog.invalidate(engine)
+    return engine
+
+def test_sum_without_dates_reads_the_monthly_rollup(facts):
+    assert _rollup_source(facts, "tbl_primary", {"invoiced_total_quantity", "product_id"},
+                          [("SUM", "invoiced_total_quantity")], "bill_date") == MONTHLY
+
+def test_a_query_touching_the_date_needs_daily_buckets(facts):
+    assert _rollup_source(facts, "tbl_primary", {"invoiced_total_quantity", "bill_date"},
+                          [("SUM", "invoiced_total_quantity")], "bill_date") == DAILY
+
+@pytest.mark.parametrize("fn", ["COUNT", "AVG", "COUNT DISTINCT", "MAX"])
+def test_other_aggregates_stay_on_the_fact(facts, fn):
+    assert _rollup_source(facts, "tbl_primary", {"invoiced_total_quantity"},
+                          [(fn, "invoiced_total_quantity")], "bill_date") is None
+
+def test_columns_missing_from_the_rollup_stay_on_the_fact(facts):
+    assert _rollup_source(facts, "tbl_primary", {"invoiced_total_quantity", "sales_order_date"},
+                          [("SUM", "invoiced_total_quantity")], "bill_date") is None
+
+def test_generated_sql_reads_the_rollup_it_reports(facts):
+    st = create_sql_query({"user_query": "bhujia sales last 3 months", "engine": facts, "route_preference": "primary"})
+    assert st["rollup_table"] == DAILY and f'FROM "{DAILY}" p' in st["sql_query"]
+    st = create_sql_query({"user_query": "top 5 products", "engine": facts, "route_preference": "primary"})
+    assert st["rollup_table"] == MONTHLY and f'FROM "{MONTHLY}" p' in st["sql_query"]
@@ -0,0 +1,63 @@
+# tests/test_search_text.py
+import pandas as pd
+
+import search_text
+from agents.create_sql_query import _tokens
+from schema_registry import add_search_text
+
+PRODUCTS = ["Bhujia 200Gm*24", "Aloo Bhujia 400 GM", "Ambarsariya Â Classic Lassi", "Palak Sev MRP 10|40 GM*10 KG"]
+
+def _primary(load):
+    df = pd.DataFrame({"super_stockist_name": ["S B MARKPLUS PRIVATE LIMITED"] * 4,
+                       "distributor_name": ["SAWARIYA TRADING", "Kansal Estate", "SHOWROOM AGENCIES", "GIVEWELL"],
+                       "product_name": PRODUCTS, "actual_billed_quantity": [1, 2, 3, 4]})
+    load("tbl_primary", add_search_text(df, "tbl_primary"))
+
+def test_filler_words_are_dropped(engine, load):
+    _primary(load)
+    # "show" and "give" sit inside SHOWROOM / GIVEWELL but are not words of any value
+    terms = search_text.query_terms(engine, "tbl_primary", _tokens("show me bhujia sales, give lassi"))
+    assert terms == ["bhujia", "lassi"]
+
+def test_no_known_term_returns_nothing(engine, load):
+    _primary(load)
+    assert search_text.query_terms(engine, "tbl_primary", _tokens("show me shipment numbers")) == []
+
+def test_sizes_match_as_whole_words(engine, load):
+    _primary(load)
+    assert search_text.query_terms(engine, "tbl_primary", ["40gm", "sev", "40kg"]) == ["40 gm", "sev"]
+
+def test_vocabulary_follows_reload(engine, load):
+    import entity_index
+    _primary(load)
+    assert search_text.query_terms(engine, "tbl_primary", ["moong"]) == []
+    df = pd.DataFrame({"super_stockist_name": ["X"], "distributor_name": ["Y"],
+                       "product_name": ["Moong Dal 200 GM"], "actual_billed_quantity": [1]})
+    load("tbl_primary", add_search_text(df, "tbl_primary"))
+    entity_index.refresh(engine, ["tbl_primary"])
+    assert search_text.query_terms(engine, "tbl_primary", ["moong"]) == ["moong"]
+
+def _sql(engine, question: str) -> dict:
+    from agents.create_sql_query import create_sql_query
+    return create_sql_query({"user_query": question, "engine": engine, "route_preference": "primary"})
+
+def test_known_terms_are_anded_on_search_text(engine, load):
+    _primary(load)
+    st = _sql(engine, "show me bhujia sales")
+    assert "search_text LIKE" in st["sql_query"] and "ILIKE" not in st["sql_query"]
+    assert list(st["sql_params"].values()) == ["%bhujia%"]
+
+def test_no_known_term_falls_back_to_or_filter(engine, load):
+    _primary(load)
+    st = _sql(engine, "show me shipment numbers")
+    assert "search_text" not in st["sql_query"]
+    assert " OR " in st["sql_query"] and "ILIKE" in st["sql_query"]
+
+def test_trgm_mode_checks_terms_in_the_database(engine, load, monkeypatch):
+    import entity_index
+    _primary(load)
+    monkeypatch.setattr(search_text, "ENTITY_MATCHER", "trgm")
+    terms = search_text.query_terms(engine, "tbl_primary", _tokens("show me bhujia sales, give lassi"))
+    assert terms == ["bhujia", "lassi"]
+    assert search_text.query_terms(engine, "tbl_primary", ["40gm", "sev", "40kg"]) == ["40 gm", "sev"]
+    assert entity_index.get(engine).columns() == {}  # no dictionaries in the worker
@@ -0,0 +1,53 @@
+# tests/test_versioned_cache.py
+import pytest
+
+import answer_cache, entity_aliases, result_cache
+from ingest import version
+
+ANSWER = {"exec_success": True, "query_result": "42", "route": "primary"}
+
+def _fill(module, cache):
+    if module is result_cache:
+        cache.store("SELECT 1", {}, [(1,)], ["x"])
+        return lambda: cache.lookup("SELECT 1", {}) is not None
+    if module is answer_cache:
+        cache.store("bhujia sales", "primary", ANSWER, 1.0)
+        return lambda: cache.lookup("bhujia sales", "primary") is not None
+    cache._learned["primary|bhujia"] = ("tbl_primary", "product_name", "Bhujia", 0.9)
+    return lambda: bool(cache.entries()["learned"])
+
+@pytest.mark.parametrize("module", [result_cache, answer_cache, entity_aliases])
+def test_ingest_hook_drops_entries(engine, module):
+    cache = module.get(engine)
+    cache.check_version()
+    present = _fill(module, cache)
+    assert present()
+    module.on_new_version(engine, cache.version + 1)
+    assert not present() and cache.invalidations == 1
+
+@pytest.mark.parametrize("module", [result_cache, answer_cache, entity_aliases])
+def test_other_workers_follow_the_version_table(engine, module):
+    version.ensure_version_table(engine)
+    cache = module.get(engine)
+    cache.check_seconds = 0
+    cache.check_version()
+    present = _fill(module, cache)
+    with engine.begin() as conn:
+        version.bump(conn, ["tbl_primary"])
+    cache.check_version()
+    assert not present() and cache.version == 1
+
+def test_schema_catalog_follows_the_version_table(engine, load, monkeypatch):
+    import pandas as pd
+    import schema_catalog
+    from sqlalchemy import text
+    version.ensure_version_table(engine)
+    load("widgets", pd.DataFrame({"widget_id": [1]}))
+    monkeypatch.setattr(schema_catalog._registry.get(engine), "check_seconds", 0)
+    assert list(schema_catalog.columns(engine, "widgets")) == ["widget_id"]
+    gen = schema_catalog.generation()
+    with engine.begin() as conn:  # a swap run by another process
+        conn.execute(text('ALTER TABLE "widgets" ADD COLUMN widget_name VARCHAR'))
+        version.bump(conn, ["widgets"])
+    assert list(schema_catalog.columns(engine, "widgets")) == ["widget_id", "widget_name"]
+    assert schema_catalog.generation() > gen
@@ -0,0 +1,94 @@
+# versioned_cache.py
+"""
+Shared plumbing of the caches built from served data (entity_aliases, result_cache,
+answer_cache). Each keeps one cache object per engine and drops its entries when the data
+version (ingest.version) moves on, through one of two paths:
+
+  * the ingest hook: ingest/loader.py calls `on_new_version(engine, version)` on the registry
+    right after a swap commits, in the process that ran the ingest
+  * a version check: every other worker reads current_version() at most every
+    `check_seconds`, on its next lookup or store
+
+A subclass names its entries (`label`, `noun`) and implements `_size` and `_drop_all` (both
+called under the lock), plus `_after_drop` for work outside it (deleting files, saving).
+"""
+from __future__ import annotations
+import threading, time
+from typing import Callable, Dict, Generic, List, Optional, TypeVar
+from sqlalchemy.engine import Engine
+
+from ingest.version import current_version
+
+class VersionedCache:
+    """Entries of one engine, valid for one data version."""
+
+    label = "Cache"
+    noun = "entries"
+
+    def __init__(self, engine: Engine, check_seconds: float):
+        self.engine = engine
+        self.check_seconds = check_seconds
+        self.version: Optional[int] = None
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._checked_at = float("-inf")
+
+    def _size(self) -> int:
+        raise NotImplementedError
+
+    def _drop_all(self) -> None:
+        raise NotImplementedError
+
+    def _after_drop(self) -> None:
+        pass
+
+    def set_version(self, version: int) -> None:
+        """Drop every entry computed against another data version."""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if self.version == version:
+                return
+            n = self._size()
+            if n:
+                print(f"🔄 {self.label}: data version {self.version} -> {version}, dropped {n} {self.noun}")
+            if self.version is not None:
+                self.invalidations += 1
+            self._drop_all()
+            self.version = version
+        self._after_drop()
+
+    def check_version(self) -> None:
+        """Follow ingests run by other processes; call before every lookup and store."""
+        if time.monotonic() - self._checked_at >= self.check_seconds:
+            self.set_version(current_version(self.engine))
+
+C = TypeVar("C", bound=VersionedCache)
+
+class Registry(Generic[C]):
+    """One cache per engine, created on first use by `factory`."""
+
+    def __init__(self, factory: Callable[[Engine], C]):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._caches: Dict[Engine, C] = {}
+
+    def get(self, engine: Engine) -> C:
+        cache = self._caches.get(engine)
+        if cache is None:
+            with self._lock:
+                cache = self._caches.get(engine)
+                if cache is None:
+                    cache = self._caches[engine] = self._factory(engine)
+        return cache
+
+    def on_new_version(self, engine: Engine, version: int) -> None:
+        """Called by ingest; a no-op for engines without a cache yet (they check on first use)."""
+        cache = self._caches.get(engine)
+        if cache is not None:
+            cache.set_version(version)
+
+    def caches(self) -> List[C]:
+        return list(self._caches.values())
+
+    def stats(self) -> Dict[str, Dict]:
+        return {e.url.render_as_string(hide_password=True): c.stats() for e, c in list(self._caches.items())}